@@ -1,3 +1,4 @@
 from .datasets import (dowjones, engine, euroex, exchange, fremantle, glass, 
                        portpirie, rain, venice, wavesurge, wind, wooster, 
-                       harris1996)
+                       harris1996, registry, DatasetRecord)
+from . import synthetic
@@ -10,11 +10,97 @@ re-visited - a new look at extreme value statistics applied to wind speeds"
 """
 
 import os as _os
+import hashlib as _hashlib
+import tempfile as _tempfile
+from collections import OrderedDict as _OrderedDict
+from functools import lru_cache as _lru_cache
 
 import numpy as _np
 
 _path = _os.path.dirname(_os.path.abspath(__file__))
 
+# Parsed datasets are stored as .npy files in this directory and memory mapped
+# afterwards. It can be changed using the SKEXTREMES_CACHE environment
+# variable (an empty value disables the cache).
+_default_cache = _os.path.join(
+    _os.environ.get('XDG_CACHE_HOME',
+                    _os.path.join(_os.path.expanduser('~'), '.cache')),
+    'skextremes')
+
+
+def _cache_dir():
+    return _os.environ.get('SKEXTREMES_CACHE', _default_cache)
+
+
+@_lru_cache(maxsize=None)
+def _checksum(filename, mtime, size):
+    # sha256 of the csv file. mtime and size are only used to invalidate the
+    # memoized value if the file changes.
+    sha = _hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _load(name, reader=_np.loadtxt, **kwargs):
+    """
+    Return the array obtained using ``reader(csv_file, **kwargs)`` on the
+    csv file ``name``.
+
+    The first time, the parsed array is saved to the cache directory as a
+    .npy file whose name includes a checksum of the csv file and the reader
+    options. Afterwards, it is loaded as a read-only memory mapped array. If
+    the csv file or the options change, the checksum changes and the stale
+    file is replaced.
+    """
+    filename = _os.path.join(_path, name + '.csv')
+    cache = _cache_dir()
+    if not cache:
+        return reader(filename, **kwargs)
+    stat = _os.stat(filename)
+    options = repr((reader.__name__, sorted(kwargs.items())))
+    digest = _hashlib.sha256(
+        (_checksum(filename, stat.st_mtime_ns, stat.st_size) +
+         options).encode()).hexdigest()
+    cached = _os.path.join(cache, '{}-{}.npy'.format(name, digest[:16]))
+    try:
+        return _np.load(cached, mmap_mode='r')
+    except (OSError, ValueError):
+        pass
+    data = reader(filename, **kwargs)
+    try:
+        _os.makedirs(cache, exist_ok=True)
+        for old in _os.listdir(cache):
+            if old.startswith(name + '-') and old.endswith('.npy'):
+                _os.remove(_os.path.join(cache, old))
+        # write to a temporary file first so a partially written file is
+        # never loaded.
+        fd, tmp = _tempfile.mkstemp(dir=cache, suffix='.tmp')
+        with _os.fdopen(fd, 'wb') as f:
+            _np.save(f, data)
+        _os.replace(tmp, cached)
+        return _np.load(cached, mmap_mode='r')
+    except OSError:
+        # not writable cache, use the parsed data
+        return data
+
+
+class _CsvLoader:
+    # Deferred call to _load. The csv file is only parsed (or the cached
+    # array memory mapped) when the loader is called.
+    def __init__(self, name, reader=_np.loadtxt, **kwargs):
+        self.name = name
+        self.filename = _os.path.join(_path, name + '.csv')
+        self.reader = reader
+        self.kwargs = kwargs
+        # loadtxt and genfromtxt return float64 arrays by default
+        self.dtype = _np.dtype(kwargs.get('dtype', _np.float64))
+
+    def __call__(self):
+        return _load(self.name, self.reader, **self.kwargs)
+
+
 class _BaseDataset:
     def __init__(self, d):
         for key in d.keys():
@@ -32,26 +118,182 @@ class _BaseDescription:
 
 class _Base:
     def __init__(self, description, data, fields): 
-        if data.ndim == 1:
+        # data can be an array or a callable returning the array, in which
+        # case it is only loaded when the data or the fields are accessed.
+        self._loader = data if callable(data) else None
+        self._data = None if callable(data) else data
+        self._fields = None
+        self._field_names = tuple(fields)
+        self.description = _BaseDescription(description)
+        if self._data is not None:
+            self._check()
+
+    def _check(self):
+        data, fields = self._data, self._field_names
+        if data.dtype.names is not None:
+            # structured array, fields are views of its named columns
+            cols = len(data.dtype.names)
+        elif data.ndim == 1:
             cols = 1
         else:
             cols = data.shape[1]
         if len(fields) != cols:
-            raise ValueError(('The number of fields is not equal to') 
-                             ('the number of dimensions of the input.'))
-        self._data = data
-        self.description = _BaseDescription(description)
-        if cols == 1:
+            raise ValueError('The number of fields is not equal to '
+                             'the number of dimensions of the input.')
+        if data.dtype.names is not None:
+            tmpdict = {field: data[name]
+                       for field, name in zip(fields, data.dtype.names)}
+        elif cols == 1:
             tmpdict = {fields[0]: data}
         else:
             tmpdict = {fields[i]: data[:,i] for i in range(len(fields))}
-        self.fields = _BaseDataset(tmpdict)
-    
+        self._fields = _BaseDataset(tmpdict)
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self.asarray()
+        return self._fields
+
     def asarray(self):
+        if self._data is None:
+            self._data = self._loader()
+            self._check()
         return self._data
         
 
+class DatasetRecord:
+    """
+    Metadata of a bundled dataset. The metadata are available without
+    loading the data, that are loaded the first time the ``data`` attribute
+    is accessed and kept afterwards.
+
+    **Attributes**
+
+    name : str
+        Name of the dataset (and of the function that returns it).
+    fields : tuple
+        Names of the fields.
+    dtype : numpy.dtype
+        dtype of the data.
+    rows : int
+        Number of rows.
+    shape : tuple
+        Shape of the array returned by ``data.asarray()``.
+    source : str
+        Reference of the data (the 'Source' section of the description).
+    filename : str or None
+        csv file with the data (``None`` if the data are not stored in a
+        file).
+    description : str
+        Full description of the dataset.
+    data : object
+        The dataset, as returned by the dataset function.
+    """
+    def __init__(self, name, function):
+        self.name = name
+        self._function = function
+        self._dataset = None
+        self._rows = None
+
+    @property
+    def data(self):
+        if self._dataset is None:
+            self._dataset = self._function()
+        return self._dataset
+
+    @property
+    def _lazy(self):
+        # the dataset without loading its data
+        return self._dataset if self._dataset is not None else self._function()
+
+    @property
+    def fields(self):
+        return self._lazy._field_names
+
+    @property
+    def description(self):
+        return str(self._lazy.description)
+
+    @property
+    def source(self):
+        return self.description.split('Source:')[-1].strip()
+
+    @property
+    def filename(self):
+        loader = self._lazy._loader
+        return loader.filename if isinstance(loader, _CsvLoader) else None
+
+    @property
+    def dtype(self):
+        dataset = self._lazy
+        if dataset._data is not None:
+            return dataset._data.dtype
+        return dataset._loader.dtype
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            dataset = self._lazy
+            if dataset._data is not None:
+                self._rows = len(dataset._data)
+            else:
+                # count the non empty lines of the csv file instead of
+                # parsing it
+                with open(self.filename, 'rb') as f:
+                    self._rows = sum(1 for line in f if line.strip())
+        return self._rows
+
+    @property
+    def shape(self):
+        if self.dtype.names is not None or len(self.fields) == 1:
+            return (self.rows,)
+        return (self.rows, len(self.fields))
+
+    def __repr__(self):
+        return ('DatasetRecord(name={!r}, fields={!r}, dtype={}, '
+                'shape={})'.format(self.name, self.fields, self.dtype,
+                                   self.shape))
+
+
+class _Registry:
+    """
+    Registry of the bundled datasets. It can be iterated to obtain the
+    ``DatasetRecord`` of every dataset and indexed using the name of the
+    dataset.
+    """
+    def __init__(self):
+        self._records = _OrderedDict()
+
+    def register(self, function):
+        self._records[function.__name__] = DatasetRecord(function.__name__,
+                                                         function)
+        return function
+
+    def names(self):
+        return list(self._records)
+
+    def __getitem__(self, name):
+        return self._records[name]
+
+    def __contains__(self, name):
+        return name in self._records
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __len__(self):
+        return len(self._records)
+
+    def __repr__(self):
+        return '\n'.join(repr(record) for record in self)
+
+
+registry = _Registry()
+
+
 # dowjones dataset (ismev R package)
+@registry.register
 def dowjones():
     """Return a class containing the dowjones data and description."""
     _desc = """
@@ -59,30 +301,22 @@ def dowjones():
     -------------------------------------------
 
     Fields:
-    obs: numpy.array defining the observation number.
-    year: numpy.array defining the year of the observation.
-    damage: numpy.array defining the damage per year ('damage') in 
-            bllions USD/y.
-
-    More information on these data can be found in:
-    - Pielke, R. A. Jr. and Landsea, C. W. (1998) Normalized hurricane 
-    damages in the United States: 1925-95. Weather and Forecasting, 13, 
-    (3), 621 - 631.
-    - Katz, R. W. (2002) Stochastic modeling of hurricane damage. Journal 
-    of Applied Meteorology, 41, 754–762.
-  
+     date: numpy.array (datetime64[D]) defining the date of the closing 
+        price.
+     index: numpy.array defining the daily closing prices of the Dow Jones
+        Index.
+     
     Source:
-    http://sciencepolicy.colorado.edu/pielke/hp_roger/hurr_norm/data.html
+     -Coles, S. G. (2001). An Introduction to Statistical Modelling of 
+        Extreme Values. London: Springer.
     """
-    index = _np.loadtxt(_os.path.join(_path, 'dowjones.csv'), 
-                        usecols = (1,))
-    date = _np.genfromtxt(_os.path.join(_path, 'dowjones.csv'), 
-                          usecols = (0,), dtype = _np.str)
-    data = _np.array([date.astype('datetime64[D]'), index])
-    return _Base(_desc, data.T, ('date', 'index'))
+    data = _CsvLoader('dowjones', dtype = [('date', 'datetime64[D]'),
+                                            ('index', 'f8')])
+    return _Base(_desc, data, ('date', 'index'))
 
 
 # engine dataset (ismev R package)
+@registry.register
 def engine():
     """Return a class containing the engine data and description."""
     _desc = """
@@ -96,11 +330,12 @@ def engine():
     Source:
      Unknown :-(
     """
-    data = _np.loadtxt(_os.path.join(_path, 'engine.csv'))
+    data = _CsvLoader('engine')
     return _Base(_desc, data, ('time', 'corrosion'))
 
 
 # euroex dataset (ismev R package)
+@registry.register
 def euroex():
     """Return a class containing the euroex data and description."""
     _desc = """
@@ -113,11 +348,12 @@ def euroex():
     Source:
      Unknown :-(
     """
-    data = _np.loadtxt(_os.path.join(_path, 'euroex.csv'))
+    data = _CsvLoader('euroex')
     return _Base(_desc, data, ('rate',))
     
  
 # exchange dataset (ismev R package)
+@registry.register
 def exchange():
     """Return a class containing the exchange data and description."""
     _desc = """
@@ -127,7 +363,8 @@ def exchange():
     dollar and UK sterling against the Canadian dollar. 
 
     Fields:
-     dates: numpy.array defining the date for the exchange rates.
+     date: numpy.array (datetime64[D]) defining the date for the exchange
+        rates.
      rate_UK_US: numpy.array defining UK sterling against the US dollar
         exchange rate 
      rate_UK_CAN: numpy.array defining UK sterling against the Canadian
@@ -138,15 +375,14 @@ def exchange():
         Extreme Values. London: Springer.
     """
 
-    data = _np.loadtxt(_os.path.join(_path, 'exchange.csv'), 
-                       usecols = (1, 2))
-    date = _np.genfromtxt(_os.path.join(_path, 'exchange.csv'), 
-                          usecols = (0,), dtype = _np.str)
-    data = _np.array([date.astype('datetime64[D]'), data[:,0], data[:,1]])
-    return _Base(_desc, data.T, ('date', 'rate_UK_US', 'rate_UK_CAN'))
+    data = _CsvLoader('exchange', dtype = [('date', 'datetime64[D]'),
+                                            ('rate_UK_US', 'f8'),
+                                            ('rate_UK_CAN', 'f8')])
+    return _Base(_desc, data, ('date', 'rate_UK_US', 'rate_UK_CAN'))
 
 
 # Fremantle dataset (ismev R package)
+@registry.register
 def fremantle():
     """Return a class containing the fremantle data and description."""
     _desc = """
@@ -164,11 +400,12 @@ def fremantle():
      -Coles, S. G. (2001). An Introduction to Statistical Modelling of 
         Extreme Values. London: Springer.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'fremantle.csv'))
+    data = _CsvLoader('fremantle')
     return _Base(_desc, data, ('year', 'sea_level', 'SOI'))
 
 
 # glass dataset (ismev R package)
+@registry.register
 def glass():
     """Return a class containing the glass data and description."""
     _desc = """
@@ -185,11 +422,12 @@ def glass():
         likelihood and Bayesian estimators for the three-parameter Weibull 
         distribution. Applied Statistics 36, 358–396.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'glass.csv'))
+    data = _CsvLoader('glass')
     return _Base(_desc, data, ('breaking_strength',))
 
 
 # Port Pirie dataset (ismev R package)
+@registry.register
 def portpirie():
     """Return a class containing the portpirie data and description."""
     _desc = """
@@ -205,11 +443,12 @@ def portpirie():
      -Coles, S. G. (2001). An Introduction to Statistical Modelling of 
         Extreme Values. London: Springer.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'portpirie.csv'))
+    data = _CsvLoader('portpirie')
     return _Base(_desc, data, ('year', 'sea_level'))
     
 
 # rain dataset (ismev R package)
+@registry.register
 def rain():
     """Return a class containing the rain data and description."""
     _desc = """
@@ -225,11 +464,12 @@ def rain():
         rainfall process. Journal of the Royal Statistical Society, B 53, 
         329–347.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'rain.csv'))
+    data = _CsvLoader('rain')
     return _Base(_desc, data, ('rain',))
 
 
 # Venice dataset (ismev R package)
+@registry.register
 def venice():
     """Return a class containing the rain data and description."""
     _desc = """
@@ -257,15 +497,16 @@ def venice():
      -Smith, R. L. (1986) Extreme value theory based on the r largest annual
         events. Journal of Hydrology, 86, 27–43.
     """
-    data = _np.genfromtxt(_os.path.join(_path, 'venice.csv'),
-                          missing_values = 'NA', 
-                          filling_values = _np.nan)
-    return _Base(_desc, data, ('year', 
-                               'r01', 'r02', 'r03', 'r04', 'r05',
-                               'r06', 'r07', 'r08', 'r09', 'r10'))
+    fields = ('year', 'r01', 'r02', 'r03', 'r04', 'r05',
+              'r06', 'r07', 'r08', 'r09', 'r10')
+    dtype = [(fields[0], 'i8')] + [(field, 'f8') for field in fields[1:]]
+    data = _CsvLoader('venice', _np.genfromtxt, dtype = dtype,
+                      missing_values = 'NA', filling_values = _np.nan)
+    return _Base(_desc, data, fields)
 
 
 # wavesurge dataset (ismev R package)
+@registry.register
 def wavesurge():
     """Return a class containing the wavesurge data and description."""
     _desc = """
@@ -280,11 +521,12 @@ def wavesurge():
      -Coles, S. G. (2001). An Introduction to Statistical Modelling of 
         Extreme Values. London: Springer.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'wavesurge.csv'))
+    data = _CsvLoader('wavesurge')
     return _Base(_desc, data, ('wave', 'surge'))
 
 
 # Wind dataset (ismev R package)
+@registry.register
 def wind():
     """Return a class containing the wind data and description."""
     _desc = """
@@ -300,11 +542,12 @@ def wind():
      -Coles, S. G. (2001). An Introduction to Statistical Modelling of 
         Extreme Values. London: Springer.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'wind.csv'))
+    data = _CsvLoader('wind')
     return _Base(_desc, data, ('year', 'hartford', 'albany'))
 
 
 # Wooster dataset (ismev R package)
+@registry.register
 def wooster():
     """Return a class containing the wooster data and description."""
     _desc = """
@@ -319,11 +562,12 @@ def wooster():
      -Coles, S. G., Tawn, J. A. and Smith, R. L. (1994) A seasonal Markov 
         model for extremely low temperatures. Environmetrics 5, 221–239.
     """
-    data = _np.loadtxt(_os.path.join(_path, 'wooster.csv'))
+    data = _CsvLoader('wooster')
     return _Base(_desc, data, ('wooster',))
 
 
 # Harris 1996 dataset
+@registry.register
 def harris1996():
     """Return a class containing the dataset used in Harris1996."""
     _desc = """
@@ -0,0 +1,226 @@
+"""
+Reproducible synthetic datasets of arbitrary size to test and benchmark the
+library.
+
+Two kinds of data are available:
+
+- block maxima (or threshold excesses) drawn from a GEV, Gumbel or GPD
+  distribution (``block_maxima``).
+- raw series (e.g., daily or 10-minute values) with a known marginal
+  distribution, seasonal cycle, trend, clustering (autocorrelation) and
+  missing data gaps (``iter_series``, ``series`` and ``series_to_memmap``).
+
+Raw series are generated in fixed blocks of records, each with its own
+random stream derived from ``random_state``, so the same values are obtained
+whatever the chunk size used to consume them. This way, series with 1e8
+values or more can be streamed or written to memory mapped files without
+holding them in memory.
+"""
+
+import numpy as _np
+from scipy import stats as _st
+from scipy.signal import lfilter as _lfilter
+from scipy.special import ndtr as _ndtr
+
+# Number of records generated using the same random stream.
+_block_size = 2**16
+
+_records_per_year = {'10min': 52560, 'hourly': 8760, 'daily': 365}
+
+_distributions = {'GEV': _st.genextreme,
+                  'Gumbel': _st.gumbel_r,
+                  'GPD': _st.genpareto,
+                  'Weibull': _st.weibull_min}
+
+
+def _seed_sequence(random_state):
+    if isinstance(random_state, _np.random.SeedSequence):
+        return random_state
+    if isinstance(random_state, _np.random.Generator):
+        return _np.random.SeedSequence(
+            random_state.integers(2**63, dtype=_np.int64))
+    return _np.random.SeedSequence(random_state)
+
+
+def _frozen(distribution, c, loc, scale):
+    try:
+        distr = _distributions[distribution]
+    except KeyError:
+        raise ValueError('distribution should be one of {}.'.format(
+            ', '.join(sorted(_distributions))))
+    if distribution == 'Gumbel':
+        return distr(loc=loc, scale=scale)
+    return distr(c, loc=loc, scale=scale)
+
+
+def block_maxima(n, distribution='GEV', c=0, loc=0, scale=1,
+                 random_state=None):
+    """
+    Sample of ``n`` block maxima (or threshold excesses for the GPD).
+
+    **Parameters**
+
+    n : int
+        Size of the sample.
+    distribution : str
+        'GEV' (default value), 'Gumbel' or 'GPD'.
+    c : float
+        Shape parameter (``scipy.stats`` sign convention). Not used for the
+        'Gumbel' distribution.
+    loc, scale : float
+        Location and scale parameters.
+    random_state : int, numpy.random.Generator or None
+        Seed to obtain reproducible samples.
+
+    **Returns**
+
+    A numpy.array with the sample.
+    """
+    if distribution not in ('GEV', 'Gumbel', 'GPD'):
+        raise ValueError("distribution should be 'GEV', 'Gumbel' or 'GPD'.")
+    distr = _frozen(distribution, c, loc, scale)
+    rng = _np.random.default_rng(_seed_sequence(random_state))
+    return distr.ppf(rng.random(int(n)))
+
+
+def iter_series(n, distribution='Weibull', c=2, loc=0, scale=8,
+                frequency='10min', seasonal_amplitude=0, trend=0,
+                autocorrelation=0, gap_rate=0, gap_length=144,
+                chunk_size=2**20, random_state=None):
+    """
+    Yield chunks of a raw synthetic series of ``n`` records.
+
+    The series is obtained transforming a stationary gaussian AR(1) process
+    with lag-1 correlation ``autocorrelation`` (clustering of the extremes)
+    to the marginal ``distribution``. Then a seasonal cycle and a linear
+    trend are added and some gaps are filled with ``numpy.nan``. Without
+    seasonal cycle or trend, the marginal distribution (and so the tail) of
+    the series is exactly ``distribution``.
+
+    **Parameters**
+
+    n : int
+        Number of records of the series.
+    distribution : str
+        Marginal distribution: 'Weibull' (default value), 'Gumbel', 'GEV' or
+        'GPD'.
+    c, loc, scale : float
+        Parameters of the marginal distribution (``scipy.stats``
+        conventions). Default values (c=2, scale=8) are similar to the wind
+        speed at a typical site.
+    frequency : str or float
+        '10min' (default value), 'hourly', 'daily' or the number of records
+        per year.
+    seasonal_amplitude : float
+        Amplitude of the annual sinusoidal cycle added to the values.
+    trend : float
+        Change of the values per year.
+    autocorrelation : float
+        Lag-1 correlation of the underlying gaussian process (0 <= value <
+        1).
+    gap_rate : float
+        Mean number of missing data gaps per year.
+    gap_length : float
+        Mean length (records) of the gaps. The lengths follow a geometric
+        distribution.
+    chunk_size : int
+        Number of records of the chunks.
+    random_state : int, numpy.random.SeedSequence, numpy.random.Generator
+                   or None
+        Seed to obtain reproducible series. The values do not depend on
+        ``chunk_size``.
+
+    **Returns**
+
+    A generator yielding 1D numpy.array chunks.
+    """
+    distr = _frozen(distribution, c, loc, scale)
+    if not 0 <= autocorrelation < 1:
+        raise ValueError('autocorrelation should be in the interval [0, 1).')
+    records_per_year = _records_per_year.get(frequency, frequency)
+    try:
+        records_per_year = float(records_per_year)
+    except (TypeError, ValueError):
+        raise ValueError('frequency should be one of {} or a number.'.format(
+            ', '.join(_records_per_year)))
+    n = int(n)
+    chunk_size = int(chunk_size)
+    seeds = _seed_sequence(random_state)
+    # independent streams for the initial state and the gaps, the rest
+    # (one per block) are spawned when needed.
+    init_seed, gaps_seed, blocks_seed = seeds.spawn(3)
+    gaps_rng = _np.random.default_rng(gaps_seed)
+    z_prev = _np.random.default_rng(init_seed).standard_normal()
+    b = [_np.sqrt(1 - autocorrelation**2)]
+    a = [1, -autocorrelation]
+
+    # gaps, start and length of each one
+    n_gaps = gaps_rng.poisson(gap_rate * n / records_per_year)
+    gap_starts = _np.sort(gaps_rng.integers(0, max(n, 1), n_gaps))
+    gap_ends = gap_starts + gaps_rng.geometric(1 / max(gap_length, 1), n_gaps)
+    # gaps can overlap, running maximum of the ends to search them
+    max_ends = _np.maximum.accumulate(gap_ends) if n_gaps else gap_ends
+
+    pending = []
+    n_pending = 0
+    for start in range(0, n, _block_size):
+        size = min(_block_size, n - start)
+        rng = _np.random.default_rng(blocks_seed.spawn(1)[0])
+        e = rng.standard_normal(size)
+        z, zf = _lfilter(b, a, e, zi=[autocorrelation * z_prev])
+        z_prev = z[-1]
+        # upper tail using isf for accuracy
+        values = distr.isf(_ndtr(-z))
+        t = (start + _np.arange(size)) / records_per_year
+        if seasonal_amplitude:
+            values += seasonal_amplitude * _np.sin(2 * _np.pi * t)
+        if trend:
+            values += trend * t
+        # gaps overlapping the block
+        first = _np.searchsorted(max_ends, start, side='right')
+        last = _np.searchsorted(gap_starts, start + size, side='left')
+        for g0, g1 in zip(gap_starts[first:last], gap_ends[first:last]):
+            values[max(g0 - start, 0):max(g1 - start, 0)] = _np.nan
+        pending.append(values)
+        n_pending += size
+        if n_pending >= chunk_size:
+            buffer = _np.concatenate(pending)
+            n_full = n_pending // chunk_size
+            for i in range(n_full):
+                yield buffer[i * chunk_size:(i + 1) * chunk_size]
+            pending = [buffer[n_full * chunk_size:]]
+            n_pending -= n_full * chunk_size
+    if n_pending:
+        yield _np.concatenate(pending)
+
+
+def series(n, **kwargs):
+    """
+    Raw synthetic series of ``n`` records as a numpy.array. See
+    ``iter_series`` for the parameters.
+    """
+    chunks = list(iter_series(n, **kwargs))
+    if not chunks:
+        return _np.empty(0)
+    return _np.concatenate(chunks)
+
+
+def series_to_memmap(filename, n, **kwargs):
+    """
+    Write a raw synthetic series of ``n`` records to the .npy file
+    ``filename`` chunk by chunk, so it does not need to fit in memory. See
+    ``iter_series`` for the rest of parameters.
+
+    **Returns**
+
+    The series as a read-only numpy.memmap.
+    """
+    out = _np.lib.format.open_memmap(filename, mode='w+', dtype=_np.float64,
+                                     shape=(int(n),))
+    start = 0
+    for chunk in iter_series(n, **kwargs):
+        out[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    out.flush()
+    del out
+    return _np.load(filename, mmap_mode='r')
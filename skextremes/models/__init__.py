@@ -1,3 +1,7 @@
+from . import distributions
 from . import wind
 from . import engineering
 from . import classic
+from . import collection
+from . import nonstationary
+from . import bayesian
@@ -0,0 +1,567 @@
+"""
+Module containing Bayesian block maxima models
+
+The posterior distribution of the parameters of the GEV (or Gumbel)
+distribution is sampled with an adaptive random walk Metropolis algorithm
+(Haario et al., 2001). All the chains are updated at once as a single
+vectorized array and, if an executor is provided, groups of chains are run
+in parallel after the (common) burn-in::
+
+    model = GEV(data, return_periods=[10, 100], n_chains=16)
+    model.return_values, model.return_values_ci
+
+Posterior summaries (quantiles, means and standard deviations of the
+parameters and of the return values) are accumulated while sampling using
+streaming histograms, so the draws don't need to be stored
+(``store_draws=False``) when many stations are processed.
+
+The default prior is non-informative for the location and the scale
+(flat and 1/scale) and the *geophysical* prior of Martins and Stedinger
+(2000) for the shape, a Beta(6, 9) distribution on [-0.5, 0.5] that keeps
+the estimates of short records in a physically reasonable range.
+"""
+
+from collections import OrderedDict
+import os as _os
+
+import numpy as _np
+from scipy import special as _special
+
+from ..utils import gev_lmomfit as _gev_lmomfit
+from ..utils import gum_lmomfit as _gum_lmomfit
+from .distributions import GEVDistribution as _GEVDistribution
+from .distributions import GumbelDistribution as _GumbelDistribution
+from .distributions import _gev_nll
+
+
+class _Geophysical:
+    # Beta(6, 9) distribution on [-0.5, 0.5] for the shape (Martins and
+    # Stedinger, 2000), faster than the scipy.stats equivalent.
+
+    def __repr__(self):
+        return 'Beta(6, 9) on [-0.5, 0.5]'
+
+    def logpdf(self, c):
+        out = (5 * _np.log(0.5 + c) + 8 * _np.log(0.5 - c) -
+               _special.betaln(6, 9))
+        return _np.where((c > -0.5) & (c < 0.5), out, -_np.inf)
+
+
+def _prior(prior):
+    # (shape, location, scale) priors or a function.
+    if callable(prior):
+        return prior
+    out = {'shape': _Geophysical(), 'location': None, 'scale': None}
+    if prior is not None:
+        unknown = set(prior) - set(out)
+        if unknown:
+            raise ValueError('Unknown parameters in prior: {}.'.format(
+                ', '.join(sorted(unknown))))
+        out.update(prior)
+    return out['shape'], out['location'], out['scale']
+
+
+def _params(theta, gumbel):
+    # Internal parameters (c, loc, log(scale)), without c for the Gumbel
+    # distribution, -> (c, loc, scale)
+    if gumbel:
+        return _np.column_stack([_np.zeros(len(theta)), theta[:, 0],
+                                 _np.exp(theta[:, 1])])
+    return _np.column_stack([theta[:, 0], theta[:, 1],
+                             _np.exp(theta[:, 2])])
+
+
+def _log_posterior(theta, x, prior, gumbel):
+    # Unnormalized log-posterior of the internal parameters. The scale is
+    # sampled as its logarithm, log(scale) is the jacobian.
+    params = _params(theta, gumbel)
+    c, loc, scale = params.T
+    log_scale = theta[:, -1]
+    if callable(prior):
+        lp = prior(c, loc, scale) + log_scale
+    else:
+        lp = _np.zeros(len(theta))
+        shape_prior, loc_prior, scale_prior = prior
+        if shape_prior is not None and not gumbel:
+            lp = lp + shape_prior.logpdf(c)
+        if loc_prior is not None:
+            lp = lp + loc_prior.logpdf(loc)
+        if scale_prior is not None:
+            lp = lp + scale_prior.logpdf(scale) + log_scale
+    out = lp - _gev_nll(x, *(params[:, i, None] for i in range(3)))
+    return _np.where(_np.isnan(out), -_np.inf, out)
+
+
+def _quantities(theta, gumbel, q):
+    # Parameters (c, loc, scale) and return values of every chain
+    params = _params(theta, gumbel)
+    values = _GEVDistribution(*(params[:, i, None] for i in range(3))).isf(q)
+    quantities = _np.column_stack([params, values])
+    # the shape of the Gumbel distribution is not tracked
+    return quantities[:, 1:] if gumbel else quantities
+
+
+def _merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    # Counts, means and sums of squared deviations of two groups of values
+    n = n_a + n_b
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        delta = mean_b - mean_a
+        mean = _np.where(n > 0, mean_a + delta * n_b / n, 0)
+        m2 = _np.where(n > 0, m2_a + m2_b + delta**2 * n_a * n_b / n, 0)
+    return n, mean, m2
+
+
+class _Histogram:
+    # Streaming histograms (and moments) of several quantities (columns).
+    # When a value falls out of the range the width of the bins is doubled.
+    # The edges of the bins are always in the lattice of the initial edges
+    # with the current width, so the bins are unions of the initial ones
+    # and histograms updated independently (e.g., in other processes) can
+    # be merged.
+
+    def __init__(self, lo, hi, n_bins):
+        if n_bins < 2 or n_bins % 2:
+            raise ValueError('n_bins should be an even number.')
+        self.n_bins = n_bins
+        self.lo = _np.array(lo, dtype=float)
+        width = (_np.asarray(hi, dtype=float) - self.lo) / n_bins
+        self.width = _np.maximum(width, 1e-9 * (1 + _np.abs(self.lo)))
+        self.origin = self.lo.copy()
+        self.counts = _np.zeros((len(self.lo), n_bins), dtype=_np.int64)
+        self.n = _np.zeros(len(self.lo))
+        self.mean = _np.zeros(len(self.lo))
+        self.m2 = _np.zeros(len(self.lo))
+
+    def _double(self, i, up):
+        # the range is extended up or down, by one bin less if the lower
+        # edge is not in the lattice with the new width
+        odd = round((self.lo[i] - self.origin[i]) / self.width[i]) % 2
+        shift = odd if up else self.n_bins - odd
+        self.counts[i] = _np.bincount(
+            (_np.arange(self.n_bins) + shift) // 2, weights=self.counts[i],
+            minlength=self.n_bins)
+        self.lo[i] -= shift * self.width[i]
+        self.width[i] *= 2
+
+    def _cover(self, i, low, high):
+        while high >= self.lo[i] + self.n_bins * self.width[i]:
+            self._double(i, up=True)
+        while low < self.lo[i]:
+            self._double(i, up=False)
+
+    def _bin(self, values):
+        index = _np.floor((values - self.lo) / self.width)
+        return _np.clip(index, 0, self.n_bins - 1).astype(_np.int64)
+
+    def add(self, values):
+        # values (n, n_quantities), non finite values are ignored
+        finite = _np.isfinite(values)
+        low = _np.where(finite, values, _np.inf).min(axis=0)
+        high = _np.where(finite, values, -_np.inf).max(axis=0)
+        hi = self.lo + self.n_bins * self.width
+        for i in _np.flatnonzero((low < self.lo) | (high >= hi)):
+            self._cover(i, low[i], high[i])
+        flat = (_np.arange(len(self.lo)) * self.n_bins +
+                self._bin(_np.where(finite, values, self.lo)))[finite]
+        self.counts += _np.bincount(
+            flat, minlength=self.counts.size).reshape(self.counts.shape)
+        n = finite.sum(axis=0)
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            mean = _np.where(finite, values, 0).sum(axis=0) / n
+            m2 = (_np.where(finite, values - mean, 0)**2).sum(axis=0)
+        self.n, self.mean, self.m2 = _merge_moments(
+            self.n, self.mean, self.m2, n, _np.nan_to_num(mean), m2)
+
+    def merge(self, other):
+        for i in range(len(self.lo)):
+            if other.counts[i].any():
+                self._cover(i, other.lo[i],
+                            other.lo[i] + other.n_bins * other.width[i] -
+                            other.width[i] / 2)
+            # the bins of the coarser histogram are unions of the bins of
+            # the other one
+            while self.width[i] < other.width[i]:
+                self._double(i, up=True)
+        centres = other.lo[:, None] + (_np.arange(other.n_bins) + 0.5) * \
+            other.width[:, None]
+        flat = (_np.arange(len(self.lo))[:, None] * self.n_bins +
+                self._bin(centres.T).T)
+        self.counts += _np.bincount(
+            flat.ravel(), weights=other.counts.ravel(),
+            minlength=self.counts.size).astype(_np.int64).reshape(
+                self.counts.shape)
+        self.n, self.mean, self.m2 = _merge_moments(
+            self.n, self.mean, self.m2, other.n, other.mean, other.m2)
+
+    def quantile(self, p):
+        # (len(p), n_quantities), nan for quantities without values
+        p = _np.atleast_1d(p)
+        out = _np.full((len(p), len(self.lo)), _np.nan)
+        for i in range(len(self.lo)):
+            cum = _np.cumsum(self.counts[i])
+            if not cum[-1]:
+                continue
+            target = p * cum[-1]
+            j = _np.minimum(_np.searchsorted(cum, target), self.n_bins - 1)
+            before = _np.where(j > 0, cum[j - 1], 0)
+            frac = (target - before) / _np.maximum(self.counts[i, j], 1)
+            out[:, i] = self.lo[i] + (j + _np.clip(frac, 0, 1)) * \
+                self.width[i]
+        return out
+
+    @property
+    def std(self):
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            return _np.sqrt(self.m2 / (self.n - 1))
+
+
+def _sample(x, prior, gumbel, theta, logpost, chol, n_draws, thin, q,
+            histogram, seed, store_draws, buffer_size=256):
+    # Sampling phase (after the burn-in) of a group of chains with a fixed
+    # proposal. Run in the workers if an executor is used. The states are
+    # added to the histogram in blocks of buffer_size draws. Returns the
+    # updated histogram, the acceptance rate, running means and sums of
+    # squared deviations of the parameters of every chain (for the
+    # potential scale reduction factor) and the draws if stored.
+    rng = _np.random.default_rng(seed)
+    theta = theta.copy()
+    logpost = logpost.copy()
+    n_chains, dim = theta.shape
+    accepted = _np.zeros(n_chains)
+    mean = _np.zeros((n_chains, 3))
+    m2 = _np.zeros((n_chains, 3))
+    draws = _np.empty((n_chains, n_draws, 3)) if store_draws else None
+    buffer = _np.empty((min(buffer_size, n_draws), n_chains, dim))
+    with _np.errstate(all='ignore'):
+        for k in range(n_draws):
+            for _ in range(thin):
+                proposal = theta + rng.standard_normal((n_chains, dim)) @ \
+                    chol.T
+                lp = _log_posterior(proposal, x, prior, gumbel)
+                accept = _np.log(rng.random(n_chains)) < lp - logpost
+                theta[accept] = proposal[accept]
+                logpost[accept] = lp[accept]
+                accepted += accept
+            buffer[k % len(buffer)] = theta
+            if (k + 1) % len(buffer) and k + 1 < n_draws:
+                continue
+            # flush the buffer
+            block = buffer[:k % len(buffer) + 1]
+            params = _params(block.reshape(-1, dim), gumbel).reshape(
+                block.shape[:2] + (3,))
+            histogram.add(_quantities(block.reshape(-1, dim), gumbel, q))
+            for i, p in enumerate(params):
+                count = k + 2 - len(params) + i
+                delta = p - mean
+                mean += delta / count
+                m2 += delta * (p - mean)
+            if store_draws:
+                draws[:, k + 1 - len(params):k + 1] = params.transpose(1, 0, 2)
+    return histogram, accepted / (n_draws * thin), mean, m2, draws
+
+
+class GEV:
+    """
+    Class to fit data to a Generalised extreme value (GEV) distribution
+    using Bayesian inference (Markov chain Monte Carlo).
+
+    **Parameters**
+
+    data : array_like
+        1D array_like with the extreme values to be considered
+    prior : dict or function (optional)
+        Priors of the parameters, a dictionary with keys 'shape',
+        'location' and 'scale' and values with a ``logpdf`` method (e.g.,
+        frozen ``scipy.stats`` distributions) or None for non-informative
+        priors (flat for the shape and the location and 1/scale for the
+        scale). The default prior of the shape (scipy sign convention) is a
+        Beta(6, 9) distribution on [-0.5, 0.5] (Martins and Stedinger,
+        2000), the other parameters use non-informative priors. It can also
+        be a vectorized function f(c, loc, scale) returning the logarithm
+        of the joint prior density.
+    return_periods : array_like (optional)
+        1D array_like of values for the *return period*. Values indicate
+        **years**.
+    frec : int or float
+        Value indicating the frecuency of events per year. If frec is
+        not provided the data will be treated as yearly data (1 value per
+        year).
+    ci : float
+        Float indicating the level of the credible intervals, e.g., 0.05
+        (default value) will return the 0.025 and 0.975 posterior
+        quantiles.
+    n_chains : int
+        Number of chains. Default value is 16.
+    n_draws : int
+        Number of draws kept per chain (after thinning). Default value is
+        1000.
+    n_burn : int
+        Number of iterations used to adapt the proposal (the same for all
+        the chains) and discarded. Default value is 1000.
+    thin : int
+        Only one of every ``thin`` iterations is kept. Default value is 1.
+    n_bins : int
+        Number of bins of the histograms used to calculate the posterior
+        quantiles, their resolution is the range of the values divided by
+        ``n_bins``. Default value is 4096.
+    store_draws : bool
+        If False, the draws are not stored (only the posterior summaries).
+        Default value is True.
+    executor : concurrent.futures.Executor (optional)
+        Pool (e.g., a ``ProcessPoolExecutor``) used to run groups of
+        chains in parallel after the burn-in. The prior should be
+        picklable.
+    n_tasks : int (optional)
+        Number of groups of chains if ``executor`` is provided. By default
+        the number of processors (at most ``n_chains``).
+    random_state : None, int or numpy.random.Generator
+        Seed to obtain reproducible results.
+
+    **Attributes and Methods**
+
+    params : OrderedDict
+        Ordered dictionary with the posterior medians of the *shape*,
+        *location* and *scale* parameters of the distribution.
+    params_ci : OrderedDict
+        Credible intervals of the parameters.
+    c, loc, scale : flt
+        Posterior medians of the parameters.
+    distr : object
+        ``GEVDistribution`` (``GumbelDistribution``) with the posterior
+        medians of the parameters.
+    return_values, return_values_ci : numpy.array
+        Posterior medians and credible intervals (one row per return
+        period) of the return values.
+    quantile : function
+        Posterior quantiles of the parameters and return values.
+    mean, std : OrderedDict
+        Posterior means and standard deviations of the parameters and the
+        return values.
+    acceptance : numpy.array
+        Acceptance rate of every chain.
+    rhat : OrderedDict
+        Potential scale reduction factor (Gelman and Rubin) of every
+        parameter, values close to 1 indicate that the chains converged.
+    draws : numpy.array
+        Draws (n_chains, n_draws, 3) of the (c, loc, scale) parameters,
+        None if ``store_draws`` is False.
+    """
+
+    _gumbel = False
+
+    def __init__(self, data, prior=None, return_periods=None, frec=1,
+                 ci=0.05, n_chains=16, n_draws=1000, n_burn=1000, thin=1,
+                 n_bins=4096, store_draws=True, executor=None, n_tasks=None,
+                 random_state=None):
+        self.data = _np.asarray(data, dtype=float)
+        if self.data.ndim != 1 or len(self.data) < 2:
+            raise ValueError('data should be a 1D array with at least 2 '
+                             'values.')
+        if n_chains < 1 or n_draws < 1 or n_burn < 1 or thin < 1:
+            raise ValueError('n_chains, n_draws, n_burn and thin should be '
+                             'positive.')
+        self.prior = _prior(prior)
+        self.return_periods = (_np.array([], dtype=float)
+                               if return_periods is None else
+                               _np.array(return_periods, dtype=float,
+                                         ndmin=1))
+        self.frec = frec
+        self.ci = ci
+        self.n_chains = n_chains
+        self.n_draws = n_draws
+        self.n_burn = n_burn
+        self.thin = thin
+        rng = _np.random.default_rng(random_state)
+        q = self.frec / self.return_periods
+
+        theta, logpost, chol, history = self._burn_in(rng)
+
+        # streaming summaries with the range of the end of the burn-in
+        quantities = _quantities(history.reshape(-1, history.shape[-1]),
+                                 self._gumbel, q)
+        finite = _np.isfinite(quantities)
+        lo = _np.where(finite, quantities, _np.inf).min(axis=0)
+        hi = _np.where(finite, quantities, -_np.inf).max(axis=0)
+        # quantities without finite values (all the bins are empty)
+        lo[~finite.any(axis=0)] = hi[~finite.any(axis=0)] = 0
+        lo, hi = lo - 0.1 * (hi - lo), hi + 0.1 * (hi - lo)
+
+        # sampling, groups of chains in parallel
+        if executor is None:
+            groups = [_np.arange(n_chains)]
+        else:
+            if n_tasks is None:
+                n_tasks = _os.cpu_count() or 1
+            groups = _np.array_split(_np.arange(n_chains),
+                                     min(n_tasks, n_chains))
+        seeds = rng.integers(2**63, size=len(groups))
+        tasks = [(self.data, self.prior, self._gumbel, theta[g], logpost[g],
+                  chol, n_draws, thin, q, _Histogram(lo, hi, n_bins), seed,
+                  store_draws) for g, seed in zip(groups, seeds)]
+        if executor is None:
+            results = [_sample(*task) for task in tasks]
+        else:
+            futures = [executor.submit(_sample, *task) for task in tasks]
+            results = [future.result() for future in futures]
+        histogram = results[0][0]
+        for result in results[1:]:
+            histogram.merge(result[0])
+        self._histogram = histogram
+        self.acceptance = _np.concatenate([r[1] for r in results])
+        means = _np.concatenate([r[2] for r in results])
+        m2 = _np.concatenate([r[3] for r in results])
+        self.draws = (_np.concatenate([r[4] for r in results])
+                      if store_draws else None)
+
+        # potential scale reduction factor
+        names = ('shape', 'location', 'scale')
+        self.rhat = OrderedDict()
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            w = (m2 / (n_draws - 1)).mean(axis=0)
+            b = n_draws * means.var(axis=0, ddof=1) if n_chains > 1 else \
+                _np.nan
+            rhat = _np.sqrt(((n_draws - 1) / n_draws * w + b / n_draws) / w)
+        for i, name in enumerate(names):
+            self.rhat[name] = _np.nan if (self._gumbel and i == 0) else \
+                rhat[i]
+
+        # summaries
+        median = self.quantile(0.5)
+        low = self.quantile(ci / 2)
+        high = self.quantile(1 - ci / 2)
+        self.params = OrderedDict()
+        self.params_ci = OrderedDict()
+        for name in names:
+            self.params[name] = median[name]
+            self.params_ci[name] = (low[name], high[name])
+        self.c = self.params['shape']
+        self.loc = self.params['location']
+        self.scale = self.params['scale']
+        if self._gumbel:
+            self.distr = _GumbelDistribution(self.loc, self.scale)
+        else:
+            self.distr = _GEVDistribution(self.c, self.loc, self.scale)
+        self.return_values = median['return_values']
+        self.return_values_ci = _np.column_stack([low['return_values'],
+                                                  high['return_values']])
+        self.mean = self._summary(histogram.mean)
+        self.std = self._summary(histogram.std)
+
+    def _start(self, rng):
+        # Starting points around the l-moments estimates, Gumbel estimates
+        # if they are not valid. (n_chains, dim)
+        x = self.data
+        if self._gumbel:
+            _, loc, scale = _gum_lmomfit(x)
+            center = _np.array([loc, _np.log(scale)])
+            spread = _np.array([0.05 * scale, 0.05])
+        else:
+            c, loc, scale = _gev_lmomfit(x)
+            center = _np.array([c, loc, _np.log(scale)])
+            if not _np.isfinite(_log_posterior(center[None], x, self.prior,
+                                               False)[0]):
+                _, loc, scale = _gum_lmomfit(x)
+                center = _np.array([0, loc, _np.log(scale)])
+            spread = _np.array([0.05, 0.05 * scale, 0.05])
+        theta = _np.tile(center, (self.n_chains, 1))
+        # dispersed starting points, the center if not valid
+        for _ in range(20):
+            proposal = center + spread * rng.standard_normal(theta.shape)
+            ok = _np.isfinite(_log_posterior(proposal, x, self.prior,
+                                             self._gumbel))
+            theta[ok] = proposal[ok]
+            if ok.all():
+                break
+        logpost = _log_posterior(theta, x, self.prior, self._gumbel)
+        if not _np.all(_np.isfinite(logpost)):
+            raise ValueError('The prior density is 0 at the starting point '
+                             '{}.'.format(center))
+        return theta, logpost, spread
+
+    def _burn_in(self, rng):
+        # Adaptive Metropolis (Haario et al., 2001): the covariance of the
+        # proposal is that of the draws of all the chains in the second half
+        # of the iterations done, scaled by 2.38**2 / dim, and a global
+        # factor is tuned for an acceptance rate of 0.234. Returns the last
+        # states, their log-posterior, the cholesky factor of the final
+        # proposal covariance and the second half of the draws.
+        x = self.data
+        with _np.errstate(all='ignore'):
+            theta, logpost, spread = self._start(rng)
+            n_chains, dim = theta.shape
+            cov = _np.diag(spread**2)
+            chol = _np.linalg.cholesky(cov)
+            log_factor = 0.
+            history = _np.empty((self.n_burn, n_chains, dim))
+            for it in range(self.n_burn):
+                step = _np.exp(log_factor) * chol
+                proposal = theta + \
+                    rng.standard_normal((n_chains, dim)) @ step.T
+                lp = _log_posterior(proposal, x, self.prior, self._gumbel)
+                accept = _np.log(rng.random(n_chains)) < lp - logpost
+                theta[accept] = proposal[accept]
+                logpost[accept] = lp[accept]
+                history[it] = theta
+                log_factor += (accept.mean() - 0.234) / _np.sqrt(it + 1)
+                if it >= 2 * dim and (it + 1) % 50 == 0:
+                    recent = history[(it + 1) // 2:it + 1].reshape(-1, dim)
+                    sample_cov = _np.cov(recent.T) * 2.38**2 / dim
+                    try:
+                        chol = _np.linalg.cholesky(
+                            sample_cov + 1e-10 * _np.diag(_np.diag(cov)))
+                    except _np.linalg.LinAlgError:
+                        pass
+        return (theta, logpost, _np.exp(log_factor) * chol,
+                history[self.n_burn // 2:])
+
+    def _summary(self, values, scalar=True):
+        # values (n, n_quantities) -> OrderedDict of (n,) arrays (return
+        # values (n_return_periods, n)) or of scalars
+        values = _np.atleast_2d(values)
+        if self._gumbel:
+            values = _np.concatenate([_np.zeros((len(values), 1)), values],
+                                     axis=1)
+        out = OrderedDict()
+        for i, name in enumerate(('shape', 'location', 'scale')):
+            out[name] = values[0, i] if scalar else values[:, i]
+        out['return_values'] = (values[0, 3:] if scalar else
+                                values[:, 3:].T)
+        return out
+
+    def quantile(self, p):
+        """
+        Posterior quantiles.
+
+        **Parameters**
+
+        p : float or array_like
+            Probabilities.
+
+        **Returns**
+
+        quantiles : OrderedDict
+            Ordered dictionary with the quantiles of the *shape*,
+            *location*, *scale* and *return_values* (one row per return
+            period if ``p`` is an array).
+        """
+        p = _np.asarray(p, dtype=float)
+        if p.ndim > 1:
+            raise ValueError('p should be a float or a 1D array.')
+        return self._summary(self._histogram.quantile(p), scalar=p.ndim == 0)
+
+
+class Gumbel(GEV):
+    """
+    Class to fit data to a Gumbel distribution using Bayesian inference
+    (Markov chain Monte Carlo).
+
+    **Parameters**
+
+    The same as ``GEV``, the prior of the shape is not used (it is 0).
+
+    **Attributes and Methods**
+
+    The same as ``GEV``, the shape is 0.
+    """
+
+    _gumbel = True
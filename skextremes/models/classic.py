@@ -13,6 +13,8 @@ Generalised Pareto Distribution (GPD):
 """
 
 from collections import OrderedDict
+from concurrent.futures import wait as _wait
+from concurrent.futures import FIRST_COMPLETED as _FIRST_COMPLETED
 
 from scipy import stats as _st
 from scipy import optimize as _op
@@ -22,8 +24,19 @@ import matplotlib.pyplot as _plt
 import numdifftools as _ndt
 
 from ..utils import bootstrap_ci as _bsci
+from ..utils import adaptive_bootstrap_ci as _adaptive_bsci
 from ..utils import gev_momfit as _gev_momfit
 from ..utils import gum_momfit as _gum_momfit
+from ..utils import gev_lmomfit as _gev_lmomfit
+from ..utils import gum_lmomfit as _gum_lmomfit
+from ..utils import _Monitor
+from ..utils import _hessian
+from ..utils import _newton
+from .distributions import GEVDistribution as _GEVDistribution
+from .distributions import GumbelDistribution as _GumbelDistribution
+from .distributions import _gev_isf
+from .distributions import _gev_nll
+from .distributions import _gev_quantile
 
 class _Base:
 
@@ -31,7 +44,8 @@ class _Base:
                  block_unit='', fit_method='mle',
                  ci=0, ci_method=None,
                  return_periods = None,
-                 frec=1):
+                 frec=1, n_samples=500, ci_tol=None, ci_max_time=None,
+                 ci_callback=None, ci_cancel=None, ci_executor=None):
         # Data to be used for the fit
         self.data = data
         self.ev_unit = ev_unit
@@ -62,6 +76,14 @@ class _Base:
             self.return_periods = _np.array([])
             self.return_values = _np.array([])
 
+        # Number of bootstrap samples (maximum number if ci_tol is provided)
+        self.n_samples = n_samples
+        self.ci_tol = ci_tol
+        self.ci_max_time = ci_max_time
+        self.ci_callback = ci_callback
+        self.ci_cancel = ci_cancel
+        self.ci_executor = ci_executor
+
         # Check for the estimation of confidence intervals
         if ci  == 0 or 0 < ci < 1:
             self.ci = ci
@@ -70,17 +92,17 @@ class _Base:
         if self.ci:
             if (ci_method and
                 fit_method == 'mle' and
-                ci_method in ['delta', 'bootstrap']):
+                ci_method in ['delta', 'bootstrap', 'bca', 'profile']):
                 self.ci_method = ci_method
                 self._ci()
             elif (ci_method and
                 fit_method == 'lmoments' and
-                ci_method in ['bootstrap']):
+                ci_method in ['bootstrap', 'bca', 'studentized']):
                 self.ci_method = ci_method
                 self._ci()
             elif (ci_method and
                 fit_method == 'mom' and
-                ci_method in ['bootstrap']):
+                ci_method in ['bootstrap', 'bca']):
                 self.ci_method = ci_method
                 self._ci()
             else:
@@ -481,6 +503,205 @@ class _Base:
         ax.set_xlim([0.8, _np.max(T)])
 
 
+###############################################################################
+# Profile likelihood confidence intervals
+###############################################################################
+def _profile_nll(kind, logy, value, free, gumbel, data):
+    # Negative log-likelihood of every row, its gradient with respect to the
+    # free parameters and its derivative with respect to the value of the
+    # target of the row, kind: 0 (shape), 1 (location), 2 (scale) or 3
+    # (return level with cdf exp(-exp(logy))). Scales are free as
+    # logarithms and for return levels the location is replaced by the
+    # return level.
+    if gumbel:
+        free = _np.column_stack([_np.zeros(len(free)), free])
+    f0, f1 = free[:, 0], free[:, 1]
+    with _np.errstate(over='ignore'):
+        scale = _np.where(kind == 2, value, _np.exp(f1))
+    c = _np.where(kind == 0, value, f0)
+    # return level of (c, 0, 1) and its derivative with respect to c
+    offset, (doffset, _, _) = _gev_quantile(logy, c, 0, 1, grad=True)
+    loc = _np.choose(kind, [f0, value, f1, value - scale * offset])
+    nll, derivatives = _gev_nll(data, c[:, None], loc[:, None],
+                                scale[:, None], grad=True)
+    g_c, g_loc, g_scale = (d.sum(axis=1) for d in derivatives)
+    grad = _np.column_stack([
+        _np.choose(kind, [g_loc, g_c, g_c, g_c - g_loc * scale * doffset]),
+        _np.choose(kind, [g_scale * scale, g_scale * scale, g_loc,
+                          (g_scale - g_loc * offset) * scale])])
+    dvalue = _np.choose(kind, [g_c, g_loc, g_scale, g_loc])
+    return nll, grad[:, 1:] if gumbel else grad, dvalue
+
+
+def _profile_free(kind, params, gumbel):
+    # Free parameters of every row corresponding to the parameters
+    # (c, loc, scale).
+    c, loc, scale = params
+    free = _np.array([[loc, _np.log(scale)], [c, _np.log(scale)],
+                      [c, loc], [c, _np.log(scale)]])[kind]
+    return free[:, 1:] if gumbel else free
+
+
+def _gev_cov(data, params, gumbel):
+    # Variance-covariance matrix of the estimators (c, loc, scale) from the
+    # observed information (finite differences of the analytic gradient of
+    # the negative log-likelihood), zeros for the shape of Gumbel models and
+    # nan if the information is singular.
+    def fun(theta, index):
+        nll, derivatives = _gev_nll(data, *(theta[:, i, None]
+                                            for i in range(3)), grad=True)
+        return nll, _np.column_stack([d.sum(axis=1) for d in derivatives])
+    theta = _np.asarray(params, dtype=float)[None]
+    hess = _hessian(fun, theta, fun(theta, None)[1], None)[0]
+    cov = _np.zeros((3, 3))
+    k = 1 if gumbel else 0
+    try:
+        cov[k:, k:] = _np.linalg.inv(hess[k:, k:])
+    except _np.linalg.LinAlgError:
+        cov[k:, k:] = _np.nan
+    return cov
+
+
+# targets profiled at once by each task (a task per chunk of return periods
+# if ci_executor is used)
+_PROFILE_CHUNK = 12
+
+
+def _gev_profile_task(data, mle, nll_min, gumbel, targets, alpha,
+                      stop=None):
+    # Profile likelihood confidence intervals (lower, upper) of every target:
+    # 0 (shape), 1 (location), 2 (scale) or the probability q of a return
+    # level. The bounds of all the targets are searched at once, in every
+    # iteration the profiles of the rows (target, side) not finished yet
+    # are minimized together with _newton. Targets not finished when stop()
+    # is True are nan. Run in the workers if the return periods are
+    # profiled in parallel.
+    crit = _st.chi2.ppf(1 - alpha, 1)
+    n_rows = 2 * len(targets)
+    kind = _np.repeat([t if t in (0, 1, 2) else 3 for t in targets], 2)
+    q = _np.repeat([0.5 if t in (0, 1, 2) else t for t in targets], 2)
+    logy = _np.log(-_np.log1p(-q))
+    direction = _np.tile([-1., 1.], len(targets))
+    hat = _np.where(kind == 3, _gev_quantile(logy, *mle),
+                    mle[_np.minimum(kind, 2)])
+    free_hat = _profile_free(kind, mle, gumbel)
+
+    def profile(index, values, x0):
+        # minimum of the negative log-likelihood of the rows index for fixed
+        # values of their targets starting from x0 (and the mle if it
+        # fails) and its derivative with respect to the values (the partial
+        # derivative at the minimum). Newton steps with the analytic
+        # gradient, Nelder-Mead if they fail.
+        def fun(free, i):
+            return _profile_nll(kind[index[i]], logy[index[i]], values[i],
+                                free, gumbel, data)[:2]
+        nll = _np.full(len(index), _np.inf)
+        x = x0.copy()
+        todo = _np.arange(len(index))
+        for start in (x0, free_hat[index]):
+            todo = todo[_np.isfinite(fun(start[todo], todo)[0])]
+            if len(todo):
+                with _np.errstate(all='ignore'):
+                    theta, f, converged = _newton(
+                        lambda free, i: fun(free, todo[i]), start[todo],
+                        tol=1e-9, maxiter=50)
+                    for j in _np.flatnonzero(~converged):
+                        res = _op.minimize(
+                            lambda p: fun(p[None], todo[j:j + 1])[0][0],
+                            theta[j], method='Nelder-Mead',
+                            options={'xatol': 1e-8, 'fatol': 1e-10})
+                        theta[j], f[j] = res.x, res.fun
+                found = _np.isfinite(f)
+                nll[todo[found]], x[todo[found]] = f[found], theta[found]
+            todo = _np.flatnonzero(~_np.isfinite(nll))
+            if not len(todo):
+                break
+        dvalue = _np.full(len(index), _np.nan)
+        found = _np.flatnonzero(_np.isfinite(nll))
+        dvalue[found] = _profile_nll(kind[index[found]],
+                                     logy[index[found]], values[found],
+                                     x[found], gumbel, data)[2]
+        return nll, x, dvalue
+
+    out = _np.full(n_rows, _np.nan)
+    active = _np.ones(n_rows, dtype=bool)
+    # the bounds are bracketed stepping away from the estimate with steps
+    # that double, then found with Newton steps on the deviance
+    bracketing = _np.ones(n_rows, dtype=bool)
+    iterations = _np.zeros(n_rows, dtype=int)
+    step = _np.where(kind == 0, 0.05, 0.05 * mle[2])
+    # first steps, the half widths of the delta method intervals if they
+    # are available
+    with _np.errstate(all='ignore'):
+        _, grad = _gev_quantile(logy, *mle, grad=True)
+        grad = _np.column_stack(grad)
+        grad[kind < 3] = _np.eye(3)[kind[kind < 3]]
+        width = _np.sqrt(crit * _np.einsum('ij,jk,ik->i', grad,
+                                           _gev_cov(data, mle, gumbel), grad))
+    step = _np.where(width > 0, width, step)
+    step = _np.maximum(step, 1e-6 * (1 + _np.abs(hat)))
+    xtol = 1e-8 * (1 + _np.abs(hat))
+    v_in, x_in = hat.copy(), free_hat.copy()
+    v_out, v, x_v = _np.full(n_rows, _np.nan), hat.copy(), free_hat.copy()
+    deviance, dvalue = _np.full(n_rows, _np.nan), _np.full(n_rows, _np.nan)
+    while active.any():
+        if stop is not None and stop():
+            break
+        index = _np.flatnonzero(active)
+        new = _np.empty(len(index))
+        br = bracketing[index]
+        i = index[br]
+        new[br] = hat[i] + direction[i] * step[i]
+        new[br] = _np.where((kind[i] == 2) & (new[br] <= 0), v_in[i] / 2,
+                            new[br])
+        # the deviance 2 * (nll - nll_min) - crit is negative at v_in and
+        # positive at v_out. Newton steps (2 * dvalue is its derivative)
+        # safeguarded with bisection.
+        i = index[~br]
+        up = deviance[i] > 0
+        v_out[i[up]] = v[i[up]]
+        v_in[i[~up]], x_in[i[~up]] = v[i[~up]], x_v[i[~up]]
+        with _np.errstate(all='ignore'):
+            root = v[i] - deviance[i] / (2 * dvalue[i])
+        inside = ((_np.minimum(v_in[i], v_out[i]) < root) &
+                  (root < _np.maximum(v_in[i], v_out[i])))
+        new[~br] = _np.where(inside, root, (v_in[i] + v_out[i]) / 2)
+
+        nll, x, dv = profile(index, new, x_in[index])
+        dev = _np.minimum(2 * (nll - nll_min), 1e10) - crit
+        iterations[index] += 1
+
+        # bracketing rows, bound bracketed if the deviance is positive
+        i, found = index[br], dev[br] > 0
+        j = i[found]
+        bracketing[j] = False
+        iterations[j] = 0
+        v[j] = v_out[j] = new[br][found]
+        x_v[j], deviance[j], dvalue[j] = (x[br][found], dev[br][found],
+                                          dv[br][found])
+        j = i[~found]
+        v_in[j], x_in[j] = new[br][~found], x[br][~found]
+        step[j] *= 2
+        j = j[iterations[j] >= 50]
+        out[j] = direction[j] * _np.inf
+        active[j] = False
+
+        # root finding rows
+        i = index[~br]
+        finite = _np.isfinite(nll[~br])
+        x_v[i[finite]] = x[~br][finite]
+        deviance[i], dvalue[i] = dev[~br], dv[~br]
+        converged = _np.abs(new[~br] - v[i]) <= xtol[i]
+        v[i] = new[~br]
+        done = (converged | (_np.abs(v_out[i] - v_in[i]) <= xtol[i]) |
+                (iterations[i] >= 100))
+        out[i[done]] = v[i[done]]
+        active[i[done]] = False
+    out = out.reshape(-1, 2)
+    out[_np.isnan(out).any(axis=1)] = _np.nan
+    return out
+
+
 class GEV(_Base):
     """
     Class to fit data to a Generalised extreme value (GEV) distribution.
@@ -502,10 +723,18 @@ class GEV(_Base):
         confidence intervals. If ``ci`` is not supplied this parameter will
         be ignored. Possible values depend of the fit method chosen. If
         the fit method is 'mle' possible values for ci_method are
-        'delta' and 'bootstrap', if the fit method is 'mom' or
-        'lmoments' possible value for ci_method is 'bootstrap'.
+        'delta', 'bootstrap', 'bca' and 'profile', if the fit method is 'mom'
+        possible values are 'bootstrap' and 'bca' and if the fit method
+        is 'lmoments' possible values are 'bootstrap', 'bca' and
+        'studentized'.
             'delta' is for delta method.
             'bootstrap' is for parametric bootstrap.
+            'bca' is for the bias-corrected accelerated (nonparametric)
+            bootstrap.
+            'studentized' is for the bootstrap-t (nonparametric)
+            bootstrap using jackknife standard errors.
+            'profile' is for the profile likelihood (asymmetric intervals
+            for the parameters and the return values).
     return_period : array_like (optional)
         1D array_like of values for the *return period*. Values indicate
         **years**.
@@ -513,6 +742,33 @@ class GEV(_Base):
         Value indicating the frecuency of events per year. If frec is
         not provided the data will be treated as yearly data (1 value per
         year).
+    n_samples : int
+        Number of bootstrap samples used by the 'bootstrap', 'bca' and
+        'studentized' ci methods (default value is 500). If ``ci_tol`` is
+        provided it is the maximum number of samples.
+    ci_tol : float (optional)
+        If provided, bootstrap samples are drawn in batches until the Monte
+        Carlo standard error of every bound of the confidence intervals is
+        lower than ``ci_tol`` times the width of the interval (see
+        ``skextremes.utils.adaptive_bootstrap_ci``).
+    ci_max_time : float (optional)
+        Maximum time in seconds for the bootstrap based and 'profile' ci
+        methods. When it is exceeded the confidence intervals are
+        calculated with the samples already drawn (or the bounds not
+        profiled are ``numpy.nan``) and ``ci_partial`` is set.
+    ci_callback : function (n_done, n_total) -> None (optional)
+        Function called to report the progress of the bootstrap based and
+        'profile' ci methods.
+    ci_cancel : object with an ``is_set`` method (optional)
+        Cooperative cancellation token (e.g., a ``threading.Event``) for the
+        bootstrap based and 'profile' ci methods. When it is set the
+        confidence intervals are calculated with the samples already drawn
+        (or the bounds not profiled are ``numpy.nan``) and ``ci_partial``
+        is set.
+    ci_executor : concurrent.futures.Executor (optional)
+        Pool (e.g., a ``ProcessPoolExecutor``) used to profile the return
+        values of different return periods in parallel ('profile' ci
+        method).
 
     **Attributes and Methods**
 
@@ -529,14 +785,32 @@ class GEV(_Base):
         Frozen RV object with the same methods of a continuous scipy
         distribution but holding the given *shape*, *location*, and *scale*
         fixed. See http://docs.scipy.org/doc/scipy/reference/stats.html
-        for more info.
+        for more info. It is a ``GEVDistribution`` (or
+        ``GumbelDistribution``) from ``skextremes.models.distributions``
+        with fast closed form methods.
     data : array_like
         Input data used for the fit
     fit_method : str
         String indicating the method used to fit the distribution,
         values can be 'mle', 'mom' or 'lmoments'.
+    ci_n_samples : int
+        Number of bootstrap samples used to calculate the confidence
+        intervals (only for the bootstrap based ci methods).
+    ci_converged : bool
+        False if the adaptive bootstrap (see ``ci_tol``) stopped before
+        reaching the tolerance.
+    ci_partial : bool
+        True if the calculation of the confidence intervals was cancelled
+        or ran out of time and the intervals are partial results.
+    return_values_ci : numpy.array
+        Lower and upper bounds (one row per return period) of the
+        confidence intervals of ``return_values`` (only for the 'profile'
+        ci method).
     """
 
+    # the shape is profiled too
+    _profile_gumbel = False
+
     def _fit(self):
 
         # Fit can be made using Maximum Likelihood Estimation (mle) or using
@@ -599,10 +873,11 @@ class GEV(_Base):
         self.c     = self.params['shape']      # shape
         self.loc   = self.params['location']   # location
         self.scale = self.params['scale']      # scale
-        self.distr = _st.genextreme(self.c,     # frozen distribution
-                                    loc = self.loc,
-                                    scale = self.scale)
-        # self.distr is a scipy.stats.genextreme obj.
+        self.distr = _GEVDistribution(self.c,   # frozen distribution
+                                      loc = self.loc,
+                                      scale = self.scale)
+        # self.distr is a skextremes.models.distributions.GEVDistribution
+        # obj. (faster than scipy.stats.genextreme, same methods).
 
 
     def _nnlf(self, theta):
@@ -622,16 +897,8 @@ class GEV(_Base):
             c = 0
             loc = theta[0]
             scale = theta[1]
-        if c != 0:
-            expr = 1. + c * ((x - loc) / scale)
-            return (len(x) * _np.log(scale) +
-                    (1. + 1. / c) * _np.sum(_np.log(expr)) +
-                    _np.sum(expr ** ( -1. / c)))
-        else:
-            expr = (x - loc) / scale
-            return (len(x) * _np.log(scale) +
-                    _np.sum(expr) +
-                    _np.sum(_np.exp( -expr)))
+        # theta uses the opposite sign convention for the shape
+        return float(_gev_nll(_np.asarray(x, dtype=float), -c, loc, scale))
 
     def _ci_delta(self):
         # Calculate the variance-covariance matrix using the
@@ -683,6 +950,7 @@ class GEV(_Base):
             print('\n !working out GEV confidence intervals! \n')
 
             varcovar = _np.linalg.inv(hess([c, loc, scale])) # wow.
+            self._varcovar = varcovar
             self.params_ci = OrderedDict()
             se = _np.sqrt(_np.diag(varcovar))
             self._se = se
@@ -719,6 +987,7 @@ class GEV(_Base):
             # else then we are calculating Gumbel confidence intervals.
             print('\n !!!GUMBEL confidence intervals being calculated!!! \n')
             varcovar = _np.linalg.inv(hess([loc, scale]))
+            self._varcovar = varcovar
             self.params_ci = OrderedDict()
             se = _np.sqrt(_np.diag(varcovar))
             self._se = se
@@ -771,23 +1040,178 @@ class GEV(_Base):
             return tuple(res)
 
         # the calculations itself
-        out = _bsci(self.data, statfunction=func, n_samples=500)
+        self._run_bootstrap(func)
+
+    def _fit_samples(self, samples):
+        # Parameters (shape, location, scale) fitted to every row of the 2D
+        # array samples using the fit method of the instance.
+        if self.fit_method == 'lmoments':
+            return _np.column_stack(_gev_lmomfit(samples, axis=1))
+        if self.fit_method == 'mom':
+            return _np.array([_gev_momfit(sample) for sample in samples])
+        return _np.array([_st.genextreme.fit(sample, self.c,
+                                             loc=self.loc,
+                                             scale=self.scale,
+                                             optimizer=_op.fmin_bfgs)
+                          for sample in samples])
+
+    def _ci_resampling(self):
+        # Calculate confidence intervals using nonparametric bootstrap and
+        # the bias-corrected accelerated ('bca') or the bootstrap-t
+        # ('studentized') methods, see skextremes.utils.bootstrap_ci.
+        # Samples are fitted in batches so the l-moments fits are
+        # vectorized. The batch size bounds the (batch, N) resamples and the
+        # (batch, len(T) + 3) outputs to about 2**20 values each.
+        T = _np.arange(0.1, 500.1, 0.1)
+
+        def func(samples):
+            params = self._fit_samples(samples)
+            sT = _gev_isf(self.frec/T, params[:, :1], params[:, 1:2],
+                          params[:, 2:])
+            return _np.hstack((params, sT))
+
+        self._run_bootstrap(func, method=self.ci_method, vectorized=True,
+                            batch_size=max(1, 2**20 // max(len(self.data),
+                                                           len(T) + 3)))
+
+    def _run_bootstrap(self, func, **kwargs):
+        # Bootstrap the parameters and return values calculated by func
+        # using a fixed number of samples or, if ci_tol is provided, the
+        # adaptive bootstrap.
+        kwargs.update(callback=self.ci_callback, cancel=self.ci_cancel,
+                      max_time=self.ci_max_time)
+        if self.ci_tol is None:
+            out, self.ci_n_samples, complete = _bsci(
+                self.data, statfunction=func, alpha=self.ci,
+                n_samples=self.n_samples, full_output=True, **kwargs)
+            self.ci_converged = complete
+            self.ci_partial = not complete
+        else:
+            out, self.ci_n_samples, self.ci_converged = _adaptive_bsci(
+                self.data, statfunction=func, alpha=self.ci, tol=self.ci_tol,
+                max_samples=self.n_samples, **kwargs)
+            # stopped before using all the samples without converging
+            self.ci_partial = (not self.ci_converged and
+                               self.ci_n_samples < self.n_samples)
         self._ci_Td = out[0, 3:]
         self._ci_Tu = out[1, 3:]
         self.params_ci = OrderedDict()
         self.params_ci['shape']    = (out[0,0], out[1,0])
         self.params_ci['location'] = (out[0,1], out[1,1])
-        self.params_ci['scale']    = (out[0,2], out[1,3])
+        self.params_ci['scale']    = (out[0,2], out[1,2])
+
+    def _ci_profile(self):
+        # Calculate confidence intervals using the profile likelihood. The
+        # bounds are the values where the deviance of the profile
+        # likelihood equals the (1 - ci) quantile of a chi-squared
+        # distribution with 1 degree of freedom. Return levels are profiled
+        # reparameterizing the GEV in terms of the return level (location
+        # is replaced). Unlike the delta method, intervals are not
+        # symmetric and have better coverage for long return periods.
+        #
+        # More info about the profile likelihood can be found on:
+        #     - Coles, Stuart: "An Introduction to Statistical Modeling of
+        #     Extreme Values", Springer (2001), sections 2.6.6 and 3.3.3
+        data = _np.asarray(self.data, dtype=float)
+        gumbel = self._profile_gumbel
+
+        # mle refined with the same likelihood used in the profiles
+        mle = _np.array([self.c, self.loc, self.scale], dtype=float)
+        free = mle[1:] if gumbel else mle
+        res = _op.minimize(
+            lambda p: _gev_nll(data, *(([0] if gumbel else []) + list(p))),
+            free, method='Nelder-Mead',
+            options={'xatol': 1e-10, 'fatol': 1e-12, 'maxiter': 5000})
+        nll_min = _gev_nll(data, *mle)
+        if res.fun < nll_min:
+            nll_min = res.fun
+            mle[-len(res.x):] = res.x
+
+        # return periods profiled (interpolated in the rest of periods)
+        T = _np.arange(0.1, 500.1, 0.1)
+        grid = _np.unique(_np.r_[_np.geomspace(1.05 * self.frec, 500, 30),
+                                 self.return_periods])
+        grid = grid[self.frec / grid < 1]
+        params = [1, 2] if gumbel else [0, 1, 2]
+        targets = params + list(self.frec / grid)
+        # the parameters and chunks of contiguous return periods are
+        # profiled together
+        chunks = [list(range(len(params)))] + [
+            list(range(i, min(i + _PROFILE_CHUNK, len(targets))))
+            for i in range(len(params), len(targets), _PROFILE_CHUNK)]
+
+        monitor = _Monitor(self.ci_callback, self.ci_cancel,
+                           self.ci_max_time, total=len(targets))
+        out = _np.full((len(targets), 2), _np.nan)
+        n_done = 0
+        if self.ci_executor is None:
+            stop = monitor.stop if monitor.active else None
+            for chunk in chunks:
+                if stop is not None and stop():
+                    break
+                out[chunk] = _gev_profile_task(
+                    data, mle, nll_min, gumbel, [targets[i] for i in chunk],
+                    self.ci, stop=stop)
+                n_done = int(_np.sum(~_np.isnan(out[:, 0])))
+                monitor.progress(n_done)
+        else:
+            # a task per chunk, all submitted at once
+            futures = {self.ci_executor.submit(
+                _gev_profile_task, data, mle, nll_min, gumbel,
+                [targets[i] for i in chunk], self.ci): chunk
+                for chunk in chunks}
+            pending = set(futures)
+            while pending:
+                if monitor.stop():
+                    for future in pending:
+                        future.cancel()
+                    break
+                # the budget and the cancellation token are checked while
+                # the tasks run
+                done, pending = _wait(pending, timeout=monitor.timeout(),
+                                      return_when=_FIRST_COMPLETED)
+                for future in done:
+                    out[futures[future]] = future.result()
+                    n_done += len(futures[future])
+                monitor.progress(n_done)
+        self.ci_partial = n_done < len(targets)
+        if self.ci_partial:
+            monitor.warn(n_done)
+
+        self.params_ci = OrderedDict()
+        if gumbel:
+            self.params_ci['shape'] = (0, 0)
+        else:
+            self.params_ci['shape'] = tuple(out[0])
+        self.params_ci['location'] = tuple(out[len(params) - 2])
+        self.params_ci['scale'] = tuple(out[len(params) - 1])
+        bounds = out[len(params):]
+        with _np.errstate(invalid='ignore'):
+            self._ci_Td = _np.interp(_np.log(T), _np.log(grid), bounds[:, 0],
+                                     left=_np.nan)
+            self._ci_Tu = _np.interp(_np.log(T), _np.log(grid), bounds[:, 1],
+                                     left=_np.nan)
+        # return periods not profiled (T <= frec) are nan
+        self.return_values_ci = _np.full((len(self.return_periods), 2),
+                                         _np.nan)
+        profiled = self.frec / _np.asarray(self.return_periods,
+                                           dtype=float) < 1
+        self.return_values_ci[profiled] = bounds[_np.searchsorted(
+            grid, _np.asarray(self.return_periods, dtype=float)[profiled])]
 
     def _ci(self):
         # Method called internally to calculate confidence intervals if
         # required. To see more info about available methods see comments on
-        # self._ci_delta and self._ci_bootstrap methods.
+        # self._ci_delta, self._ci_bootstrap and self._ci_resampling methods.
 
         if self.ci_method == "delta":
             self._ci_delta()
         if self.ci_method == "bootstrap":
             self._ci_bootstrap()
+        if self.ci_method in ("bca", "studentized"):
+            self._ci_resampling()
+        if self.ci_method == "profile":
+            self._ci_profile()
 
 class Gumbel(GEV):
     __doc__ = GEV.__doc__.replace("Generalised extreme value (GEV) distribution.",
@@ -795,6 +1219,9 @@ class Gumbel(GEV):
                                    "special case of the ``GEV`` class where "
                                    "the 'shape' is fixed to 0."))
 
+    # the shape is not profiled
+    _profile_gumbel = True
+
     def _fit(self):
 
         if self.fit_method == 'mle':
@@ -822,8 +1249,18 @@ class Gumbel(GEV):
         self.c     = self.params['shape']
         self.loc   = self.params['location']
         self.scale = self.params['scale']
-        self.distr = _st.gumbel_r(loc=self.loc,
-                                  scale=self.scale)
+        self.distr = _GumbelDistribution(loc=self.loc,
+                                         scale=self.scale)
+
+    def _fit_samples(self, samples):
+        # Parameters (shape, location, scale) fitted to every row of the 2D
+        # array samples using the fit method of the instance.
+        if self.fit_method == 'lmoments':
+            return _np.column_stack(_gum_lmomfit(samples, axis=1))
+        if self.fit_method == 'mom':
+            return _np.array([_gum_momfit(sample) for sample in samples])
+        return _np.array([(0,) + tuple(_st.gumbel_r.fit(sample))
+                          for sample in samples])
 
 class GPD(_Base):
     pass
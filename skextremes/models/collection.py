@@ -0,0 +1,333 @@
+"""
+Module containing a compact representation of many fitted models
+
+Each ``classic`` model keeps the data, the frozen distribution and the
+confidence intervals, which is too much to keep thousands of them in memory.
+``ModelCollection`` stores only the parameters, their variance-covariance
+matrices and some metadata of many GEV/Gumbel models in columnar
+``numpy`` arrays (about 200 bytes per model). Return levels, ``cdf``,
+``isf``,... are evaluated for the whole collection at once and individual
+models are accessed through cheap views::
+
+    models = ModelCollection.from_models(fitted_models, names=stations)
+    models.return_level([50, 100])  # (n_models, 2) array
+    models['station_a'].return_level(50)
+
+Collections can also be built from arrays of parameters, e.g., those
+obtained with ``skextremes.parallel.fit_grid``, and saved to/loaded from
+.npz files.
+"""
+
+from collections import OrderedDict
+
+import numpy as _np
+from scipy import stats as _st
+
+from .distributions import GEVDistribution as _GEVDistribution
+from .distributions import _gev_isf
+
+_fields = ('c', 'loc', 'scale', 'cov', 'n', 'frec', 'names', 'fit_method')
+
+
+class ModelCollection:
+    """
+    Collection of fitted GEV (or Gumbel) models stored in columnar arrays.
+
+    **Parameters**
+
+    c, loc, scale : array_like
+        Shape (``scipy.stats.genextreme`` sign convention, 0 for Gumbel
+        models), location and scale parameters of each model.
+    cov : array_like (optional)
+        Variance-covariance matrices of the estimators (c, loc, scale), with
+        shape (n_models, 3, 3). If not available, confidence intervals are
+        ``numpy.nan``.
+    n : array_like (optional)
+        Number of values used in each fit.
+    frec : float or array_like
+        Number of values per block (per year) of each model. Default value
+        is 1.
+    names : array_like (optional)
+        Names (e.g., station identifiers) of the models. Default values are
+        the positions of the models in the collection as strings.
+    fit_method : str or array_like
+        Method used to fit each model. Default value is ''.
+
+    **Attributes and Methods**
+
+    c, loc, scale, cov, n, frec, names, fit_method : numpy.array
+        Columnar arrays with the information of the models.
+    distr : GEVDistribution
+        Distribution of all the models (parameters with shape (n_models,)).
+    return_level, cdf, sf, pdf, ppf, isf :
+        Vectorized evaluation for all the models of the collection.
+    """
+
+    def __init__(self, c, loc, scale, cov=None, n=None, frec=1, names=None,
+                 fit_method=''):
+        self.c = _np.array(c, dtype=float, ndmin=1)
+        size = len(self.c)
+        self.loc = _np.array(_np.broadcast_to(loc, size), dtype=float)
+        self.scale = _np.array(_np.broadcast_to(scale, size), dtype=float)
+        if cov is None:
+            self.cov = _np.full((size, 3, 3), _np.nan)
+        else:
+            self.cov = _np.array(_np.broadcast_to(cov, (size, 3, 3)),
+                                 dtype=float)
+        if n is None:
+            n = 0
+        self.n = _np.array(_np.broadcast_to(n, size), dtype=_np.int32)
+        self.frec = _np.array(_np.broadcast_to(frec, size), dtype=float)
+        if names is None:
+            names = _np.arange(size)
+        self.names = _np.array(names, dtype=str, ndmin=1)
+        self.fit_method = _np.array(_np.broadcast_to(fit_method, size),
+                                    dtype=str)
+        if self.names.shape != (size,):
+            raise ValueError('names should have one value per model.')
+        self._index = None
+
+    @classmethod
+    def from_models(cls, models, names=None):
+        """
+        Collection with the parameters of fitted ``classic.GEV``,
+        ``classic.Gumbel`` or ``engineering`` models. The
+        variance-covariance matrices are available for models with
+        confidence intervals calculated using the 'delta' method.
+
+        **Parameters**
+
+        models : sequence
+            Fitted models.
+        names : array_like (optional)
+            Names of the models.
+        """
+        models = list(models)
+        size = len(models)
+        params = _np.empty((3, size))
+        cov = _np.full((size, 3, 3), _np.nan)
+        n = _np.zeros(size, dtype=_np.int32)
+        frec = _np.ones(size)
+        fit_method = []
+        for i, model in enumerate(models):
+            params[:, i] = model.c, model.loc, model.scale
+            n[i] = len(model.data)
+            frec[i] = getattr(model, 'frec', 1)
+            fit_method.append(getattr(model, 'fit_method',
+                                      getattr(model, 'ppp', '')) or '')
+            varcovar = getattr(model, '_varcovar', None)
+            if varcovar is None:
+                continue
+            if len(varcovar) == 3:
+                # the delta method uses the opposite sign for the shape
+                sign = _np.array([-1., 1., 1.])
+                cov[i] = varcovar * sign * sign[:, None]
+            else:
+                cov[i] = 0
+                cov[i, 1:, 1:] = varcovar
+        return cls(params[0], params[1], params[2], cov=cov, n=n, frec=frec,
+                   names=names, fit_method=fit_method)
+
+    @classmethod
+    def load(cls, filename):
+        """Collection saved with the ``save`` method in a .npz file."""
+        with _np.load(filename, allow_pickle=False) as f:
+            return cls(**{field: f[field] for field in _fields})
+
+    def save(self, filename):
+        """Save the collection to the .npz file ``filename``."""
+        _np.savez(filename, **{field: getattr(self, field)
+                               for field in _fields})
+
+    def __len__(self):
+        return len(self.c)
+
+    def __repr__(self):
+        return '<ModelCollection of {} models, {:.1f} KiB>'.format(
+            len(self), self.nbytes / 1024)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the arrays of the collection."""
+        return sum(getattr(self, field).nbytes for field in _fields)
+
+    def index(self, name):
+        """Position of the model called ``name``."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        try:
+            return self._index[name]
+        except KeyError:
+            raise KeyError('There is no model called {}.'.format(name))
+
+    def __getitem__(self, key):
+        # int or name -> view of a model, other keys (slices, masks,
+        # sequences of positions) -> new collection
+        if isinstance(key, str):
+            return ModelView(self, self.index(key))
+        if isinstance(key, (int, _np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError('model index out of range.')
+            return ModelView(self, int(key) % len(self))
+        return type(self)(**{field: getattr(self, field)[key]
+                             for field in _fields})
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield ModelView(self, i)
+
+    @property
+    def distr(self):
+        """GEVDistribution with the parameters of all the models."""
+        return _GEVDistribution(self.c, self.loc, self.scale)
+
+    def _params(self, ndim):
+        # Parameters with the models along the first axis and ndim more
+        # dimensions to broadcast the values.
+        shape = (-1,) + (1,) * ndim
+        return tuple(p.reshape(shape) for p in (self.c, self.loc, self.scale))
+
+    def _eval(self, method, x):
+        # x is broadcast against the models (first axis): a scalar gives
+        # one value per model, a 1D array gives a (n_models, len(x)) array.
+        x = _np.asarray(x, dtype=float)
+        distr = _GEVDistribution(*self._params(x.ndim))
+        return getattr(distr, method)(x)
+
+    def pdf(self, x):
+        """Probability density function of every model at ``x``."""
+        return self._eval('pdf', x)
+
+    def cdf(self, x):
+        """Cumulative distribution function of every model at ``x``."""
+        return self._eval('cdf', x)
+
+    def sf(self, x):
+        """Survival function of every model at ``x``."""
+        return self._eval('sf', x)
+
+    def ppf(self, q):
+        """Percent point function of every model at ``q``."""
+        return self._eval('ppf', q)
+
+    def isf(self, q):
+        """Inverse survival function of every model at ``q``."""
+        return self._eval('isf', q)
+
+    def return_level(self, T, ci=None):
+        """
+        Return levels of every model.
+
+        **Parameters**
+
+        T : float or array_like
+            Return periods.
+        ci : float (optional)
+            If provided (e.g., 0.05), confidence intervals of level ``ci``
+            are also calculated using the delta method and the
+            variance-covariance matrices of the models.
+
+        **Returns**
+
+        values : numpy.array
+            Return levels with shape (n_models,) + shape of ``T``.
+        lower, upper : numpy.array
+            Bounds of the confidence intervals (only if ``ci`` is
+            provided).
+        """
+        T = _np.asarray(T, dtype=float)
+        q = self.frec.reshape((-1,) + (1,) * T.ndim) / T
+        if ci is None:
+            return _GEVDistribution(*self._params(T.ndim)).isf(q)
+        values, grad = _gev_isf(q, *self._params(T.ndim), grad=True)
+        var = 0
+        cov = self.cov.reshape(self.cov.shape[:1] + (1,) * T.ndim + (3, 3))
+        for i in range(3):
+            for j in range(3):
+                var = var + grad[i] * grad[j] * cov[..., i, j]
+        delta = _st.norm.ppf(1 - ci / 2) * _np.sqrt(var)
+        return values, values - delta, values + delta
+
+
+class ModelView:
+    """
+    View of one of the models of a ``ModelCollection``, without copies of
+    the data. It has the same attributes as the collection for one model.
+    """
+
+    __slots__ = ('collection', 'position')
+
+    def __init__(self, collection, position):
+        self.collection = collection
+        self.position = position
+
+    def __repr__(self):
+        return '<ModelView {}: c={}, loc={}, scale={}>'.format(
+            self.name, self.c, self.loc, self.scale)
+
+    @property
+    def name(self):
+        return str(self.collection.names[self.position])
+
+    @property
+    def c(self):
+        return self.collection.c[self.position]
+
+    @property
+    def loc(self):
+        return self.collection.loc[self.position]
+
+    @property
+    def scale(self):
+        return self.collection.scale[self.position]
+
+    @property
+    def cov(self):
+        return self.collection.cov[self.position]
+
+    @property
+    def n(self):
+        return self.collection.n[self.position]
+
+    @property
+    def frec(self):
+        return self.collection.frec[self.position]
+
+    @property
+    def fit_method(self):
+        return str(self.collection.fit_method[self.position])
+
+    @property
+    def params(self):
+        params = OrderedDict()
+        params['shape'] = self.c
+        params['location'] = self.loc
+        params['scale'] = self.scale
+        return params
+
+    @property
+    def distr(self):
+        return _GEVDistribution(self.c, self.loc, self.scale)
+
+    def return_level(self, T, ci=None):
+        """See ``ModelCollection.return_level``."""
+        out = self.collection[self.position:self.position + 1].return_level(
+            T, ci=ci)
+        if ci is None:
+            return out[0]
+        return tuple(o[0] for o in out)
+
+    def pdf(self, x):
+        return self.distr.pdf(x)
+
+    def cdf(self, x):
+        return self.distr.cdf(x)
+
+    def sf(self, x):
+        return self.distr.sf(x)
+
+    def ppf(self, q):
+        return self.distr.ppf(q)
+
+    def isf(self, q):
+        return self.distr.isf(q)
@@ -0,0 +1,294 @@
+"""
+Module containing lightweight GEV and Gumbel distributions
+
+The fitted models of ``classic`` and ``engineering`` store their
+distribution in the ``distr`` attribute. Frozen ``scipy.stats``
+distributions validate and broadcast the arguments in every call, which is
+slow when many small evaluations are needed. The distributions of this
+module use the closed form expressions of the GEV and Gumbel distributions
+and broadcast the values against arrays of parameters, so many models can
+be evaluated with a single call::
+
+    distr = GEVDistribution(c=[-0.1, 0, 0.2], loc=10, scale=2)
+    distr.isf([[0.1], [0.01]])  # (2, 3) array of return values
+
+The same sign convention for the shape parameter used by
+``scipy.stats.genextreme`` is used. Methods not implemented here (e.g.,
+``stats``, ``interval``, ``expect``) are delegated to the equivalent frozen
+``scipy.stats`` distribution, available in the ``frozen`` attribute.
+"""
+
+import numpy as _np
+from scipy import stats as _st
+
+
+def _random_state(random_state):
+    # Same behaviour as scipy.stats random_state arguments.
+    if random_state is None:
+        return _np.random.mtrand._rand
+    if isinstance(random_state, (_np.random.RandomState,
+                                 _np.random.Generator)):
+        return random_state
+    return _np.random.RandomState(random_state)
+
+
+def _result(values):
+    # numpy scalars instead of 0d arrays, like scipy.stats
+    return values[()] if values.ndim == 0 else values
+
+
+def _gev_quantile(logy, c, loc, scale, grad=False):
+    # Values with cdf = exp(-exp(logy)) of GEV distributions (scipy sign
+    # convention for the shape, 0 for Gumbel), the parameters broadcast
+    # against logy. (1 - y**c) / c is evaluated as -expm1(c * logy) / c,
+    # which is accurate for small shapes. If grad, the derivatives with
+    # respect to (c, loc, scale) are also returned. Single implementation
+    # of the quantiles used by all the models.
+    c = _np.asarray(c)
+    with _np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        zero = c == 0
+        if not grad and zero.all():
+            return loc - scale * logy
+        c_ = _np.where(zero, 1, c) if zero.any() else c
+        clogy = c * logy
+        reduced = -_np.expm1(clogy) / c_
+        if zero.any():
+            reduced = _np.where(zero, -logy, reduced)
+        value = loc + scale * reduced
+        if not grad:
+            return value
+        dc = -scale * (_np.exp(clogy) * logy + reduced) / c_
+        # limit for small shapes
+        small = abs(c) < 1e-8
+        if small.any():
+            dc = _np.where(small, -scale * logy**2 / 2, dc)
+    return value, (dc, _np.ones_like(value), reduced)
+
+
+def _gev_nll(x, c, loc, scale, mask=None, grad=False):
+    # Negative log-likelihood of GEV distributions (scipy sign convention
+    # for the shape, 0 for Gumbel) of the values along the last axis of x,
+    # the parameters broadcast against x (e.g., (m, 1) for m models or
+    # (m, n) if they change with every value). Values with mask False don't
+    # contribute. inf if a value is out of the support or the scale is not
+    # positive. If grad, the derivatives of the negative log-likelihood of
+    # every value with respect to (c, loc, scale) are also returned (nan if
+    # the likelihood is not finite), to be summed or projected by the
+    # callers. Single implementation of the likelihood used by the models.
+    c = _np.asarray(c)
+    with _np.errstate(all='ignore'):
+        y = (x - loc) / scale
+        if mask is not None:
+            y = _np.where(mask, y, 0)
+        t = 1 - c * y
+        small = abs(c) < 1e-8
+        c_ = _np.where(small, 1, c)
+        h = _np.where(small, y * (1 + c * y / 2), -_np.log1p(-c * y) / c_)
+        e = _np.exp(-h)
+        terms = _np.log(scale) + (1 - c) * h + e
+        if mask is not None:
+            terms = _np.where(mask, terms, 0)
+        nll = terms.sum(axis=-1)
+        invalid = ((t <= 0) | _np.logical_not(scale > 0)).any(axis=-1)
+        nll = _np.where(invalid | ~_np.isfinite(nll), _np.inf, nll)
+        if not grad:
+            return nll
+        # derivatives of h = -log(1 - c * y) / c
+        dh = (1 - c) - e
+        w = dh / t
+        dh_dc = _np.where(small, y * y / 2, (y / t - h) / c_)
+        derivatives = [dh * dh_dc - h, -w / scale, (1 - w * y) / scale]
+        for i, d in enumerate(derivatives):
+            if mask is not None:
+                d = _np.where(mask, d, 0)
+            derivatives[i] = _np.where(_np.isfinite(nll)[..., None], d,
+                                       _np.nan)
+    return nll, tuple(derivatives)
+
+
+def _gev_isf(q, c, loc, scale, grad=False):
+    # Inverse survival function of GEV distributions (return levels of the
+    # exceedance probabilities q), see _gev_quantile.
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        logy = _np.log(-_np.log1p(-_np.asarray(q, dtype=float)))
+    return _gev_quantile(logy, c, loc, scale, grad)
+
+
+class GEVDistribution:
+    """
+    Generalised extreme value distribution.
+
+    **Parameters**
+
+    c : float or array_like
+        Shape parameter (``scipy.stats.genextreme`` sign convention).
+    loc : float or array_like
+        Location parameter.
+    scale : float or array_like
+        Scale parameter.
+
+    Parameters are broadcast against each other and against the values
+    passed to the methods.
+    """
+
+    __slots__ = ('c', 'loc', 'scale', '_gumbel', '_frozen')
+
+    def __init__(self, c=0, loc=0, scale=1):
+        self.c = _np.asarray(c, dtype=float)
+        self.loc = _np.asarray(loc, dtype=float)
+        self.scale = _np.asarray(scale, dtype=float)
+        # the c=0 expressions are cheaper
+        self._gumbel = not _np.any(self.c)
+        self._frozen = None
+
+    def __repr__(self):
+        return '{}(c={}, loc={}, scale={})'.format(
+            type(self).__name__, self.c, self.loc, self.scale)
+
+    def __getstate__(self):
+        return self.c, self.loc, self.scale
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @property
+    def frozen(self):
+        """Equivalent frozen ``scipy.stats`` distribution."""
+        if self._frozen is None:
+            self._frozen = _st.genextreme(self.c, loc=self.loc,
+                                          scale=self.scale)
+        return self._frozen
+
+    def __getattr__(self, name):
+        # only called for attributes not defined in the class
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.frozen, name)
+
+    def _reduced(self, x):
+        # Standardized values y = (x - loc) / scale and
+        # h = -log(1 - c * y) / c, so that cdf = exp(-exp(-h)).
+        y = (_np.asarray(x, dtype=float) - self.loc) / self.scale
+        if self._gumbel:
+            return y, y
+        c = self.c
+        h = -_np.log1p(-c * y) / _np.where(c == 0, 1, c)
+        return y, _np.where(c == 0, y, h)
+
+    def _mask(self, out, y, outside):
+        # Values outside the support and invalid scales.
+        if not self._gumbel:
+            out = _np.where(self.c * y >= 1, outside, out)
+        if _np.any(self.scale <= 0):
+            out = _np.where(self.scale > 0, out, _np.nan)
+        return out
+
+    def _quantile(self, logy):
+        # Values with cdf = exp(-exp(logy)).
+        return _gev_quantile(logy, 0 if self._gumbel else self.c, self.loc,
+                             self.scale)
+
+    def logpdf(self, x):
+        """Logarithm of the probability density function at ``x``."""
+        with _np.errstate(invalid='ignore', divide='ignore',
+                          over='ignore'):
+            y, h = self._reduced(x)
+            out = -_np.log(self.scale) - (1 - self.c) * h - _np.exp(-h)
+            return _result(self._mask(out, y, -_np.inf))
+
+    def pdf(self, x):
+        """Probability density function at ``x``."""
+        return _np.exp(self.logpdf(x))
+
+    def cdf(self, x):
+        """Cumulative distribution function at ``x``."""
+        with _np.errstate(invalid='ignore', divide='ignore',
+                          over='ignore'):
+            y, h = self._reduced(x)
+            out = _np.exp(-_np.exp(-h))
+            # upper bound for c > 0 and lower bound for c < 0
+            return _result(self._mask(out, y, (self.c > 0) * 1.))
+
+    def sf(self, x):
+        """Survival function (1 - cdf) at ``x``, accurate in the upper
+        tail."""
+        with _np.errstate(invalid='ignore', divide='ignore',
+                          over='ignore'):
+            y, h = self._reduced(x)
+            out = -_np.expm1(-_np.exp(-h))
+            return _result(self._mask(out, y, (self.c < 0) * 1.))
+
+    def ppf(self, q):
+        """Percent point function (inverse of cdf) at ``q``."""
+        q = _np.asarray(q, dtype=float)
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            out = self._quantile(_np.log(-_np.log(q)))
+            out = _np.where((q >= 0) & (q <= 1) & (self.scale > 0), out,
+                            _np.nan)
+        return _result(out)
+
+    def isf(self, q):
+        """Inverse survival function (inverse of sf) at ``q``, e.g., return
+        values for the probabilities ``q``."""
+        q = _np.asarray(q, dtype=float)
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            out = self._quantile(_np.log(-_np.log1p(-q)))
+            out = _np.where((q >= 0) & (q <= 1) & (self.scale > 0), out,
+                            _np.nan)
+        return _result(out)
+
+    def rvs(self, size=None, random_state=None):
+        """
+        Random variates.
+
+        **Parameters**
+
+        size : int or tuple of ints (optional)
+            Shape of the output. By default, the broadcast shape of the
+            parameters.
+        random_state : None, int, numpy.random.RandomState or
+                       numpy.random.Generator
+            Source of the random numbers, with the same meaning as in
+            ``scipy.stats``. The values are not the same as those obtained
+            with ``scipy.stats.genextreme.rvs``.
+        """
+        if size is None:
+            size = _np.broadcast(self.c, self.loc, self.scale).shape
+        u = _random_state(random_state).random(size)
+        with _np.errstate(divide='ignore'):
+            return _result(self._quantile(_np.log(-_np.log(u))))
+
+
+class GumbelDistribution(GEVDistribution):
+    """
+    Gumbel distribution (GEV distribution with shape 0).
+
+    **Parameters**
+
+    loc : float or array_like
+        Location parameter.
+    scale : float or array_like
+        Scale parameter.
+
+    Parameters are broadcast against each other and against the values
+    passed to the methods.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, loc=0, scale=1):
+        super().__init__(0, loc, scale)
+
+    def __repr__(self):
+        return '{}(loc={}, scale={})'.format(type(self).__name__, self.loc,
+                                             self.scale)
+
+    def __getstate__(self):
+        return self.loc, self.scale
+
+    @property
+    def frozen(self):
+        """Equivalent frozen ``scipy.stats`` distribution."""
+        if self._frozen is None:
+            self._frozen = _st.gumbel_r(loc=self.loc, scale=self.scale)
+        return self._frozen
@@ -45,13 +45,403 @@ each selected from r events, asymptotically approaches the Gumbel distribution
 when :math:`r` goes to infinity.
 """
 
+from collections import OrderedDict
+from functools import lru_cache as _lru_cache
+
 from scipy import integrate as _integrate
+from scipy.special import betaln as _betaln
 import numpy as _np
 from scipy import stats as _st
 import matplotlib.pyplot as _plt
 
+from .distributions import GumbelDistribution as _GumbelDistribution
+
 _fact = _np.math.factorial
 
+# Return periods used if no other values are provided (2 to 100 years)
+_default_return_periods = _np.arange(2, 101)
+_default_return_periods.flags.writeable = False
+
+# Probability plotting positions available in PPPLiterature. All of them have
+# the form P = (i - a) / (N + b), where i is the rank (1 to N) of the data
+# sorted in increasing order. Values are the (a, b) coefficients.
+_ppp_coeffs = OrderedDict([
+    # De, M., 2000. A new unbiased plotting position formula for gumbel
+    #     distribution. Stochastic Envir. Res. Risk Asses., 14: 1-7.
+    ('Adamowski', (0.25, 0.5)),
+    ('Beard', (0.31, 0.38)),
+    # Adeboye, O.B. and M.O. Alatise, 2007. Performance of probability
+    #     distributions and plotting positions in estimating the flood of
+    #     River Osun at Apoje Sub-basin, Nigeria. Agric. Eng. Int.: CIGR J.,
+    #     Vol. 9.
+    ('Blom', (0.375, 0.25)),
+    # De, M., 2000.
+    ('Chegodayev', (0.3, 0.4)),
+    # Cunnane, C., 1978. Unbiased plotting positions: A review. J. Hydrol.,
+    #     37: 205-222.
+    ('Cunnane', (0.4, 0.2)),
+    # Adeboye, O.B. and M.O. Alatise, 2007.
+    ('Gringorten', (0.44, 0.12)),
+    ('Hazen', (0.5, 0.)),
+    # Jay, R.L., O. Kalman and M. Jenkins, 1998. Integrated planning and
+    #     management for Urban water supplies considering multi
+    #     uncertainties. Technical Report, Department of Civil and
+    #     Environmental Engineering, Universities of California.
+    ('Hirsch', (-0.5, 1.)),
+    # Forthegill, J.C., 1990. Estimating the cumulative probability of
+    #     failure data points to be plotted on weibull and other probability
+    #     paper. Electr. Insulation Transact., 25: 489-492.
+    ('IEC56', (0.5, 0.25)),
+    # Makkonen, L., 2008. Problem in the extreme value analysis. Structural
+    #     Safety, 30: 405-419.
+    ('Landwehr', (0.35, 0.)),
+    # Jay, R.L., O. Kalman and M. Jenkins, 1998.
+    ('Laplace', (-1., 2.)),
+    # Makkonen, L., 2008.
+    ('McClung and Mears', (0.4, 0.)),
+    ('Tukey', (1 / 3, 1 / 3)),
+    # Hynman, R.J. and Y. Fan, 1996. Sample quantiles in statistical
+    #     packages. Am. Stat., 50: 361-365.
+    ('Weibull', (0., 1.)),
+])
+
+
+def _ppp_positions(N, how):
+    # Plotting positions for a sample of size N. ``how`` can be a single
+    # method name or a sequence of names, in which case an array with shape
+    # (len(how), N) is returned, one row per method.
+    if isinstance(how, str):
+        a, b = _ppp_coeffs[how]
+    else:
+        a, b = _np.array([_ppp_coeffs[h] for h in how]).T[..., None]
+    return (_np.arange(1, N + 1) - a) / (N + b)
+
+
+def _lsq_fit(Y, data):
+    # Least squares fit of ``data = slope * Y + offset`` along the last axis.
+    # Y and data are broadcast against each other so many fits (e.g., one
+    # per plotting position method) are solved at once. Returns the slope,
+    # the offset and the coefficient of determination (R2) of each fit.
+    dY = Y - _np.mean(Y, axis=-1, keepdims=True)
+    ddata = data - _np.mean(data, axis=-1, keepdims=True)
+    sYY = _np.sum(dY * dY, axis=-1)
+    sdd = _np.sum(ddata * ddata, axis=-1)
+    sYd = _np.sum(dY * ddata, axis=-1)
+    slope = sYd / sYY
+    offset = _np.mean(data, axis=-1) - slope * _np.mean(Y, axis=-1)
+    R2 = sYd ** 2 / (sYY * sdd)
+    return slope, offset, R2
+
+
+def _line_r2(Y, data, slope, offset):
+    # Coefficient of determination of the line ``data = slope * Y + offset``
+    # along the last axis, used for the lines that are not least squares
+    # fits (it is lower than the least squares one and can be negative).
+    residuals = data - (_np.asarray(slope)[..., None] * Y +
+                        _np.asarray(offset)[..., None])
+    ddata = data - _np.mean(data, axis=-1, keepdims=True)
+    return 1 - (_np.sum(residuals * residuals, axis=-1) /
+                _np.sum(ddata * ddata, axis=-1))
+
+
+def _return_values(slope, offset, return_periods, preconditioning=1):
+    # Extreme values for the return periods given using the Gumbel fit
+    # defined by slope and offset. If slope and offset are arrays the output
+    # has an extra last axis with the return periods.
+    slope = _np.asarray(slope)[..., None]
+    offset = _np.asarray(offset)[..., None]
+    yT = -_np.log(-_np.log(1 - 1 / _np.asarray(return_periods, dtype=float)))
+    return (slope * yT + offset) ** (1 / preconditioning)
+
+
+@_lru_cache(maxsize=None)
+def _ppp_Y(N, how):
+    # Gumbel reduced variate of the plotting positions for a sample of size
+    # N. Cached as it only depends on N and the method.
+    Y = -_np.log(-_np.log(_ppp_positions(N, how)))
+    Y.flags.writeable = False
+    return Y
+
+
+@_lru_cache(maxsize=None)
+def _harris1996_coeffs(N):
+    # Mean values of the reduced variate of the order statistics and weights
+    # of the weighted least squares fit proposed by Harris (1996) for a sample
+    # of size N sorted in decreasing order. They only depend on N so they are
+    # cached and shared by all the fits with the same sample size.
+    # The NU-th largest value of the sample has a non-exceedance probability
+    # x following a Beta(N - NU + 1, NU) distribution. The integrals are
+    # limited to the bulk of that distribution as it gets very peaked for
+    # large samples.
+    ymean = _np.empty(N)
+    variance = _np.empty(N)
+
+    def integ_ymean(x, a, b, lnorm):
+        return (-_np.log(-_np.log(x)) *
+                _np.exp((a-1) * _np.log(x) + (b-1) * _np.log1p(-x) - lnorm))
+    def integ_var(x, a, b, lnorm, mean):
+        return ((-_np.log(-_np.log(x)) - mean)**2 *
+                _np.exp((a-1) * _np.log(x) + (b-1) * _np.log1p(-x) - lnorm))
+
+    for NU in range(1, N+1):
+        a, b = N - NU + 1, NU
+        lnorm = _betaln(a, b)
+        lo, mid, hi = _st.beta.ppf([1e-12, 0.5, 1 - 1e-12], a, b)
+        # calculation of ymean
+        ymean[NU-1], err = _integrate.quad(integ_ymean, lo, hi,
+                                           args=(a, b, lnorm),
+                                           points=[mid], limit=200)
+        # calculation of variance
+        var, err = _integrate.quad(integ_var, lo, hi,
+                                   args=(a, b, lnorm, ymean[NU-1]),
+                                   points=[mid], limit=200)
+        variance[NU-1] = _np.sqrt(var)
+
+    # calculation of weights
+    weight = (1 / variance**2) / _np.sum(1 / variance**2)
+
+    ymean.flags.writeable = False
+    weight.flags.writeable = False
+    return ymean, weight
+
+
+# Lieblein BLUE coefficients for samples below or equal to 16 elements.
+# Coefficients for bigger samples are derived from the n = 16 values (see
+# _lieblein_coeffs below).
+_lieblein_ai = {
+    'n = 02': [0.916373, 0.083627],
+    'n = 03': [0.656320, 0.255714, 0.087966],
+    'n = 04': [0.510998, 0.263943, 0.153680, 0.071380],
+    'n = 05': [0.418934, 0.246282, 0.167609, 0.108824,
+               0.058350],
+    'n = 06': [0.355450, 0.225488, 0.165620, 0.121054,
+               0.083522, 0.048867],
+    'n = 07': [0.309008, 0.206260, 0.158590, 0.123223,
+               0.093747, 0.067331, 0.041841],
+    'n = 08': [0.273535, 0.189428, 0.150200, 0.121174,
+               0.097142, 0.075904, 0.056132, 0.036485],
+    'n = 09': [0.245539, 0.174882, 0.141789, 0.117357,
+               0.097218, 0.079569, 0.063400, 0.047957,
+               0.032291],
+    'n = 10': [0.222867, 0.162308, 0.133845, 0.112868,
+               0.095636, 0.080618, 0.066988, 0.054193,
+               0.041748, 0.028929],
+    'n = 11': [0.204123, 0.151384, 0.126522, 0.108226,
+               0.093234, 0.080222, 0.068485, 0.057578,
+               0.047159, 0.036886, 0.026180],
+    'n = 12': [0.188361, 0.141833, 0.119838, 0.103673,
+               0.090455, 0.079018, 0.068747, 0.059266,
+               0.050303, 0.041628, 0.032984, 0.023894],
+    'n = 13': [0.174916, 0.133422, 0.113759, 0.099323,
+               0.087540, 0.077368, 0.068264, 0.059900,
+               0.052047, 0.044528, 0.037177, 0.029790,
+               0.021965],
+    'n = 14': [0.163309, 0.125966, 0.108230, 0.095223,
+               0.084619, 0.075484, 0.067331, 0.059866,
+               0.052891, 0.046260, 0.039847, 0.033526,
+               0.027131, 0.020317],
+    'n = 15': [0.153184, 0.119314, 0.103196, 0.091384,
+               0.081767, 0.073495, 0.066128, 0.059401,
+               0.053140, 0.047217, 0.041529, 0.035984,
+               0.030484, 0.024887, 0.018894],
+    'n = 16': [0.144271, 0.113346, 0.098600, 0.087801,
+               0.079021, 0.071476, 0.064771, 0.058660,
+               0.052989, 0.047646, 0.042539, 0.037597,
+               0.032748, 0.027911, 0.022969, 0.017653]
+}
+
+_lieblein_bi = {
+    'n = 02': [-0.721348, 0.721348],
+    'n = 03': [-0.630541, 0.255816, 0.374725],
+    'n = 04': [-0.558619, 0.085903, 0.223919, 0.248797],
+    'n = 05': [-0.503127, 0.006534, 0.130455, 0.181656,
+               0.184483],
+    'n = 06': [-0.459273, -0.035992, 0.073199, 0.126724,
+               0.149534, 0.145807],
+    'n = 07': [-0.423700, -0.060698, 0.036192, 0.087339,
+               0.114868, 0.125859, 0.120141],
+    'n = 08': [-0.394187, -0.075767, 0.011124, 0.058928,
+               0.087162, 0.102728, 0.108074, 0.101936],
+    'n = 09': [-0.369242, -0.085203, -0.006486, 0.037977,
+               0.065574, 0.082654, 0.091965, 0.094369,
+               0.088391],
+    'n = 10': [-0.347830, -0.091158, -0.019210, 0.022179,
+               0.048671, 0.066064, 0.077021, 0.082771,
+               0.083552, 0.077940],
+    'n = 11': [-0.329210, -0.094869, -0.028604, 0.010032,
+               0.035284, 0.052464, 0.064071, 0.071381,
+               0.074977, 0.074830, 0.069644],
+    'n = 12': [-0.312840, -0.097086, -0.035655, 0.000534,
+               0.024548, 0.041278, 0.053053, 0.061112,
+               0.066122, 0.068357, 0.067671, 0.062906],
+    'n = 13': [-0.298313, -0.098284, -0.041013, -0.006997,
+               0.015836, 0.032014, 0.043710, 0.052101,
+               0.057862, 0.061355, 0.062699, 0.061699,
+               0.057330],
+    'n = 14': [-0.285316, -0.098775, -0.045120, -0.013039,
+               0.008690, 0.024282, 0.035768, 0.044262,
+               0.050418, 0.054624, 0.057083, 0.057829,
+               0.056652, 0.052642],
+    'n = 15': [-0.273606, -0.098768, -0.048285, -0.017934,
+               0.002773, 0.017779, 0.028988, 0.037452,
+               0.043798, 0.048415, 0.051534, 0.053267,
+               0.053603, 0.052334, 0.048648],
+    'n = 16': [-0.262990, -0.098406, -0.050731, -0.021933,
+               -0.002167, 0.012270, 0.023168, 0.031528,
+               0.037939, 0.042787, 0.046308, 0.048646,
+               0.049860, 0.049912, 0.048602, 0.045207]
+}
+
+
+@_lru_cache(maxsize=None)
+def _lieblein_coeffs(N):
+    # Lieblein BLUE coefficients for a sample of size N sorted in increasing
+    # order. Location and scale are obtained as ``a @ data`` and
+    # ``b @ data``. Cached as they only depend on N.
+    if N < 2:
+        raise ValueError('Lieblein method needs at least 2 values.')
+    if N <= 16:
+        aip = _np.array(_lieblein_ai['n = {:02}'.format(N)])
+        bip = _np.array(_lieblein_bi['n = {:02}'.format(N)])
+    else:
+        # hyp is used to calculate values for samples higher than 16
+        # elements. Hypergeometric distribution function
+        def hyp(n,m,i,t):
+            bin1 = _fact(i)/(_fact(t) * _fact(i - t))
+            bin2 = _fact(n-i)/(_fact(m-t) * _fact((n-i) - (m-t)))
+            bin3 = _fact(n)/(_fact(m) * _fact(n - m))
+            return bin1 * bin2 / bin3
+
+        m = 16
+        aip = _np.zeros(N)
+        bip = _np.zeros(N)
+        for i in range(N):
+            for t in range(m):
+                try:
+                    h = ((t + 1) / (i + 1)) * hyp(N, m, i + 1, t + 1)
+                except ValueError:
+                    # negative factorial, the term doesn't contribute
+                    continue
+                aip[i] += _lieblein_ai['n = {:02}'.format(m)][t] * h
+                bip[i] += _lieblein_bi['n = {:02}'.format(m)][t] * h
+    aip.flags.writeable = False
+    bip.flags.writeable = False
+    return aip, bip
+
+
+def _gumbel_fit(data, method, ppp='Weibull'):
+    # Gumbel fit of ``data``, an array with shape (..., N) sorted in
+    # increasing order along the last axis and already preconditioned. All
+    # the leading axes (series, resamples,...) are fitted at once using the
+    # cached per-N coefficients. Returns the slope, offset and R2 arrays,
+    # R2 of the line fitted by the method on the Gumbel paper.
+    N = data.shape[-1]
+    if method == 'Harris1996':
+        ymean, weight = _harris1996_coeffs(N)
+        # coefficients are defined for data sorted in decreasing order
+        Y = ymean[::-1]
+        weight = weight[::-1]
+        sum1 = data @ (weight * Y)
+        sum2 = _np.sum(weight * Y)
+        sum3 = data @ weight
+        sum4 = (data ** 2) @ weight
+        alpha = (sum1 - sum2 * sum3) / (sum4 - sum3 ** 2)
+        slope = 1. / alpha
+        offset = sum3 - sum2 / alpha
+    elif method == 'Lieblein':
+        aip, bip = _lieblein_coeffs(N)
+        Y = _ppp_Y(N, 'Weibull')
+        slope = data @ bip
+        offset = data @ aip
+    elif method == 'PPPLiterature':
+        return _lsq_fit(_ppp_Y(N, ppp), data)
+    else:
+        raise ValueError("method should be one of 'Harris1996', "
+                         "'Lieblein' or 'PPPLiterature'.")
+    return slope, offset, _line_r2(Y, data, slope, offset)
+
+
+def batch_fit(data, method='Lieblein', ppp='Weibull', preconditioning=1,
+              return_periods=None):
+    """
+    Fit many series at once using one of the methods of this module.
+
+    Series with the same length are stacked and fitted together sharing the
+    coefficients calculated for that length. Errors are reported per series
+    in the output instead of aborting the whole run.
+
+    **Parameters**
+
+    data : 2D array_like or sequence of 1D array_like
+        Extreme values datasets. If it is a 2D array each row is a series.
+        A sequence of series with different lengths is also accepted.
+    method : str
+        'Harris1996', 'Lieblein' (default value) or 'PPPLiterature'.
+    ppp : str
+        Probability plotting position used if method is 'PPPLiterature'.
+        Default value is 'Weibull'. See ``PPPLiterature`` for the available
+        values.
+    preconditioning : int or float
+        Exponent applied to the extreme data values before performing the
+        Gumbel curve fit. Default value is 1.
+    return_periods : array_like (optional)
+        Return periods used to obtain the extreme values. Default values are
+        the return periods from 2 to 100 years.
+
+    **Returns**
+
+    results : numpy structured array
+        One row per series with fields 'N' (number of values), 'slope',
+        'offset', 'R2', 'return_values' and 'error'. 'error' is an empty
+        string if the fit was successful. Otherwise, it contains the reason
+        of the failure and the numeric fields are ``nan``.
+    """
+    if return_periods is None:
+        return_periods = _default_return_periods
+    return_periods = _np.atleast_1d(return_periods)
+    if method == 'PPPLiterature' and ppp not in _ppp_coeffs:
+        raise ValueError('Unknown probability plotting position: {}'.format(ppp))
+
+    if isinstance(data, _np.ndarray) and data.ndim == 2:
+        series = _np.asarray(data, dtype=float)
+    else:
+        series = [_np.asarray(d, dtype=float).ravel() for d in data]
+    groups = OrderedDict()
+    for i, s in enumerate(series):
+        groups.setdefault(len(s), []).append(i)
+
+    results = _np.zeros(len(series),
+                        dtype=[('N', int),
+                               ('slope', float),
+                               ('offset', float),
+                               ('R2', float),
+                               ('return_values', float,
+                                (len(return_periods),)),
+                               ('error', 'U80')])
+    for field in ('slope', 'offset', 'R2', 'return_values'):
+        results[field] = _np.nan
+
+    for N, idx in groups.items():
+        idx = _np.array(idx)
+        results['N'][idx] = N
+        block = _np.sort([series[i] for i in idx], axis=1)
+        with _np.errstate(divide='ignore', invalid='ignore'):
+            block = block ** preconditioning
+            try:
+                slope, offset, R2 = _gumbel_fit(block, method, ppp)
+            except Exception as e:
+                results['error'][idx] = str(e) or type(e).__name__
+                continue
+            values = _return_values(slope, offset, return_periods,
+                                    preconditioning)
+        ok = _np.isfinite(slope) & _np.isfinite(offset)
+        results['error'][idx[~ok]] = 'Non finite fit, check the input data.'
+        results['slope'][idx[ok]] = slope[ok]
+        results['offset'][idx[ok]] = offset[ok]
+        results['R2'][idx[ok]] = R2[ok]
+        results['return_values'][idx[ok]] = values[ok]
+    return results
+
 docstringbase = """
     Calculate extreme values based on yearly maxima using {0} plotting
     positions and a least square fit.
@@ -68,11 +458,29 @@ docstringbase = """
         performing the Gumbel curve fit. Preconditioning can often improve the
         convergence of the curve fit and therefore improve the estimate T-year
         extreme wind speed. Default value is 1.
+    return_periods : array_like (optional)
+        1D array_like of values for the *return period*. Default values are
+        the return periods from 2 to 100 years.
+    ci : float (optional)
+        Float indicating the value to be used for the calculation of the
+        confidence interval using nonparametric bootstrap. The returned
+        values are (ci/2, 1-ci/2) percentile confidence intervals. E.g., a
+        value of 0.05 will return confidence intervals at 0.025 and 0.975
+        percentiles. Default value is 0 (no confidence intervals).
+    n_samples : int (optional)
+        Number of bootstrap resamples used if ``ci`` is provided. Default
+        value is 1000.
+    random_state : int or ``numpy.random.Generator`` (optional)
+        Seed or generator used to draw the bootstrap resamples.
 
     **Attributes**
 
     results : dict
         A dictionary containing different parameters of the fit.
+    return_periods : numpy.array
+        Return periods used.
+    return_values : numpy.array
+        Extreme values for ``return_periods``.
     c : float
         Value of the 'shape' parameter. In the case of the Gumbel distribution
         this value is always 0.
@@ -80,10 +488,14 @@ docstringbase = """
         Value of the 'localization' parameter.
     scale : float
         Value os the 'scale' parameter.
-    distr : frozen ``scipy.stats.gumbel_r`` distribution
-        Frozen distribution of type ``scipy.stats.gumbel_r`` with ``c``,
+    distr : frozen Gumbel distribution
+        ``skextremes.models.distributions.GumbelDistribution`` (same
+        methods as a frozen ``scipy.stats.gumbel_r``) with ``c``,
         ``loc`` and ``scale`` parameters equal to ``self.c``, ``self.loc``
         and ``self.scale``, respectively.
+    params_ci : OrderedDict
+        Confidence intervals of the *shape*, *location* and *scale*
+        parameters. Only available if ``ci`` is provided.
 
     **Methods**
 
@@ -91,6 +503,14 @@ docstringbase = """
 
         {1}
 
+    Method to obtain extreme values for any return period:
+
+        self.return_level(T)
+
+    Method to choose the preconditioning exponent:
+
+        self.search_preconditioning()
+
     Methods to plot results:
 
         self.plot_summary()
@@ -99,14 +519,138 @@ docstringbase = """
 class _GumbelBase:
     def __init__(self, preconditioning=1,
                  ev_unit='', block_unit=' (Yrs)',
-                 ppp=None, **kwargs):
+                 ppp=None, return_periods=None,
+                 ci=0, n_samples=1000, random_state=None, **kwargs):
         super().__init__(**kwargs)
         self.preconditioning = preconditioning
         self.ev_unit = ev_unit
-        self.bloc_unit = block_unit
+        self.block_unit = block_unit
         self.ppp = None
         self.results = {}
+        if return_periods is None:
+            self.return_periods = _default_return_periods
+        else:
+            self.return_periods = _np.atleast_1d(
+                _np.asarray(return_periods, dtype=float))
+        self.return_values = _np.array([])
+
+        # Check for the estimation of confidence intervals
+        if ci == 0 or 0 < ci < 1:
+            self.ci = ci
+        else:
+            raise ValueError("ci should be a value in the interval 0 < ci < 1")
+        self.n_samples = n_samples
+        self.random_state = random_state
+
+    def return_level(self, T):
+        """
+        Extreme values for the return periods ``T`` obtained from the slope
+        and offset of the fit.
+
+        **Parameters**
 
+        T : float or array_like
+            Return periods.
+
+        **Returns**
+
+        values : float or numpy.array
+            Extreme values with the same shape as ``T``.
+        """
+        values = _return_values(self.results['slope'],
+                                self.results['offset'],
+                                T, self.preconditioning)
+        if _np.ndim(T) == 0:
+            return float(values.reshape(-1)[0])
+        return values.reshape(_np.shape(T))
+
+    def _set_return_values(self):
+        # Extreme values for self.return_periods once the fit is available.
+        self.return_values = self.return_level(self.return_periods)
+        if self.return_periods is _default_return_periods:
+            # kept for backwards compatibility
+            self.results['Values for return period from 2 to 100 years'] = (
+                self.return_values)
+
+    def search_preconditioning(self, exponents=None, criterion='R2'):
+        """
+        Search the preconditioning exponent giving the best Gumbel fit.
+
+        All the candidate exponents are evaluated at once, fitting the
+        (n_exponents, N) matrix of preconditioned sorted data with the same
+        method used by the model and the cached coefficients for N. The model
+        is not refitted, create a new one using ``preconditioning=best`` to
+        use the exponent found.
+
+        **Parameters**
+
+        exponents : array_like (optional)
+            Positive candidate exponents. Default values are 0.5 to 4 with a
+            step of 0.05.
+        criterion : str
+            Goodness of fit to maximise. 'R2' (default value) uses the
+            coefficient of determination of the fit on the Gumbel paper.
+            'likelihood' uses the log-likelihood of the (not preconditioned)
+            data including the jacobian of the transformation, so it can be
+            compared across exponents. 'likelihood' needs positive data.
+
+        **Returns**
+
+        best : float
+            Exponent with the best goodness of fit.
+        scores : numpy.array
+            Goodness of fit for each exponent in ``exponents``.
+        """
+        if exponents is None:
+            exponents = _np.linspace(0.5, 4, 71)
+        exponents = _np.atleast_1d(_np.asarray(exponents, dtype=float))
+        if _np.any(exponents <= 0):
+            raise ValueError('exponents should be positive values.')
+        if criterion not in ('R2', 'likelihood'):
+            raise ValueError("criterion should be 'R2' or 'likelihood'.")
+        data = _np.sort(_np.asarray(self.data, dtype=float))
+
+        with _np.errstate(divide='ignore', invalid='ignore'):
+            samples = data ** exponents[:, None]
+            slope, offset, R2 = _gumbel_fit(samples, self._method, self.ppp)
+            if criterion == 'R2':
+                scores = R2
+            else:
+                z = (samples - offset[:, None]) / slope[:, None]
+                # Gumbel log-density of data ** p plus log|d(data ** p)/d data|
+                scores = _np.sum(-_np.log(slope[:, None]) - z - _np.exp(-z) +
+                                 _np.log(exponents[:, None]) +
+                                 (exponents[:, None] - 1) * _np.log(data),
+                                 axis=1)
+        scores = _np.where(_np.isfinite(scores), scores, -_np.inf)
+        return exponents[_np.argmax(scores)], scores
+
+    def _ci_bootstrap(self):
+        # Calculate confidence intervals using nonparametric bootstrap and the
+        # percentile interval method.
+        # For resampling with replacement the sample size is fixed so the
+        # coefficients of the method (Harris weights, Lieblein BLUE
+        # coefficients or plotting positions) are obtained only once from the
+        # per-N caches and all the resamples, a (n_samples, N) matrix, are
+        # fitted at once.
+        rng = _np.random.default_rng(self.random_state)
+        data = _np.asarray(self.data, dtype=float)
+        indexes = rng.integers(self.N, size=(self.n_samples, self.N))
+        samples = _np.sort(data[indexes], axis=1) ** self.preconditioning
+        with _np.errstate(divide='ignore', invalid='ignore'):
+            slope, offset, _ = _gumbel_fit(samples, self._method, self.ppp)
+            values = _return_values(slope, offset, self.return_periods,
+                                    self.preconditioning)
+        percentiles = [100 * self.ci / 2, 100 * (1 - self.ci / 2)]
+
+        self._ci_Td, self._ci_Tu = _np.nanpercentile(values, percentiles,
+                                                     axis=0)
+        self.params_ci = OrderedDict()
+        self.params_ci['shape'] = (0, 0)
+        self.params_ci['location'] = tuple(_np.nanpercentile(offset,
+                                                             percentiles))
+        self.params_ci['scale'] = tuple(_np.nanpercentile(slope,
+                                                          percentiles))
 
     def plot_summary(self):
         """
@@ -117,7 +661,6 @@ class _GumbelBase:
         """
         # data to be used
         x = self.results['data']
-        extremes = self.results['Values for return period from 2 to 100 years']
         Y = self.results['Y']
         slope = self.results['slope']
         offset = self.results['offset']
@@ -140,7 +683,14 @@ class _GumbelBase:
         ax1.set_xlabel('Extreme Values  '+self.ev_unit)
 
         # plot the return period
-        ax2.plot(_np.arange(2, 101), extremes)
+        ax2.plot(self.return_periods, self.return_values)
+        if self.ci:
+            ax2.plot(self.return_periods, self._ci_Td, '--',
+                     color='0.25', alpha=0.6)
+            ax2.plot(self.return_periods, self._ci_Tu, '--',
+                     color='0.25', alpha=0.6)
+            ax2.fill_between(self.return_periods, self._ci_Td, self._ci_Tu,
+                             color=(0.7, 0.7, 1), alpha=0.25)
         ax2.set_xlabel('T '+self.block_unit)
         ax2.set_ylabel('Extreme Values '+self.ev_unit)
 
@@ -160,15 +710,19 @@ class Harris1996(_GumbelBase):
 
     __doc__ = docstringbase.format('Harris1996', '_ppp_harris1996')
 
+    _method = 'Harris1996'
+
     def __init__(self, data=None, ppp="Harris1996", **kwargs):
         super().__init__(**kwargs)
+        self.data = data
         try:
-            self.data = data
             self.N = len(self.data)
-            self.ppp = ppp
-            self._ppp_harris1996()
-        except:
-            raise Exception('You should provide some data.')
+        except TypeError:
+            raise ValueError('You should provide some data.')
+        self.ppp = ppp
+        self._ppp_harris1996()
+        if self.ci:
+            self._ci_bootstrap()
 
 
     #ppp stands for probability plotting position
@@ -196,31 +750,7 @@ class Harris1996(_GumbelBase):
         data = data ** self.preconditioning
         N = self.N
 
-        ymean = _np.empty(N)
-        ymean2 = _np.empty(N)
-        variance = _np.empty(N)
-        weight = _np.empty(N)
-
-        def integ_ymean(x, N, NU):
-            return -_np.log(-_np.log(x)) * (x** (N-NU)) * ((1-x)**(NU-1))
-        def integ_ymean2(x, N, NU):
-            return ((-_np.log(-_np.log(x)))**2) * (x** (N-NU)) * ((1-x)**(NU-1))
-
-        for NU in range(1, N+1):
-            # calculation of ymean
-            a = _fact(N)/(_fact(NU - 1) * _fact(N - NU))
-            b, err = _integrate.quad(integ_ymean, 0, 1, args = (N, NU))
-            ymean[NU-1] = a * b
-            # calculation of ymean2
-            b, err = _integrate.quad(integ_ymean2, 0, 1, args = (N, NU))
-            ymean2[NU-1] = a * b
-            # calculation of variance
-            variance[NU-1] = _np.sqrt((ymean2[NU-1] - ymean[NU-1]**2))
-
-        # calculation of weights
-        denominator = _np.sum(1/variance**2)
-        for NU in range(1, N+1):
-            weight[NU-1] = (1 / variance[NU-1]**2) / denominator
+        ymean, weight = _harris1996_coeffs(N)
 
         # calculation of alpha
         # Numerator
@@ -236,12 +766,6 @@ class Harris1996(_GumbelBase):
         # calculation of characteristic product
         pi_upper = alpha * sum3 - sum2
 
-        # calculation of the extreme values for the return periods between 2 and 100 years
-        return_periods = _np.arange(2, 100 + 1)
-        v_ext_tmp = [(-_np.log(-_np.log(1 - 1 / return_period)) + pi_upper) / alpha
-                     for return_period in return_periods]
-        v_ext = [v ** (1 / self.preconditioning) for v in v_ext_tmp]
-
         # Calculation of the residual std dev
         deviation = _np.sum(weight * ((ymean - alpha * data + pi_upper)**2))
         residual_stddev = _np.sqrt(deviation * N / (N - 2))
@@ -251,7 +775,6 @@ class Harris1996(_GumbelBase):
         self.results['Y'] = ymean
         self.results['weights'] = weight
         self.results['data'] = data
-        self.results['Values for return period from 2 to 100 years'] = v_ext
         self.results['slope'] = 1. / alpha
         self.results['offset'] = pi_upper / alpha
         self.results['characteristic product'] = pi_upper
@@ -260,23 +783,27 @@ class Harris1996(_GumbelBase):
         self.c     = 0
         self.loc   = self.results['offset']
         self.scale = self.results['slope']
-        self.distr = _st.gumbel_r(loc = self.loc,
-                                   scale = self.scale)
+        self.distr = _GumbelDistribution(loc=self.loc, scale=self.scale)
+        self._set_return_values()
 
 
 class Lieblein(_GumbelBase):
 
     __doc__ = docstringbase.format('Lieblein', '_ppp_lieblein')
 
+    _method = 'Lieblein'
+
     def __init__(self, data=None, ppp="Lieblein", **kwargs):
         super().__init__(**kwargs)
+        self.data = data
         try:
-            self.data = data
             self.N = len(self.data)
-            self.ppp = ppp
-            self._ppp_lieblein()  # fit ppp.
-        except:
-            raise Exception('You should provide some data.')
+        except TypeError:
+            raise ValueError('You should provide some data.')
+        self.ppp = ppp
+        self._ppp_lieblein()  # fit ppp.
+        if self.ci:
+            self._ci_bootstrap()
 
     #ppp stands for probability plotting position
     def _ppp_lieblein(self):
@@ -298,150 +825,26 @@ class Lieblein(_GumbelBase):
             Lieblein J, (1974), 'Efficient methods of Extreme-Value Methodology',
             NBSIR 74-602, National Bureau of Standards, U.S. Department of Commerce.
         """
-        # coefficients for sample below or equal to 16 elements
-        ai = {
-            'n = 02': [0.916373, 0.083627],
-            'n = 03': [0.656320, 0.255714, 0.087966],
-            'n = 04': [0.510998, 0.263943, 0.153680, 0.071380],
-            'n = 05': [0.418934, 0.246282, 0.167609, 0.108824,
-                       0.058350],
-            'n = 06': [0.355450, 0.225488, 0.165620, 0.121054,
-                       0.083522, 0.048867],
-            'n = 07': [0.309008, 0.206260, 0.158590, 0.123223,
-                       0.093747, 0.067331, 0.041841],
-            'n = 08': [0.273535, 0.189428, 0.150200, 0.121174,
-                       0.097142, 0.075904, 0.056132, 0.036485],
-            'n = 09': [0.245539, 0.174882, 0.141789, 0.117357,
-                       0.097218, 0.079569, 0.063400, 0.047957,
-                       0.032291],
-            'n = 10': [0.222867, 0.162308, 0.133845, 0.112868,
-                       0.095636, 0.080618, 0.066988, 0.054193,
-                       0.041748, 0.028929],
-            'n = 11': [0.204123, 0.151384, 0.126522, 0.108226,
-                       0.093234, 0.080222, 0.068485, 0.057578,
-                       0.047159, 0.036886, 0.026180],
-            'n = 12': [0.188361, 0.141833, 0.119838, 0.103673,
-                       0.090455, 0.079018, 0.068747, 0.059266,
-                       0.050303, 0.041628, 0.032984, 0.023894],
-            'n = 13': [0.174916, 0.133422, 0.113759, 0.099323,
-                       0.087540, 0.077368, 0.068264, 0.059900,
-                       0.052047, 0.044528, 0.037177, 0.029790,
-                       0.021965],
-            'n = 14': [0.163309, 0.125966, 0.108230, 0.095223,
-                       0.084619, 0.075484, 0.067331, 0.059866,
-                       0.052891, 0.046260, 0.039847, 0.033526,
-                       0.027131, 0.020317],
-            'n = 15': [0.153184, 0.119314, 0.103196, 0.091384,
-                       0.081767, 0.073495, 0.066128, 0.059401,
-                       0.053140, 0.047217, 0.041529, 0.035984,
-                       0.030484, 0.024887, 0.018894],
-            'n = 16': [0.144271, 0.113346, 0.098600, 0.087801,
-                       0.079021, 0.071476, 0.064771, 0.058660,
-                       0.052989, 0.047646, 0.042539, 0.037597,
-                       0.032748, 0.027911, 0.022969, 0.017653]
-        }
-
-        bi = {
-            'n = 02': [-0.721348, 0.721348],
-            'n = 03': [-0.630541, 0.255816, 0.374725],
-            'n = 04': [-0.558619, 0.085903, 0.223919, 0.248797],
-            'n = 05': [-0.503127, 0.006534, 0.130455, 0.181656,
-                       0.184483],
-            'n = 06': [-0.459273, -0.035992, 0.073199, 0.126724,
-                       0.149534, 0.145807],
-            'n = 07': [-0.423700, -0.060698, 0.036192, 0.087339,
-                       0.114868, 0.125859, 0.120141],
-            'n = 08': [-0.394187, -0.075767, 0.011124, 0.058928,
-                       0.087162, 0.102728, 0.108074, 0.101936],
-            'n = 09': [-0.369242, -0.085203, -0.006486, 0.037977,
-                       0.065574, 0.082654, 0.091965, 0.094369,
-                       0.088391],
-            'n = 10': [-0.347830, -0.091158, -0.019210, 0.022179,
-                       0.048671, 0.066064, 0.077021, 0.082771,
-                       0.083552, 0.077940],
-            'n = 11': [-0.329210, -0.094869, -0.028604, 0.010032,
-                       0.035284, 0.052464, 0.064071, 0.071381,
-                       0.074977, 0.074830, 0.069644],
-            'n = 12': [-0.312840, -0.097086, -0.035655, 0.000534,
-                       0.024548, 0.041278, 0.053053, 0.061112,
-                       0.066122, 0.068357, 0.067671, 0.062906],
-            'n = 13': [-0.298313, -0.098284, -0.041013, -0.006997,
-                       0.015836, 0.032014, 0.043710, 0.052101,
-                       0.057862, 0.061355, 0.062699, 0.061699,
-                       0.057330],
-            'n = 14': [-0.285316, -0.098775, -0.045120, -0.013039,
-                       0.008690, 0.024282, 0.035768, 0.044262,
-                       0.050418, 0.054624, 0.057083, 0.057829,
-                       0.056652, 0.052642],
-            'n = 15': [-0.273606, -0.098768, -0.048285, -0.017934,
-                       0.002773, 0.017779, 0.028988, 0.037452,
-                       0.043798, 0.048415, 0.051534, 0.053267,
-                       0.053603, 0.052334, 0.048648],
-            'n = 16': [-0.262990, -0.098406, -0.050731, -0.021933,
-                       -0.002167, 0.012270, 0.023168, 0.031528,
-                       0.037939, 0.042787, 0.046308, 0.048646,
-                       0.049860, 0.049912, 0.048602, 0.045207]
-        }
         data = _np.sort(self.data)
         data = data ** self.preconditioning
         N = self.N
 
-        # hyp and coeffs are used to calculate values for samples higher than 16 elements
-        # Hypergeometric distribution function
-        def hyp(n,m,i,t):
-            bin1 = _fact(i)/(_fact(t) * _fact(i - t))
-            bin2 = _fact(n-i)/(_fact(m-t) * _fact((n-i) - (m-t)))
-            bin3 = _fact(n)/(_fact(m) * _fact(n - m))
-            return bin1 * bin2 / bin3
-
-        # Coefficients
-        def coeffs(n, m):
-            aip = []
-            bip = []
-            for i in range(n):
-                a = 0
-                b = 0
-                for t in range(m):
-                    try:
-                        a += (ai['n = {:02}'.format(m)][t] * ((t + 1) / (i + 1))
-                              * hyp(n, m, i + 1, t + 1))
-                        b += (bi['n = {:02}'.format(m)][t] * ((t + 1) / (i + 1))
-                              * hyp(n, m, i + 1, t + 1))
-                    except:
-                        pass
-                aip.append(a)
-                bip.append(b)
-            return aip, bip
-
-        def distr_params():
-            if N <= 16:
-                mu = _np.sum(_np.array(ai['n = {:02}'.format(N)]) * data)
-                #parameter u in the paper
-                sigma = _np.sum(_np.array(bi['n = {:02}'.format(N)]) * data)
-                #parameter b in the paper
-            else:
-                aip, bip = coeffs(N, 16)
-                mu = _np.sum(_np.array(aip) * data)
-                sigma = _np.sum(_np.array(bip) * data)
-            return mu, sigma
-
-        mu, sigma = distr_params()
-        return_period = _np.arange(2, 100 + 1)
+        aip, bip = _lieblein_coeffs(N)
+        mu = _np.sum(aip * data)  # parameter u in the paper
+        sigma = _np.sum(bip * data)  # parameter b in the paper
         P = ((_np.arange(N) + 1)) / (N + 1)
         Y = -_np.log(-_np.log(P))
-        vref = (- sigma * _np.log(-_np.log(1 - 1 / return_period)) + mu)**(1 / self.preconditioning)
 
         self.results = {}
         self.results['Y'] = Y
         self.results['data'] = data
-        self.results['Values for return period from 2 to 100 years'] = vref
         self.results['slope'] = sigma
         self.results['offset'] = mu
         self.c     = 0
         self.loc   = self.results['offset']
         self.scale = self.results['slope']
-        self.distr = _st.gumbel_r(loc = self.loc,
-                                   scale = self.scale)
+        self.distr = _GumbelDistribution(loc=self.loc, scale=self.scale)
+        self._set_return_values()
 
 
 class PPPLiterature(_GumbelBase):
@@ -467,97 +870,99 @@ class PPPLiterature(_GumbelBase):
 
         _ppp_tukey
 
-        _ppp_weibull""")
+        _ppp_weibull
+
+    Method to compare all the plotting positions above:
+
+        _ppp_all""")
+
+    _method = 'PPPLiterature'
 
     def __init__(self, data=None, ppp="Weibull", **kwargs):
         super().__init__(**kwargs)
+        self.data = data
         try:
-            self.data = data
             self.N = len(self.data)
-            self.ppp = ppp
-            self._calculate_values(how=self.ppp)
-        except:
-            raise Exception('You should provide some data.')
+        except TypeError:
+            raise ValueError('You should provide some data.')
+        self._calculate_values(how=ppp)
+        if self.ci:
+            self._ci_bootstrap()
 
     #ppp stands for probability plotting position
     def _calculate_values(self, how = None):
+        if how not in _ppp_coeffs:
+            raise ValueError(
+                'Unknown probability plotting position: {}'.format(how))
+        self.ppp = how
         data = _np.sort(self.data)
         data = data ** self.preconditioning
         N = self.N
 
-        if how == 'Adamowski':
-            # see De, M., 2000. A new unbiased plotting position formula for gumbel distribution.
-            #     Stochastic Envir. Res. Risk Asses., 14: 1-7.
-            P = ((_np.arange(N) + 1) - 0.25) / (N + 0.5)
-        if how == 'Beard':
-            # see De, M., 2000. A new unbiased plotting position formula for gumbel distribution.
-            #     Stochastic Envir. Res. Risk Asses., 14: 1-7.
-            P = ((_np.arange(N) + 1) - 0.31) / (N + 0.38)
-        if how == 'Blom':
-            # see Adeboye, O.B. and M.O. Alatise, 2007. Performance of probability distributions and plotting
-            #      positions in estimating the flood of River Osun at Apoje Sub-basin, Nigeria. Agric. Eng. Int.: CIGR J., Vol. 9.
-            P = ((_np.arange(N) + 1) - 0.375) / (N + 0.25)
-        if how == 'Chegodayev':
-            # see De, M., 2000. A new unbiased plotting position formula for gumbel distribution.
-            #     Stochastic Envir. Res. Risk Asses., 14: 1-7.
-            P = ((_np.arange(N) + 1) - 0.3) / (N + 0.4)
-        if how == 'Cunnane':
-            # see Cunnane, C., 1978. Unbiased plotting positions: A review. J. Hydrol., 37: 205-222.
-            P = ((_np.arange(N) + 1) - 0.4) / (N + 0.2)
-        if how == 'Gringorten':
-            # see Adeboye, O.B. and M.O. Alatise, 2007. Performance of probability distributions and plotting
-            #     positions in estimating the flood of River Osun at Apoje Sub-basin, Nigeria. Agric. Eng. Int.: CIGR J., Vol. 9.
-            P = ((_np.arange(N) + 1) - 0.44) / (N + 0.12)
-        if how == 'Hazen':
-            # see Adeboye, O.B. and M.O. Alatise, 2007. Performance of probability distributions and plotting
-            #     positions in estimating the flood of River Osun at Apoje Sub-basin, Nigeria. Agric. Eng. Int.: CIGR J., Vol. 9.
-            P = ((_np.arange(N) + 1) - 0.5) / (N)
-        if how == 'Hirsch':
-            # see Jay, R.L., O. Kalman and M. Jenkins, 1998. Integrated planning and management for Urban water
-            #     supplies considering multi uncertainties. Technical Report,
-            #     Department of Civil and Environmental Engineering, Universities of California.
-            P = ((_np.arange(N) + 1) + 0.5) / (N + 1)
-        if how == 'IEC56':
-            # see Forthegill, J.C., 1990. Estimating the cumulative probability of failure data points to be
-            #     plotted on weibull and other probability paper. Electr. Insulation Transact., 25: 489-492.
-            P = ((_np.arange(N) + 1) - 0.5) / (N + 0.25)
-        if how == 'Landwehr':
-            # see Makkonen, L., 2008. Problem in the extreme value analysis. Structural Safety, 30: 405-419.
-            P = ((_np.arange(N) + 1) - 0.35) / (N)
-        if how == 'Laplace':
-            # see Jay, R.L., O. Kalman and M. Jenkins, 1998. Integrated planning and management for Urban
-            #     water supplies considering multi uncertainties. Technical Report,
-            #     Department of Civil and Environmental Engineering, Universities of California.
-            P = ((_np.arange(N) + 1) + 1) / (N + 2)
-        if how == 'McClung and Mears':
-            # see Makkonen, L., 2008. Problem in the extreme value analysis. Structural Safety, 30: 405-419.
-            P = ((_np.arange(N) + 1) - 0.4) / (N)
-        if how == 'Tukey':
-            # see Makkonen, L., 2008. Problem in the extreme value analysis. Structural Safety, 30: 405-419.
-            P = ((_np.arange(N) + 1) - 1/3) / (N + 1/3)
-        if how == 'Weibull':
-            # see Hynman, R.J. and Y. Fan, 1996. Sample quantiles in statistical packages. Am. Stat., 50: 361-365.
-            P = ((_np.arange(N) + 1)) / (N + 1)
+        P = _ppp_positions(N, how)
 
         Y = -_np.log(-_np.log(P))
-        slope, offset = _np.polyfit(Y, data, 1)
-        R2 = _np.corrcoef(Y, data)[0, 1]**2
-        #fit = slope * Y + offset
-        return_period = _np.arange(2,101)
-        vref = (- slope * _np.log(-_np.log(1 - 1 / return_period)) + offset)**(1 / self.preconditioning)
+        slope, offset, R2 = _lsq_fit(Y, data)
 
         self.results = {}
         self.results['data'] = data
         self.results['Y'] = Y
-        self.results['Values for return period from 2 to 100 years'] = vref
         self.results['R2'] = R2
         self.results['slope'] = slope
         self.results['offset'] = offset
         self.c     = 0
         self.loc   = self.results['offset']
         self.scale = self.results['slope']
-        self.distr = _st.gumbel_r(loc=self.loc,
-                                  scale=self.scale)
+        self.distr = _GumbelDistribution(loc=self.loc, scale=self.scale)
+        self._set_return_values()
+
+    def _ppp_all(self, return_periods=None):
+        """
+        Compare all the probability plotting positions available in a single
+        pass.
+
+        The plotting positions of all the methods are stacked in a
+        (n_methods, N) matrix and all the least square fits are solved at
+        once. ``self.results`` is not modified.
+
+        **Parameters**
+
+        return_periods : array_like (optional)
+            Return periods used to obtain the extreme values. Default values
+            are ``self.return_periods``.
+
+        **Returns**
+
+        table : numpy structured array
+            One row per method with fields 'method', 'slope', 'offset', 'R2'
+            and 'return_values', ranked from the best to the worst fit
+            according to the R2 value.
+        """
+        if return_periods is None:
+            return_periods = self.return_periods
+        return_periods = _np.atleast_1d(return_periods)
+        data = _np.sort(self.data)
+        data = data ** self.preconditioning
+        methods = list(_ppp_coeffs)
+
+        Y = -_np.log(-_np.log(_ppp_positions(self.N, methods)))
+        slope, offset, R2 = _lsq_fit(Y, data)
+        vref = _return_values(slope, offset, return_periods,
+                              self.preconditioning)
+
+        table = _np.empty(len(methods),
+                          dtype=[('method', 'U{}'.format(max(map(len, methods)))),
+                                 ('slope', float),
+                                 ('offset', float),
+                                 ('R2', float),
+                                 ('return_values', float,
+                                  (len(return_periods),))])
+        table['method'] = methods
+        table['slope'] = slope
+        table['offset'] = offset
+        table['R2'] = R2
+        table['return_values'] = vref
+        return table[_np.argsort(-R2, kind='stable')]
 
     def _ppp_adamowski(self):
         """
@@ -0,0 +1,468 @@
+"""
+Module containing non-stationary block maxima models
+
+GEV and Gumbel models whose parameters depend linearly on covariates (e.g.,
+the year to model trends or a climate index like ENSO)::
+
+    location(t) = b0 + b1 * x1(t) + b2 * x2(t) + ...
+    log(scale(t)) = a0 + a1 * x1(t) + ...
+    shape(t) = c0 (+ c1 * x1(t) + ...)
+
+The coefficients are estimated by maximum likelihood (Newton iterations
+with the analytic gradient of the log-likelihood) starting from the
+stationary fit. Many series (e.g., stations) with the same model are
+fitted at once passing a 2D array of data, all the operations are
+vectorized over the series::
+
+    model = GEV(annual_maxima, covariates=years)  # (n_stations, n_years)
+    model.coef['location'][:, 1]  # trend of the location of every station
+    model.return_level(100, covariates=[[2000], [2050]])  # (n_stations, 2)
+
+Return levels depend on the covariates (*effective return levels*) and
+are calculated for every value of the covariates, with confidence
+intervals obtained using the delta method.
+"""
+
+from collections import OrderedDict
+
+import numpy as _np
+from scipy import stats as _st
+
+from ..utils import gev_lmomfit as _gev_lmomfit
+from ..utils import gum_lmomfit as _gum_lmomfit
+from ..utils import _hessian
+from ..utils import _newton
+from .distributions import GEVDistribution as _GEVDistribution
+from .distributions import _gev_isf
+from .distributions import _gev_nll
+
+
+def _columns(value, n_covariates):
+    # Columns of the covariates used by a parameter.
+    if value is True:
+        return list(range(n_covariates))
+    if value is False or value is None:
+        return []
+    columns = [int(i) for i in _np.atleast_1d(value)]
+    if any(not 0 <= i < n_covariates for i in columns):
+        raise ValueError('covariate columns should be lower than {}.'.format(
+            n_covariates))
+    return columns
+
+
+def _design(covariates, columns):
+    # Design matrix (1 or n_series, n, 1 + len(columns)), first column is
+    # the intercept.
+    ones = _np.ones(covariates.shape[:-1] + (1,))
+    return _np.concatenate([ones, covariates[..., columns]], axis=-1)
+
+
+def _linear(design, coef):
+    # design (1 or m, n, k) and coef (m, k) -> (m, n)
+    return (design @ coef[:, :, None])[..., 0]
+
+
+def _project(design, values):
+    # values (m, n) and design (1 or m, n, k) -> (m, k)
+    return (values[:, None, :] @ design)[:, 0]
+
+
+def _take(design, index):
+    # Designs shared by all the series have only one row.
+    if design is None or len(design) == 1:
+        return design
+    return design[index]
+
+
+def _nll(theta, x, mask, designs, grad=False):
+    # Negative log-likelihood (and its gradient) of the non-stationary GEV
+    # for every series. theta (m, k) are the coefficients of the location,
+    # the logarithm of the scale and the shape (scipy sign convention, no
+    # coefficients if the design of the shape is None for Gumbel models).
+    # Missing values (mask False) don't contribute. Series with values out
+    # of the support have an infinite value and nan gradient.
+    d_loc, d_scale, d_shape = designs
+    k_loc = d_loc.shape[-1]
+    k_scale = d_scale.shape[-1]
+    loc = _linear(d_loc, theta[:, :k_loc])
+    scale = _np.exp(_linear(d_scale, theta[:, k_loc:k_loc + k_scale]))
+    c = 0
+    if d_shape is not None:
+        c = _linear(d_shape, theta[:, k_loc + k_scale:])
+    out = _gev_nll(x, c, loc, scale, mask, grad)
+    if not grad:
+        return out
+    # derivatives with respect to the coefficients
+    nll, (d_c, d_loc_, d_scale_) = out
+    grads = [_project(d_loc, d_loc_), _project(d_scale, d_scale_ * scale)]
+    if d_shape is not None:
+        grads.append(_project(d_shape, d_c))
+    return nll, _np.concatenate(grads, axis=1)
+
+
+def _inv(hess):
+    # Inverse of every matrix, nan if singular or not finite.
+    out = _np.full(hess.shape, _np.nan)
+    ok = _np.isfinite(hess).all(axis=(1, 2))
+    try:
+        out[ok] = _np.linalg.inv(hess[ok])
+    except _np.linalg.LinAlgError:
+        for i in _np.flatnonzero(ok):
+            try:
+                out[i] = _np.linalg.inv(hess[i])
+            except _np.linalg.LinAlgError:
+                pass
+    return out
+
+
+class GEV:
+    """
+    Class to fit data to a non-stationary Generalised extreme value (GEV)
+    distribution with parameters depending linearly on covariates.
+
+    **Parameters**
+
+    data : array_like
+        1D array_like with the extreme values of a series or 2D array_like
+        (n_series, n) with one series per row, fitted independently with
+        the same model. Missing values (``numpy.nan``) are ignored.
+    covariates : array_like (optional)
+        Covariates of each value: 1D array_like (n,) with one covariate,
+        2D array_like (n, n_covariates) shared by all the series or 3D
+        array_like (n_series, n, n_covariates). If it is not provided the
+        model is stationary.
+    loc_covariates : bool or sequence of ints
+        Covariates (True for all, or the columns of ``covariates``) used
+        by the location. Default value is True.
+    scale_covariates : bool or sequence of ints
+        Covariates used by the logarithm of the scale. Default value is
+        True.
+    shape_covariates : bool or sequence of ints
+        Covariates used by the shape. Default value is False (constant
+        shape).
+    frec : int or float
+        Value indicating the frecuency of events per year. If frec is
+        not provided the data will be treated as yearly data (1 value per
+        year).
+    ci : float (optional)
+        Float indicating the value to be used for the calculation of the
+        confidence intervals of the coefficients (delta method). E.g., a
+        value of 0.05 will return confidence intervals at 0.025 and 0.975
+        percentiles.
+    tol : float
+        Relative tolerance of the negative log-likelihood used to stop the
+        iterations. Default value is 1e-8.
+    maxiter : int
+        Maximum number of iterations. Default value is 100.
+
+    **Attributes and Methods**
+
+    coef : OrderedDict
+        Ordered dictionary with the coefficients (intercept first) of the
+        *location*, the logarithm of the scale (*log_scale*) and the
+        *shape* (scipy sign convention), arrays with shape (n_series,
+        n_coefficients) or (n_coefficients,) for 1D data.
+    coef_ci : OrderedDict
+        Lower and upper bounds of the confidence intervals of the
+        coefficients (last axis), only if ``ci`` is provided.
+    theta, cov, se : numpy.array
+        All the coefficients, their variance-covariance matrix (from the
+        observed information) and their standard errors.
+    c, loc, scale : numpy.array
+        Shape, location and scale parameters for every value of the data.
+    nllh, nllh_stationary : numpy.array
+        Negative log-likelihood of the fit and of the stationary fit used
+        as starting point, e.g., ``2 * (nllh_stationary - nllh)`` is the
+        likelihood ratio test statistic of the covariates.
+    converged : numpy.array
+        False for the fits that didn't converge.
+    distr : function
+        Distribution (``GEVDistribution``) for the given covariates.
+    return_level : function
+        Effective return levels for the given covariates.
+    """
+
+    _gumbel = False
+
+    def __init__(self, data, covariates=None, loc_covariates=True,
+                 scale_covariates=True, shape_covariates=False, frec=1,
+                 ci=0, tol=1e-8, maxiter=100):
+        self.data = _np.asarray(data, dtype=float)
+        if self.data.ndim not in (1, 2):
+            raise ValueError('data should be a 1D or 2D array.')
+        self._single = self.data.ndim == 1
+        x = _np.atleast_2d(self.data)
+        n = x.shape[1]
+        if covariates is None:
+            covariates = _np.empty((n, 0))
+        covariates = _np.asarray(covariates, dtype=float)
+        if covariates.ndim == 1:
+            covariates = covariates[:, None]
+        if covariates.ndim == 2:
+            covariates = covariates[None]
+        if (covariates.ndim != 3 or covariates.shape[1] != n or
+                covariates.shape[0] not in (1, len(x))):
+            raise ValueError('covariates should have one row per value of '
+                             'the data.')
+        if not _np.all(_np.isfinite(covariates)):
+            raise ValueError('covariates should be finite.')
+        self.covariates = covariates
+        n_covariates = covariates.shape[-1]
+        if self._gumbel and shape_covariates:
+            raise ValueError('The shape of the Gumbel distribution is 0.')
+        self._columns = (_columns(loc_covariates, n_covariates),
+                         _columns(scale_covariates, n_covariates),
+                         None if self._gumbel else
+                         _columns(shape_covariates, n_covariates))
+        self.frec = frec
+        self.ci = ci
+        mask = _np.isfinite(x)
+
+        # stationary fit (starting point): l-moments and mle
+        lmomfit = _gum_lmomfit if self._gumbel else _gev_lmomfit
+        c, loc, scale = lmomfit(x, axis=1)
+        theta = _np.column_stack([loc, _np.log(scale)] +
+                                 ([] if self._gumbel else [c]))
+        stationary = tuple(None if cols is None else _np.ones((1, n, 1))
+                           for cols in self._columns)
+
+        def stationary_nll(theta, index):
+            return _nll(theta, x[index], mask[index], stationary, grad=True)
+
+        if not self._gumbel:
+            # values out of the support, start from the Gumbel fit
+            out = ~_np.isfinite(stationary_nll(theta, slice(None))[0])
+            _, loc, scale = _gum_lmomfit(x[out], axis=1)
+            theta[out] = _np.column_stack([loc, _np.log(scale),
+                                           _np.zeros(len(loc))])
+        theta0, self.nllh_stationary, _ = _newton(stationary_nll, theta,
+                                                  tol, maxiter)
+
+        # non-stationary fit with centred covariates, starting from the
+        # stationary fit (slopes 0)
+        mean = covariates.mean(axis=1, keepdims=True)
+        centred = tuple(None if cols is None else
+                        _design(covariates - mean, cols)
+                        for cols in self._columns)
+        sizes = [None if d is None else d.shape[-1] for d in centred]
+        start = _np.zeros((len(x), sum(s for s in sizes if s)))
+        position = 0
+        for j, size in enumerate(sizes):
+            if size is not None:
+                start[:, position] = theta0[:, j]
+                position += size
+
+        def nll(theta, index):
+            return _nll(theta, x[index], mask[index],
+                        tuple(_take(d, index) for d in centred), grad=True)
+
+        theta, self.nllh, self.converged = _newton(nll, start, tol, maxiter)
+        self.converged &= _np.isfinite(theta).all(axis=1)
+        index = _np.arange(len(x))
+        cov = _inv(_hessian(nll, theta, nll(theta, index)[1], index))
+
+        # coefficients of the covariates without centring, the
+        # intercepts change: theta = J @ theta_centred
+        jac = _np.tile(_np.eye(len(start[0])), (len(mean), 1, 1))
+        position = 0
+        for cols, size in zip(self._columns, sizes):
+            if size is not None:
+                jac[:, position, position + 1:position + size] = \
+                    -mean[:, 0, cols]
+                position += size
+        self.theta = (jac @ theta[..., None])[..., 0]
+        self.cov = jac @ cov @ jac.transpose(0, 2, 1)
+        with _np.errstate(invalid='ignore'):
+            self.se = _np.sqrt(_np.diagonal(self.cov, axis1=1, axis2=2))
+        self._sizes = sizes
+
+        self.coef = self._split(self.theta)
+        if ci:
+            delta = _st.norm.ppf(1 - ci / 2) * self.se
+            self.coef_ci = self._split(
+                _np.stack([self.theta - delta, self.theta + delta], axis=-1)
+            )
+        self.c, self.loc, self.scale = (
+            self._output(p) for p in self._params(self.covariates))
+        if self._single:
+            self.nllh = self.nllh[0]
+            self.nllh_stationary = self.nllh_stationary[0]
+            self.converged = self.converged[0]
+            self.theta, self.cov, self.se = self.theta[0], self.cov[0], \
+                self.se[0]
+
+    def _split(self, values):
+        # values of all the coefficients (n_series, k, ...) -> OrderedDict
+        out = OrderedDict()
+        position = 0
+        for name, size in zip(('location', 'log_scale', 'shape'),
+                              self._sizes):
+            if size is not None:
+                out[name] = self._output(values[:, position:position + size])
+                position += size
+        return out
+
+    def _output(self, values):
+        return values[0] if self._single else values
+
+    def _covariates(self, covariates):
+        # Covariates as (1 or n_series, n_points, n_covariates).
+        if covariates is None:
+            return self.covariates
+        covariates = _np.asarray(covariates, dtype=float)
+        n_covariates = self.covariates.shape[-1]
+        if covariates.ndim < 2:
+            covariates = covariates.reshape(-1, n_covariates)
+        if covariates.ndim == 2:
+            covariates = covariates[None]
+        if covariates.shape[-1] != n_covariates:
+            raise ValueError('covariates should have {} columns.'.format(
+                n_covariates))
+        return covariates
+
+    def _designs(self, covariates):
+        return tuple(None if cols is None else _design(covariates, cols)
+                     for cols in self._columns)
+
+    def _params(self, covariates, designs=None):
+        # c, loc, scale (n_series, n_points)
+        if designs is None:
+            designs = self._designs(covariates)
+        theta = _np.atleast_2d(self.theta)
+        k_loc, k_scale = self._sizes[:2]
+        loc = _linear(designs[0], theta[:, :k_loc])
+        scale = _np.exp(_linear(designs[1], theta[:, k_loc:k_loc + k_scale]))
+        if designs[2] is None:
+            c = _np.zeros_like(loc)
+        else:
+            c = _linear(designs[2], theta[:, k_loc + k_scale:])
+        return c, loc, scale
+
+    def params(self, covariates=None):
+        """
+        Shape, location and scale parameters for the given covariates.
+
+        **Parameters**
+
+        covariates : array_like (optional)
+            Values of the covariates, (n_points, n_covariates) or
+            (n_series, n_points, n_covariates). By default, the covariates
+            of the data.
+
+        **Returns**
+
+        params : OrderedDict
+            Ordered dictionary with the *shape*, *location* and *scale*,
+            arrays with shape (n_series, n_points) or (n_points,) for 1D
+            data.
+        """
+        c, loc, scale = self._params(self._covariates(covariates))
+        params = OrderedDict()
+        params['shape'] = self._output(c)
+        params['location'] = self._output(loc)
+        params['scale'] = self._output(scale)
+        return params
+
+    def distr(self, covariates=None):
+        """``GEVDistribution`` with the parameters for the given covariates
+        (see ``params``)."""
+        return _GEVDistribution(*self.params(covariates).values())
+
+    def return_level(self, T, covariates=None, ci=None):
+        """
+        Effective return levels, the values exceeded with probability
+        ``frec / T`` for the given values of the covariates.
+
+        **Parameters**
+
+        T : float or array_like
+            Return periods.
+        covariates : array_like (optional)
+            Values of the covariates (see ``params``).
+        ci : float (optional)
+            If provided (e.g., 0.05), confidence intervals of level ``ci``
+            are also calculated using the delta method.
+
+        **Returns**
+
+        values : numpy.array
+            Return levels with shape (n_series, n_points) + shape of ``T``
+            (without the first axis for 1D data).
+        lower, upper : numpy.array
+            Bounds of the confidence intervals (only if ``ci`` is
+            provided).
+        """
+        T = _np.asarray(T, dtype=float)
+        covariates = self._covariates(covariates)
+        designs = self._designs(covariates)
+        extra = (slice(None), slice(None)) + (None,) * T.ndim
+        c, loc, scale = (p[extra] for p in self._params(covariates, designs))
+        values, (d_c, d_loc, d_scale) = _gev_isf(
+            self.frec / T, c, loc, scale, grad=True)
+        if ci is None:
+            return self._output(values)
+        # gradient with respect to the coefficients
+        derivatives = [d_loc, d_scale * scale]
+        if designs[2] is not None:
+            derivatives.append(d_c)
+        grad = _np.concatenate([
+            _np.broadcast_to(d[..., None], values.shape + (1,)) *
+            design[extra + (slice(None),)]
+            for d, design in zip(derivatives, designs)], axis=-1)
+        grad = grad.reshape(len(grad), -1, grad.shape[-1])
+        cov = self.cov.reshape((-1,) + self.cov.shape[-2:])
+        var = _np.einsum('mpk,mkl,mpl->mp', grad, cov, grad)
+        delta = (_st.norm.ppf(1 - ci / 2) *
+                 _np.sqrt(var).reshape(values.shape))
+        return tuple(self._output(v) for v in
+                     (values, values - delta, values + delta))
+
+
+class Gumbel(GEV):
+    """
+    Class to fit data to a non-stationary Gumbel distribution with
+    parameters depending linearly on covariates.
+
+    **Parameters**
+
+    data : array_like
+        1D array_like with the extreme values of a series or 2D array_like
+        (n_series, n) with one series per row, fitted independently with
+        the same model. Missing values (``numpy.nan``) are ignored.
+    covariates : array_like (optional)
+        Covariates of each value: 1D array_like (n,) with one covariate,
+        2D array_like (n, n_covariates) shared by all the series or 3D
+        array_like (n_series, n, n_covariates). If it is not provided the
+        model is stationary.
+    loc_covariates : bool or sequence of ints
+        Covariates (True for all, or the columns of ``covariates``) used
+        by the location. Default value is True.
+    scale_covariates : bool or sequence of ints
+        Covariates used by the logarithm of the scale. Default value is
+        True.
+    frec : int or float
+        Value indicating the frecuency of events per year.
+    ci : float (optional)
+        Float indicating the value to be used for the calculation of the
+        confidence intervals of the coefficients (delta method).
+    tol : float
+        Relative tolerance of the negative log-likelihood used to stop the
+        iterations. Default value is 1e-8.
+    maxiter : int
+        Maximum number of iterations. Default value is 100.
+
+    **Attributes and Methods**
+
+    The same as ``GEV``, without coefficients for the shape (it is 0).
+    """
+
+    _gumbel = True
+
+    def __init__(self, data, covariates=None, loc_covariates=True,
+                 scale_covariates=True, frec=1, ci=0, tol=1e-8,
+                 maxiter=100):
+        super().__init__(data, covariates=covariates,
+                         loc_covariates=loc_covariates,
+                         scale_covariates=scale_covariates,
+                         shape_covariates=False, frec=frec, ci=ci, tol=tol,
+                         maxiter=maxiter)
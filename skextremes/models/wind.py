@@ -9,9 +9,17 @@ https://www.ecn.nl/publications/ECN-C--98-096
 https://webstore.iec.ch/preview/info_iec61400-1%7Bed3.0%7Den.pdf
 """
 
+from collections import OrderedDict
+
 import numpy as _np
+from scipy import stats as _st
+from scipy.ndimage import maximum_filter1d as _maximum_filter1d
 from scipy.special import gamma as _gamma
 
+from ..utils import gev_lmomfit as _gev_lmomfit
+from ..utils import gum_lmomfit as _gum_lmomfit
+from .distributions import _gev_isf
+
 
 def wind_EWTSII_Exact(vave, k, T=50, n=23037):
     """
@@ -151,3 +159,682 @@ def wind_vref_5vave(vave, factor=5):
         units used by the vave input parameter.
     """
     return float(factor) * vave
+
+
+###############################################################################
+# Streaming estimation of vave and Weibull k for many series at once
+###############################################################################
+class WindStats:
+    """
+    Online accumulator of the statistics needed to estimate the long term
+    mean wind speed and the Weibull k parameter of one or many series (e.g.,
+    turbines or grid cells) provided in chunks.
+
+    Means and variances are accumulated with the parallel (Chan et al.)
+    update, so chunks of any size can be combined without loss of precision.
+    Missing values (``numpy.nan``) are ignored.
+
+    **Parameters**
+
+    shape : tuple
+        Shape of the grid, i.e., the shape of each time step. Default value is
+        ``()`` for a single series.
+    logmoment : bool
+        If True (default value) the statistics of the logarithm of the wind
+        speed, needed by ``k(method='logmoment')``, are also accumulated.
+
+    **Attributes**
+
+    count : numpy.array
+        Number of valid wind speeds per series.
+    vave : numpy.array
+        Long term mean wind speed per series.
+    std : numpy.array
+        Standard deviation of the wind speed per series.
+    """
+
+    def __init__(self, shape=(), logmoment=True):
+        self.shape = tuple(shape)
+        self.logmoment = logmoment
+        # [count, mean, M2] for the wind speed and for its logarithm (only
+        # strictly positive values are used for the latter)
+        self._lin = [_np.zeros(self.shape) for _ in range(3)]
+        self._log = [_np.zeros(self.shape) for _ in range(3)]
+
+    @staticmethod
+    def _combine(acc, values, valid):
+        # Merge the statistics of a chunk (axis 0 is time) into acc.
+        count, mean, m2 = acc
+        n = _np.sum(valid, axis=0)
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            chunk_mean = _np.where(valid, values, 0).sum(axis=0) / n
+            dev = _np.where(valid, values - chunk_mean, 0)
+            chunk_m2 = _np.sum(dev * dev, axis=0)
+            total = count + n
+            delta = chunk_mean - mean
+            new_mean = mean + delta * n / total
+            new_m2 = m2 + chunk_m2 + delta ** 2 * count * n / total
+        has = n > 0
+        acc[0] = total
+        acc[1] = _np.where(has, new_mean, mean)
+        acc[2] = _np.where(has, new_m2, m2)
+
+    def update(self, chunk):
+        """
+        Add a chunk of wind speeds.
+
+        **Parameters**
+
+        chunk : array_like
+            Wind speeds with shape (n_times,) + ``shape``.
+        """
+        chunk = _np.asarray(chunk, dtype=float)
+        if chunk.shape[1:] != self.shape:
+            raise ValueError('chunk shape should be (n_times,) + {}'
+                             .format(self.shape))
+        valid = _np.isfinite(chunk)
+        self._combine(self._lin, chunk, valid)
+        if self.logmoment:
+            positive = valid & (chunk > 0)
+            with _np.errstate(divide='ignore', invalid='ignore'):
+                self._combine(self._log, _np.log(chunk), positive)
+        return self
+
+    @property
+    def count(self):
+        return self._lin[0]
+
+    @property
+    def vave(self):
+        with _np.errstate(invalid='ignore'):
+            return _np.where(self._lin[0] > 0, self._lin[1], _np.nan)
+
+    @property
+    def std(self):
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            return _np.sqrt(self._lin[2] / (self._lin[0] - 1))
+
+    def k(self, method='moment'):
+        """
+        Weibull k parameter estimated from the accumulated statistics.
+
+        **Parameters**
+
+        method : str
+            'moment' (default value) uses the empirical relation between k
+            and the coefficient of variation, k = (std / vave) ** -1.086
+            (Justus et al., 1978). 'logmoment' uses the standard deviation of
+            the logarithm of the wind speed, k = pi / (sqrt(6) * std_log).
+
+        **Returns**
+
+        k : numpy.array
+            Weibull k parameter per series.
+        """
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            if method == 'moment':
+                return (self.std / self.vave) ** -1.086
+            elif method == 'logmoment':
+                if not self.logmoment:
+                    raise ValueError('Statistics of the logarithm of the '
+                                     'wind speed were not accumulated.')
+                count, _, m2 = self._log
+                return _np.pi / (_np.sqrt(6 * m2 / (count - 1)))
+        raise ValueError("method should be 'moment' or 'logmoment'.")
+
+
+_vref_methods = {'Exact': wind_EWTSII_Exact,
+                 'Gumbel': wind_EWTSII_Gumbel,
+                 'Davenport': wind_EWTSII_Davenport}
+
+
+def _iter_chunks(source, chunk_size=None, max_elements=2**24):
+    # Yield chunks (first axis is time) from an array/memmap or from any
+    # iterable of chunks. If chunk_size is not given it is chosen so each
+    # chunk has at most max_elements values.
+    if isinstance(source, _np.ndarray):
+        if chunk_size is None:
+            per_step = max(1, int(_np.prod(source.shape[1:])))
+            chunk_size = max(1, max_elements // per_step)
+        for start in range(0, source.shape[0], chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        for chunk in source:
+            yield chunk
+
+
+def wind_vref_grid(source, method='Exact', T=50, n=23037,
+                   k_method='moment', chunk_size=None):
+    """
+    Obtain the extreme wind speed for the ``T`` return period for many series
+    (turbines or grid cells) from raw 10-minute wind speeds.
+
+    Wind speeds are streamed in chunks along time, the statistics needed for
+    the long term mean wind speed and the Weibull k parameter are accumulated
+    online (see ``WindStats``) and, finally, the EWTS II formulas are
+    evaluated for the whole grid at once.
+
+    **Parameters**
+
+    source : numpy.array, numpy.memmap or iterable of array_like
+        Wind speeds with time along the first axis, e.g. with shape
+        (n_times, n_cells) or (n_times, ny, nx). An iterable yielding chunks
+        with shape (n_chunk_times, ...) is also accepted.
+    method : str
+        EWTS II variation, 'Exact' (default value), 'Gumbel' or
+        'Davenport'. '5vave' uses ``wind_vref_5vave``.
+    T : float or int
+        Return period in years. Default value is 50 (years).
+    n : float or int
+        The number of independent events per year. Default value is 23037
+        for 10-min time steps and 1-yr extrema.
+    k_method : str
+        Estimator of the Weibull k parameter, 'moment' (default value) or
+        'logmoment'. See ``WindStats.k``.
+    chunk_size : int (optional)
+        Number of time steps per chunk if ``source`` is an array. By default
+        chunks with about 16 million values are used.
+
+    **Returns**
+
+    vref : numpy.array
+        Expected extreme wind speed at the return period defined, with the
+        shape of the grid.
+    vave : numpy.array
+        Long term mean wind speed.
+    k : numpy.array
+        Weibull k parameter.
+    """
+    if method not in _vref_methods and method != '5vave':
+        raise ValueError("method should be 'Exact', 'Gumbel', 'Davenport' "
+                         "or '5vave'.")
+    stats = None
+    for chunk in _iter_chunks(source, chunk_size):
+        chunk = _np.asarray(chunk, dtype=float)
+        if stats is None:
+            stats = WindStats(chunk.shape[1:],
+                              logmoment=(k_method == 'logmoment'))
+        stats.update(chunk)
+    if stats is None:
+        raise ValueError('You should provide some data.')
+
+    vave = stats.vave
+    k = stats.k(k_method)
+    if method == '5vave':
+        vref = wind_vref_5vave(vave)
+    else:
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            vref = _vref_methods[method](vave, k, T=T, n=n)
+    return vref, vave, k
+
+
+###############################################################################
+# Monte Carlo propagation of the uncertainty of vave, k and n
+###############################################################################
+def _frozen_block(distr, shape, block):
+    # Frozen scipy distribution with its parameters restricted to the sites
+    # in block (flat indexes over a grid with the given shape).
+    def select(value):
+        return _np.broadcast_to(value, shape).ravel()[block]
+    args = [select(a) for a in distr.args]
+    kwds = {key: select(value) for key, value in distr.kwds.items()}
+    return distr.dist(*args, **kwds)
+
+
+def _sqrtm_psd(cov):
+    # Matrix square root (L @ L.T == cov) of a stack of positive semidefinite
+    # matrices. Unlike Cholesky it works for variables without uncertainty.
+    w, v = _np.linalg.eigh(cov)
+    return v * _np.sqrt(_np.clip(w, 0, None))[..., None, :]
+
+
+def wind_vref_montecarlo(vave, k, T=50, n=23037, cov=None,
+                         distributions=None, method='Exact',
+                         n_samples=10000, percentiles=(5, 50, 95),
+                         random_state=None, max_elements=2**22):
+    """
+    Propagate the uncertainty of the long term mean wind speed, the Weibull k
+    parameter and the number of independent events per year to the extreme
+    wind speed of the EWTS II formulas using Monte Carlo sampling.
+
+    Samples are drawn for many sites at once and evaluated as broadcast
+    arrays. Sites are processed in blocks so each block holds at most
+    ``max_elements`` (sample, site) pairs, which bounds the memory used
+    whatever the number of samples or sites.
+
+    **Parameters**
+
+    vave : float or array_like
+        Long term mean wind speed per site.
+    k : float or array_like
+        Weibull k parameter per site.
+    T : float or int
+        Return period in years. Default value is 50 (years).
+    n : float or array_like
+        Number of independent events per year per site. Default value is
+        23037 for 10-min time steps and 1-yr extrema.
+    cov : array_like (optional)
+        Covariance matrix of (vave, k, n), with shape (3, 3) or
+        sites_shape + (3, 3). Samples are drawn from a multivariate normal
+        distribution centred on ``(vave, k, n)``. By default there is no
+        uncertainty in any of the variables.
+    distributions : dict (optional)
+        Dictionary with keys 'vave', 'k' and/or 'n' and frozen
+        ``scipy.stats`` distributions as values. Parameters of the
+        distributions can be scalars or arrays with one value per site. The
+        variables included are drawn independently from these distributions
+        instead of using ``cov``.
+    method : str
+        EWTS II variation, 'Exact' (default value), 'Gumbel' or 'Davenport'.
+    n_samples : int
+        Number of Monte Carlo samples per site. Default value is 10000.
+    percentiles : sequence of floats
+        Percentiles of the extreme wind speed to return. Default values are
+        (5, 50, 95).
+    random_state : int or ``numpy.random.Generator`` (optional)
+        Seed or generator used to draw the samples.
+    max_elements : int
+        Maximum number of (sample, site) pairs evaluated at once.
+
+    **Returns**
+
+    vref : numpy.array
+        Percentiles of the extreme wind speed with shape
+        (len(percentiles),) + sites_shape. Samples with non physical values
+        (vave <= 0, k <= 0 or n <= 1) are discarded.
+    """
+    if method not in _vref_methods:
+        raise ValueError("method should be 'Exact', 'Gumbel' or "
+                         "'Davenport'.")
+    func = _vref_methods[method]
+    distributions = distributions or {}
+    names = ('vave', 'k', 'n')
+    for name in distributions:
+        if name not in names:
+            raise ValueError("distributions keys should be 'vave', 'k' or "
+                             "'n'.")
+    rng = _np.random.default_rng(random_state)
+
+    means = _np.stack(_np.broadcast_arrays(_np.asarray(vave, dtype=float),
+                                           _np.asarray(k, dtype=float),
+                                           _np.asarray(n, dtype=float)),
+                      axis=-1)
+    shape = means.shape[:-1]
+    means = means.reshape(-1, 3)
+    n_sites = means.shape[0]
+    if cov is None:
+        sqrt_cov = _np.zeros((n_sites, 3, 3))
+    else:
+        cov = _np.broadcast_to(_np.asarray(cov, dtype=float), shape + (3, 3))
+        sqrt_cov = _sqrtm_psd(cov.reshape(-1, 3, 3))
+
+    percentiles = _np.atleast_1d(percentiles)
+    out = _np.empty((len(percentiles), n_sites))
+    block_size = max(1, max_elements // n_samples)
+    for start in range(0, n_sites, block_size):
+        block = _np.arange(start, min(start + block_size, n_sites))
+        z = rng.standard_normal((n_samples, len(block), 3))
+        samples = means[block] + _np.einsum('sbj,bij->sbi', z,
+                                            sqrt_cov[block])
+        for i, name in enumerate(names):
+            if name in distributions:
+                distr = _frozen_block(distributions[name], shape, block)
+                samples[..., i] = distr.rvs(size=(n_samples, len(block)),
+                                            random_state=rng)
+        v, kk, nn = samples[..., 0], samples[..., 1], samples[..., 2]
+        valid = (v > 0) & (kk > 0) & (nn > 1)
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            vref = _np.where(valid, func(v, kk, T=T, n=nn), _np.nan)
+        if valid.all():
+            out[:, block] = _np.percentile(vref, percentiles, axis=0)
+        else:
+            out[:, block] = _np.nanpercentile(vref, percentiles, axis=0)
+    return out.reshape((len(percentiles),) + shape)
+
+
+###############################################################################
+# Directional (sector-wise) extreme wind analysis
+###############################################################################
+def _years(times):
+    # Integer years from datetime64 values, other values are used as is.
+    times = _np.asarray(times)
+    if _np.issubdtype(times.dtype, _np.datetime64):
+        return times.astype('datetime64[Y]').astype(int) + 1970
+    return times
+
+
+def wind_sector_extremes(speed, direction, years, n_sectors=12,
+                         distribution='Gumbel', return_periods=(50,)):
+    """
+    Sector-wise extreme wind analysis using annual maxima.
+
+    Records are assigned to ``n_sectors`` direction sectors (the first one
+    centred on north) with a single ``numpy.digitize`` pass. The maxima of
+    every (year, sector) pair are extracted at once with
+    ``numpy.fmax.reduceat`` over the records sorted by (year, sector), so
+    no per-sector copies of the data are made. Then the annual maxima of all
+    the sectors are fitted at once using L-moments. Records with a missing
+    (not finite) speed or direction are ignored.
+
+    The omni-directional annual maxima are also fitted and, as a consistency
+    check, compared with the return values obtained by combining the sector
+    distributions assuming independence between sectors, i.e.,
+    :math:`F(v) = \\prod_{s} F_s(v)`.
+
+    **Parameters**
+
+    speed : array_like
+        Wind speeds (e.g., 10-minute values of several years).
+    direction : array_like
+        Wind directions in degrees for every record in ``speed``.
+    years : array_like
+        Year of every record, as integer values or ``numpy.datetime64``
+        values.
+    n_sectors : int
+        Number of direction sectors. Default value is 12.
+    distribution : str
+        'Gumbel' (default value) or 'GEV'.
+    return_periods : array_like
+        Return periods in years. Default value is (50,).
+
+    **Returns**
+
+    results : OrderedDict
+        Dictionary with the following keys:
+        'years' (years with data), 'sectors' (central direction of each
+        sector), 'annual_maxima' (array with shape (n_years, n_sectors),
+        ``numpy.nan`` for years without records in a sector), 'params'
+        (array with shape (n_sectors, 3) with the shape, location and
+        scale parameters per sector using the ``scipy.stats`` sign
+        convention), 'return_values' (array with shape (n_sectors,
+        n_return_periods)), 'omni_params', 'omni_return_values',
+        'combined_return_values' (return values of the combined sector
+        distributions) and 'consistency' (ratio between combined and
+        omni-directional return values).
+    """
+    if distribution not in ('Gumbel', 'GEV'):
+        raise ValueError("distribution should be 'Gumbel' or 'GEV'.")
+    fit = _gum_lmomfit if distribution == 'Gumbel' else _gev_lmomfit
+    speed = _np.asarray(speed, dtype=float)
+    direction = _np.asarray(direction, dtype=float)
+    return_periods = _np.atleast_1d(_np.asarray(return_periods, dtype=float))
+    # records with a missing speed or direction can't be assigned to a sector
+    valid = _np.isfinite(speed) & _np.isfinite(direction)
+    speed, direction = speed[valid], direction[valid]
+    years = _np.broadcast_to(_years(years), valid.shape)[valid]
+
+    # sectors, the first one centred on north
+    width = 360. / n_sectors
+    edges = _np.arange(1, n_sectors) * width
+    sector = _np.digitize((direction + width / 2) % 360, edges)
+
+    # (year, sector) annual maxima
+    uyears, year_idx = _np.unique(years, return_inverse=True)
+    key = year_idx * n_sectors + sector
+    order = _np.argsort(key, kind='stable')
+    key = key[order]
+    starts = _np.flatnonzero(_np.r_[True, key[1:] != key[:-1]])
+    maxima = _np.fmax.reduceat(speed[order], starts)
+    annual_maxima = _np.full((len(uyears), n_sectors), _np.nan)
+    annual_maxima.flat[key[starts]] = maxima
+
+    # fits per sector and omni-directional
+    q = 1. / return_periods
+    params = _np.stack(fit(annual_maxima, axis=0), axis=1)
+    c, loc, scale = params.T
+    return_values = _gev_isf(q, c[:, None], loc[:, None], scale[:, None])
+    with _np.errstate(invalid='ignore'):
+        omni = _np.nanmax(annual_maxima, axis=1)
+    oc, oloc, oscale = (float(p) for p in fit(omni))
+    omni_return_values = _gev_isf(q, oc, oloc, oscale)
+
+    # combined distribution of the sectors with a fit:
+    # prod(F_s(v)) = 1 - q is solved using bisection. The solution is
+    # between the sector quantiles for probabilities 1 - q and
+    # (1 - q) ** (1 / n_sectors)
+    ok = _np.isfinite(c) & _np.isfinite(loc) & (scale > 0)
+    c, loc, scale = c[ok, None], loc[ok, None], scale[ok, None]
+    if _np.any(ok):
+        low = _np.max(_gev_isf(q, c, loc, scale), axis=0)
+        p_high = 1 - (1 - q) ** (1. / ok.sum())
+        high = _np.max(_gev_isf(p_high, c, loc, scale), axis=0)
+        for _ in range(60):
+            mid = (low + high) / 2
+            cdf = _np.prod(_st.genextreme.cdf(mid, c, loc=loc, scale=scale),
+                           axis=0)
+            below = cdf < 1 - q
+            low = _np.where(below, mid, low)
+            high = _np.where(below, high, mid)
+        combined = (low + high) / 2
+    else:
+        combined = _np.full(len(q), _np.nan)
+
+    results = OrderedDict()
+    results['years'] = uyears
+    results['sectors'] = _np.arange(n_sectors) * width
+    results['annual_maxima'] = annual_maxima
+    results['params'] = params
+    results['return_values'] = return_values
+    results['omni_params'] = _np.array([oc, oloc, oscale])
+    results['omni_return_values'] = omni_return_values
+    results['combined_return_values'] = combined
+    results['consistency'] = combined / omni_return_values
+    return results
+
+
+###############################################################################
+# Periodic maxima and independent storms methods
+###############################################################################
+def wind_periodic_maxima(source, period, chunk_size=None):
+    """
+    Maxima of consecutive periods of ``period`` records (periodic maxima
+    method, e.g., monthly maxima of 10-minute wind speeds).
+
+    The series is streamed in chunks and only the last incomplete period of
+    every chunk is carried to the next one, so the memory used is bounded by
+    the chunk size. The last period is discarded if it is incomplete.
+
+    The maxima can be fitted using, e.g.,
+    ``skextremes.models.classic.Gumbel(maxima, frec=periods_per_year)``.
+
+    **Parameters**
+
+    source : numpy.array, numpy.memmap or iterable of array_like
+        1D wind speed series or an iterable yielding consecutive 1D chunks.
+    period : int
+        Number of records per period.
+    chunk_size : int (optional)
+        Number of records per chunk if ``source`` is an array.
+
+    **Returns**
+
+    maxima : numpy.array
+        Maxima of every complete period. Missing values (``numpy.nan``) are
+        ignored; periods without valid values get ``numpy.nan``.
+    """
+    period = int(period)
+    if period < 1:
+        raise ValueError('period should be a positive integer.')
+    maxima = []
+    carry = _np.empty(0)
+    for chunk in _iter_chunks(source, chunk_size):
+        values = _np.concatenate((carry, _np.asarray(chunk, dtype=float)))
+        n_full = len(values) // period
+        if n_full:
+            blocks = values[:n_full * period].reshape(n_full, period)
+            with _np.errstate(invalid='ignore'):
+                maxima.append(_np.fmax.reduce(blocks, axis=1))
+        carry = values[n_full * period:]
+    if not maxima:
+        return _np.empty(0)
+    return _np.concatenate(maxima)
+
+
+def wind_storm_peaks(source, min_separation, threshold=None,
+                     chunk_size=None):
+    """
+    Peaks of independent storms: values that are the maximum within
+    ``min_separation`` records on both sides (and above ``threshold`` if
+    provided).
+
+    Peaks are found with a vectorized running maximum over every chunk.
+    Only ``2 * min_separation`` records are carried from one chunk to the
+    next one, so decade-long 10-minute series can be processed in bounded
+    memory. Ties within the separation keep the first record.
+
+    **Parameters**
+
+    source : numpy.array, numpy.memmap or iterable of array_like
+        1D wind speed series or an iterable yielding consecutive 1D chunks.
+    min_separation : int
+        Minimum number of records between two storm peaks, e.g., 288 for
+        48 hours of 10-minute values.
+    threshold : float (optional)
+        Only peaks above this value are considered storms.
+    chunk_size : int (optional)
+        Number of records per chunk if ``source`` is an array.
+
+    **Returns**
+
+    indexes : numpy.array
+        Position of the peaks in the series.
+    peaks : numpy.array
+        Values of the peaks.
+    """
+    w = int(min_separation)
+    if w < 1:
+        raise ValueError('min_separation should be a positive integer.')
+    indexes, peaks = [], []
+    buffer = _np.empty(0)
+    offset = 0          # position in the series of buffer[0]
+    done = 0            # records of buffer already checked
+    last = -w - 1       # position of the last peak found
+
+    def scan(buffer, stop):
+        # check records done:stop of buffer, their whole window is available
+        nonlocal last
+        rmax = _maximum_filter1d(buffer, 2 * w + 1, mode='constant',
+                                 cval=-_np.inf)
+        idx = _np.arange(done, stop)
+        cand = idx[(buffer[done:stop] == rmax[done:stop]) &
+                   _np.isfinite(buffer[done:stop])]
+        if threshold is not None:
+            cand = cand[buffer[cand] > threshold]
+        pos = cand + offset
+        # ties in the same window (plateaus), keep the first one and compare
+        # the next candidates against the last accepted peak
+        keep = _np.zeros(len(pos), dtype=bool)
+        for i, p in enumerate(pos):
+            if p - last > w:
+                keep[i] = True
+                last = p
+        pos, cand = pos[keep], cand[keep]
+        indexes.append(pos)
+        peaks.append(buffer[cand])
+
+    for chunk in _iter_chunks(source, chunk_size):
+        chunk = _np.asarray(chunk, dtype=float)
+        buffer = _np.concatenate((buffer, _np.where(_np.isnan(chunk),
+                                                    -_np.inf, chunk)))
+        stop = len(buffer) - w
+        if stop > done:
+            scan(buffer, stop)
+            done = stop
+        # keep what is needed for the windows of the next records
+        drop = max(0, done - w)
+        buffer = buffer[drop:]
+        offset += drop
+        done -= drop
+    if len(buffer) > done:
+        scan(buffer, len(buffer))
+
+    if not indexes:
+        return _np.empty(0, dtype=int), _np.empty(0)
+    return _np.concatenate(indexes).astype(int), _np.concatenate(peaks)
+
+
+def wind_independent_storms(source, min_separation, records_per_year=52560,
+                            threshold=None, model='Gumbel',
+                            return_periods=(50,), chunk_size=None):
+    """
+    Extreme wind speeds using the independent storms method (Cook, 1982).
+
+    Storm peaks are obtained using ``wind_storm_peaks`` and fitted with a
+    Gumbel distribution. If :math:`r` is the mean number of storms per year,
+    the annual distribution is :math:`F(v)^r`, so the value for the return
+    period :math:`T` (years) is that of the storm return period
+    :math:`1 / (1 - (1 - 1 / T)^{1 / r})`.
+
+    **Parameters**
+
+    source : numpy.array, numpy.memmap or iterable of array_like
+        1D wind speed series or an iterable yielding consecutive 1D chunks.
+    min_separation : int
+        Minimum number of records between two storm peaks, e.g., 288 for
+        48 hours of 10-minute values.
+    records_per_year : int or float
+        Number of records per year. Default value is 52560 for 10-minute
+        values.
+    threshold : float (optional)
+        Only peaks above this value are considered storms.
+    model : str
+        Fitter used for the storm peaks: 'Gumbel' (default value,
+        ``skextremes.models.classic.Gumbel``), 'Lieblein' or 'Harris1996'
+        (``skextremes.models.engineering``).
+    return_periods : array_like
+        Return periods in years. Default value is (50,).
+    chunk_size : int (optional)
+        Number of records per chunk if ``source`` is an array.
+
+    **Returns**
+
+    results : OrderedDict
+        Dictionary with the keys 'indexes' and 'peaks' (see
+        ``wind_storm_peaks``), 'rate' (storms per year), 'model' (the
+        fitted model), 'return_periods' and 'return_values'.
+
+    **References**
+
+        Cook NJ, (1982): 'Towards better estimation of extreme winds',
+        Journal of Wind Engineering and Industrial Aerodynamics, 9, 295-323.
+    """
+    from . import classic as _classic
+    from . import engineering as _engineering
+
+    if model not in ('Gumbel', 'Lieblein', 'Harris1996'):
+        raise ValueError("model should be 'Gumbel', 'Lieblein' or "
+                         "'Harris1996'.")
+    n_records = [0]
+
+    def counted(chunks):
+        for chunk in chunks:
+            n_records[0] += len(chunk)
+            yield chunk
+
+    indexes, peaks = wind_storm_peaks(
+        counted(_iter_chunks(source, chunk_size)), min_separation,
+        threshold=threshold)
+    if len(peaks) < 2:
+        raise ValueError('At least 2 storm peaks are needed to fit the model '
+                         '({} found), check threshold and '
+                         'min_separation.'.format(len(peaks)))
+    rate = len(peaks) / (n_records[0] / records_per_year)
+    return_periods = _np.atleast_1d(_np.asarray(return_periods, dtype=float))
+    storm_periods = 1 / (1 - (1 - 1 / return_periods) ** (1 / rate))
+
+    if model == 'Gumbel':
+        fitted = _classic.Gumbel(peaks, return_periods=list(return_periods),
+                                 frec=rate)
+        return_values = fitted.distr.isf(1 / storm_periods)
+    else:
+        fitted = getattr(_engineering, model)(peaks)
+        return_values = fitted.return_level(storm_periods)
+
+    results = OrderedDict()
+    results['indexes'] = indexes
+    results['peaks'] = peaks
+    results['rate'] = rate
+    results['model'] = fitted
+    results['return_periods'] = return_periods
+    results['return_values'] = return_values
+    return results
@@ -0,0 +1,758 @@
+"""
+Tools to fit many extreme value models in parallel.
+
+The fits (scipy optimizations, bootstrap resampling,...) are CPU bound and
+blocking so they are run in a pool of processes. ``fit_many`` and
+``fit_all`` are coroutines to be used from ``asyncio`` applications: the
+event loop is never blocked by the calculations. ``fit_grid`` fits the
+series of large 2D arrays (e.g., one series per cell of a grid) sharing the
+input and output arrays with the workers instead of sending copies and
+``fit_raster`` fits the block maxima of (time, y, x) rasters larger than the
+available memory, tile by tile, with checkpoints to resume interrupted
+runs.
+"""
+
+import asyncio as _asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from concurrent.futures import wait as _wait
+from concurrent.futures import FIRST_COMPLETED as _FIRST_COMPLETED
+import json as _json
+import os as _os
+import tempfile as _tempfile
+
+import numpy as _np
+import scipy.stats as _st
+from scipy import optimize as _op
+try:
+    from multiprocessing import shared_memory as _shared_memory
+except ImportError:  # Python < 3.8
+    _shared_memory = None
+
+from .utils import (gev_lmomfit as _gev_lmomfit,
+                    gum_lmomfit as _gum_lmomfit,
+                    gpd_lmomfit as _gpd_lmomfit,
+                    gev_momfit as _gev_momfit,
+                    gum_momfit as _gum_momfit,
+                    _gpd_isf,
+                    _Monitor)
+from .models.distributions import _gev_isf
+
+_models = {
+    'classic': ('GEV', 'Gumbel', 'GPD'),
+    'engineering': ('Harris1996', 'Lieblein', 'PPPLiterature'),
+}
+
+
+def _model_class(model):
+    # Model class from its name, classes are accepted as they are.
+    if isinstance(model, type):
+        return model
+    from .models import classic, engineering
+    modules = {'classic': classic, 'engineering': engineering}
+    for module, names in _models.items():
+        if model in names:
+            return getattr(modules[module], model)
+    raise ValueError('model should be a class or one of {}.'.format(
+        ', '.join(n for names in _models.values() for n in names)))
+
+
+def _fit_batch(model, batch, kwargs, reduce):
+    # Run in the workers. Errors are returned per series, they don't abort
+    # the rest of the batch.
+    out = []
+    for index, data in batch:
+        try:
+            result = model(data, **kwargs)
+            if reduce is not None:
+                result = reduce(result)
+        except Exception as e:
+            out.append((index, None, e))
+        else:
+            out.append((index, result, None))
+    return out
+
+
+async def _aiter(iterable):
+    # Async iterator from sync or async iterables.
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+async def fit_many(series, model='GEV', batch_size=8, max_pending=None,
+                   flush_interval=None, executor=None, max_workers=None,
+                   reduce=None, return_exceptions=False, **kwargs):
+    """
+    Fit a model to each one of the datasets in ``series`` in a pool of
+    processes, yielding the results as they are available (asynchronous
+    generator).
+
+    Datasets are consumed lazily from ``series`` and sent to the workers in
+    batches of ``batch_size`` datasets, so the cost of the communication
+    with the processes is shared by several small fits. No more than
+    ``max_pending`` batches are submitted at the same time (back-pressure),
+    the next datasets are not read until some of them finish. With slow
+    sources, incomplete batches are submitted after ``flush_interval``
+    seconds.
+
+    **Parameters**
+
+    series : iterable or asynchronous iterable
+        Extreme values datasets (array_like).
+    model : str or class
+        'GEV' (default value), 'Gumbel', 'GPD' (``classic`` module),
+        'Harris1996', 'Lieblein', 'PPPLiterature' (``engineering`` module)
+        or a model class defined at module level.
+    batch_size : int
+        Number of datasets fitted per task. Default value is 8.
+    max_pending : int
+        Maximum number of batches submitted at the same time. Default value
+        is two times ``max_workers``.
+    flush_interval : float (optional)
+        Maximum time in seconds an incomplete batch waits for more datasets
+        before it is submitted (e.g., for datasets arriving from the
+        network). By default, batches are only submitted when they are
+        complete or ``series`` is exhausted.
+    executor : concurrent.futures.Executor
+        Pool used to fit the models. If it is not provided a
+        ``ProcessPoolExecutor`` with ``max_workers`` processes is created
+        and shutdown when the generator finishes.
+    max_workers : int
+        Number of processes of the pool created if ``executor`` is not
+        provided (or number of workers of ``executor``). Default value is
+        the number of processors.
+    reduce : callable (optional)
+        Function applied to the fitted model in the worker, its result is
+        returned instead of the model (e.g., to send back only the
+        parameters or the return values). It should be defined at module
+        level so it can be pickled.
+    return_exceptions : bool
+        If False (default value), the first error raised fitting a dataset
+        is propagated. If True, the exception is returned as the result of
+        that dataset.
+    **kwargs
+        Other arguments passed to the model (``fit_method``,
+        ``return_periods``,...).
+
+    **Returns**
+
+    An asynchronous generator yielding ``(index, result)`` tuples, where
+    ``index`` is the position of the dataset in ``series`` and ``result``
+    the fitted model (or the output of ``reduce``). Results are yielded in
+    completion order, not in the input order.
+
+    **Example**
+
+    ::
+
+        async for i, model in fit_many(series, 'GEV', fit_method='lmoments'):
+            store(i, model.c, model.loc, model.scale)
+    """
+    model = _model_class(model)
+    batch_size = int(batch_size)
+    if batch_size < 1:
+        raise ValueError('batch_size should be a positive integer.')
+    if flush_interval is not None and not flush_interval >= 0:
+        raise ValueError('flush_interval should be a non-negative number.')
+    own_executor = executor is None
+    if own_executor:
+        executor = _ProcessPoolExecutor(max_workers)
+    if max_pending is None:
+        max_pending = 2 * (max_workers or _os.cpu_count() or 1)
+    if max_pending < 1:
+        raise ValueError('max_pending should be a positive integer.')
+
+    loop = _asyncio.get_event_loop()
+    items = _aiter(series)
+    pending = set()
+    batch = []
+    # task reading the next dataset, results of the batches are yielded
+    # while it waits
+    next_item = None
+    exhausted = False
+    index = 0
+    try:
+        while True:
+            if (next_item is None and not exhausted and
+                    len(pending) < max_pending):
+                next_item = _asyncio.ensure_future(items.__anext__())
+            waiting = set(pending)
+            if next_item is not None:
+                waiting.add(next_item)
+            if not waiting:
+                break
+            timeout = None
+            if batch and flush_interval is not None:
+                timeout = max(deadline - loop.time(), 0)
+            done, _ = await _asyncio.wait(
+                waiting, timeout=timeout,
+                return_when=_asyncio.FIRST_COMPLETED)
+            if next_item in done:
+                try:
+                    data = next_item.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    if not batch and flush_interval is not None:
+                        deadline = loop.time() + flush_interval
+                    batch.append((index, data))
+                    index += 1
+                next_item = None
+            # complete batches, the last one or those waiting too long
+            if batch and (len(batch) == batch_size or exhausted or (
+                    flush_interval is not None and
+                    loop.time() >= deadline)):
+                pending.add(loop.run_in_executor(
+                    executor, _fit_batch, model, batch, kwargs, reduce))
+                batch = []
+            for future in done & pending:
+                pending.remove(future)
+                for i, result, error in future.result():
+                    if error is None:
+                        yield i, result
+                    elif return_exceptions:
+                        yield i, error
+                    else:
+                        raise error
+    finally:
+        # cancelling the asyncio futures cancels the tasks not started
+        for future in pending:
+            future.cancel()
+        if next_item is not None:
+            next_item.cancel()
+            try:
+                await next_item
+            except (_asyncio.CancelledError, Exception):
+                pass
+        await items.aclose()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+async def fit_all(series, model='GEV', **kwargs):
+    """
+    Fit a model to each one of the datasets in ``series`` in a pool of
+    processes. See ``fit_many`` for the parameters.
+
+    **Returns**
+
+    A list with the results in the same order as ``series``.
+    """
+    results = {}
+    async for i, result in fit_many(series, model, **kwargs):
+        results[i] = result
+    return [results[i] for i in range(len(results))]
+
+
+###############################################################################
+# Grids of series using shared memory
+###############################################################################
+_grid_fits = {
+    'GEV': ('lmoments', 'mle', 'mom'),
+    'Gumbel': ('lmoments', 'mle', 'mom'),
+    'GPD': ('lmoments',),
+}
+
+
+def _fit_rows(model, fit_method, data):
+    # Shape, location and scale of every row of data. Missing values (nan)
+    # are ignored. Rows that can't be fitted get nan parameters.
+    lmomfit = {'GEV': _gev_lmomfit,
+               'Gumbel': _gum_lmomfit,
+               'GPD': _gpd_lmomfit}[model]
+    params = _np.column_stack(lmomfit(data, axis=1))
+    if fit_method == 'lmoments':
+        return params
+    for i, row in enumerate(data):
+        row = row[_np.isfinite(row)]
+        try:
+            if fit_method == 'mom':
+                momfit = _gev_momfit if model == 'GEV' else _gum_momfit
+                params[i] = momfit(row)
+            elif model == 'GEV':
+                # mle starting from the l-moments estimators like in
+                # classic.GEV
+                c, loc, scale = params[i]
+                params[i] = _st.genextreme.fit(row, c, loc=loc, scale=scale,
+                                               optimizer=_op.fmin_bfgs)
+            else:
+                params[i] = (0,) + tuple(_st.gumbel_r.fit(row))
+        except Exception:
+            params[i] = _np.nan
+    return params
+
+
+class _SharedArray:
+    # Description of an array shared with the workers: a block of shared
+    # memory or a file (.npy or raw binary if offset is provided) opened as
+    # a memmap. Only this description is sent to the workers. Without
+    # multiprocessing.shared_memory (Python < 3.8) new arrays are temporary
+    # .npy files.
+
+    def __init__(self, shape, dtype=float, filename=None, mode='r+',
+                 offset=None):
+        self.shape = tuple(shape)
+        self.dtype = _np.dtype(dtype)
+        self.filename = filename
+        self.mode = mode
+        self.offset = offset
+        self.name = None
+        self._shm = None
+        self._temporary = False
+        if filename is None and _shared_memory is None:
+            fd, self.filename = _tempfile.mkstemp(suffix='.npy')
+            _os.close(fd)
+            self._temporary = True
+            out = _np.lib.format.open_memmap(self.filename, mode='w+',
+                                             dtype=self.dtype,
+                                             shape=self.shape)
+            del out
+        elif filename is None:
+            size = max(int(_np.prod(self.shape)) * self.dtype.itemsize, 1)
+            self._shm = _shared_memory.SharedMemory(create=True, size=size)
+            self.name = self._shm.name
+
+    def __getstate__(self):
+        # the owner of the shared memory (or the temporary file) is the
+        # process that created it
+        state = self.__dict__.copy()
+        state['_shm'] = None
+        state['_temporary'] = False
+        return state
+
+    def open(self):
+        # numpy.array view of the data and the handle of the shared memory
+        # (None for files) to be closed after deleting the view.
+        if self.filename is not None and self.offset is not None:
+            return _np.memmap(self.filename, dtype=self.dtype,
+                              mode=self.mode, offset=self.offset,
+                              shape=self.shape), None
+        if self.filename is not None:
+            return _np.load(self.filename, mmap_mode=self.mode), None
+        shm = _shared_memory.SharedMemory(name=self.name)
+        view = _np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        return view, shm
+
+    def release(self):
+        # Free the shared memory, only in the process that created it.
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        if self._temporary:
+            _os.remove(self.filename)
+            self._temporary = False
+
+
+def _grid_task(model, fit_method, source, output, q, start, stop):
+    # Run in the workers. Fit the rows start:stop of the source array and
+    # write the parameters and return values to the output array.
+    data, data_shm = source.open()
+    out, out_shm = output.open()
+    try:
+        params = _fit_rows(model, fit_method,
+                           _np.array(data[start:stop], dtype=float))
+        out[start:stop, :3] = params
+        if len(q):
+            isf = _gpd_isf if model == 'GPD' else _gev_isf
+            out[start:stop, 3:] = isf(q, params[:, :1], params[:, 1:2],
+                                      params[:, 2:])
+    finally:
+        del data, out
+        for shm in (data_shm, out_shm):
+            if shm is not None:
+                shm.close()
+
+
+def fit_grid(data, model='GEV', fit_method='lmoments', return_periods=None,
+             frec=1, executor=None, max_workers=None, chunk_size=None):
+    """
+    Fit a distribution to each row of a large 2D array (e.g., annual maxima
+    with shape (n_cells, n_years)) using a pool of processes.
+
+    The input series and the output arrays are placed in shared memory
+    (``multiprocessing.shared_memory``, or temporary memory-mapped files
+    in Python < 3.8) and the workers only receive the range of rows to
+    fit, writing the results in place. The data is not pickled and copied
+    to each process. If ``data`` is the name of a .npy
+    file, the workers open it as a memmap so the data isn't copied at all.
+
+    **Parameters**
+
+    data : 2D array_like or str
+        Series to be fitted, one per row. Missing values (``numpy.nan``) are
+        ignored. It can also be the name of a .npy file with a 2D array.
+    model : str
+        'GEV' (default value), 'Gumbel' or 'GPD'.
+    fit_method : str
+        'lmoments' (default value), 'mle' or 'mom'. Only 'lmoments' is
+        available for the 'GPD'.
+    return_periods : array_like (optional)
+        Return periods used to obtain the return values.
+    frec : int or float
+        Number of values per block (e.g., per year). Return values are
+        obtained with the probability ``frec / return_periods``. Default
+        value is 1.
+    executor : concurrent.futures.Executor
+        Pool used to fit the models. If it is not provided a
+        ``ProcessPoolExecutor`` with ``max_workers`` processes is created
+        and shutdown at the end.
+    max_workers : int
+        Number of processes of the pool created if ``executor`` is not
+        provided (or number of workers of ``executor``). Default value is
+        the number of processors.
+    chunk_size : int
+        Number of rows fitted per task. By default, the rows are divided in
+        four tasks per worker.
+
+    **Returns**
+
+    OrderedDict
+        Dictionary with the arrays 'shape', 'location' and 'scale' (one
+        value per row, ``numpy.nan`` if the row can't be fitted),
+        'return_periods' and 'return_values' (one row per series).
+    """
+    if model not in _grid_fits:
+        raise ValueError('model should be one of {}.'.format(
+            ', '.join(_grid_fits)))
+    if fit_method not in _grid_fits[model]:
+        raise ValueError('fit_method for {} should be one of {}.'.format(
+            model, ', '.join(_grid_fits[model])))
+    if return_periods is None:
+        return_periods = []
+    return_periods = _np.atleast_1d(_np.asarray(return_periods, dtype=float))
+    q = frec / return_periods
+
+    if isinstance(data, (str, _os.PathLike)):
+        filename = _os.fspath(data)
+        shape = _np.load(filename, mmap_mode='r').shape
+        source = _SharedArray(shape, filename=filename, mode='r')
+    else:
+        data = _np.asarray(data, dtype=float)
+        shape = data.shape
+        source = None
+    if len(shape) != 2:
+        raise ValueError('data should be a 2D array, one series per row.')
+    n_cells = shape[0]
+
+    output = None
+    futures = []
+    own_executor = executor is None
+    try:
+        if source is None:
+            source = _SharedArray(shape)
+            view, shm = source.open()
+            view[...] = data
+            del view
+            if shm is not None:
+                shm.close()
+        output = _SharedArray((n_cells, 3 + len(q)))
+        if own_executor:
+            executor = _ProcessPoolExecutor(max_workers)
+        if chunk_size is None:
+            n_tasks = 4 * (max_workers or _os.cpu_count() or 1)
+            chunk_size = -(-n_cells // n_tasks)
+        chunk_size = max(int(chunk_size), 1)
+        futures = [executor.submit(_grid_task, model, fit_method, source,
+                                   output, q, start,
+                                   min(start + chunk_size, n_cells))
+                   for start in range(0, n_cells, chunk_size)]
+        _wait(futures)
+        for future in futures:
+            # errors in the workers are raised here
+            future.result()
+        view, shm = output.open()
+        out = _np.array(view)
+        del view
+        if shm is not None:
+            shm.close()
+    finally:
+        # tasks not started yet if a task failed
+        for future in futures:
+            future.cancel()
+        if own_executor and executor is not None:
+            executor.shutdown()
+        for shared in (source, output):
+            if shared is not None:
+                shared.release()
+
+    results = OrderedDict()
+    results['shape'] = out[:, 0]
+    results['location'] = out[:, 1]
+    results['scale'] = out[:, 2]
+    results['return_periods'] = return_periods
+    results['return_values'] = out[:, 3:]
+    return results
+
+
+###############################################################################
+# Out-of-core fits of (time, y, x) rasters
+###############################################################################
+_raster_outputs = ('shape', 'location', 'scale', 'return_values')
+
+
+def _raster_task(model, fit_method, source, outputs, q, block_size,
+                 n_blocks, tile, max_records):
+    # Run in the workers. Block maxima of the cells of a tile, read in
+    # chunks of at most max_records time steps, fit and write the results
+    # to the output files.
+    (y0, y1), (x0, x1) = tile
+    n_cells = (y1 - y0) * (x1 - x0)
+    maxima = _np.empty((n_blocks, n_cells))
+    data, _ = source.open()
+    for start in range(0, n_blocks * block_size, max_records):
+        stop = min(start + max_records, n_blocks * block_size)
+        chunk = _np.array(data[start:stop, y0:y1, x0:x1], dtype=float)
+        # nan values are ignored, all nan blocks get nan maxima
+        maxima[start // block_size:stop // block_size] = _np.fmax.reduce(
+            chunk.reshape(-1, block_size, n_cells), axis=1)
+    del data, chunk
+    params = _fit_rows(model, fit_method, maxima.T)
+    values = {'shape': params[:, 0],
+              'location': params[:, 1],
+              'scale': params[:, 2]}
+    isf = _gpd_isf if model == 'GPD' else _gev_isf
+    values['return_values'] = isf(q[:, None], params[:, 0], params[:, 1],
+                                  params[:, 2])
+    for name, output in outputs.items():
+        out, _ = output.open()
+        out[..., y0:y1, x0:x1] = values[name].reshape(
+            out.shape[:-2] + (y1 - y0, x1 - x0))
+        # results are on disk before the tile is marked as done
+        out.flush()
+        del out
+    return tile
+
+
+def _write_checkpoint(filename, state):
+    # Write atomically so an interrupted run never leaves a corrupt file.
+    fd, tmp = _tempfile.mkstemp(dir=_os.path.dirname(filename),
+                                suffix='.tmp')
+    with _os.fdopen(fd, 'w') as f:
+        _json.dump(state, f)
+    _os.replace(tmp, filename)
+
+
+def fit_raster(source, output_dir, block_size, model='GEV',
+               fit_method='lmoments', return_periods=None, frec=1,
+               shape=None, dtype='f8', offset=0, tile_shape=None,
+               max_memory=2**27, resume=True, executor=None,
+               max_workers=None, callback=None, cancel=None, max_time=None):
+    """
+    Fit a distribution to the block maxima of every cell of a (time, y, x)
+    raster stored on disk, without loading it in memory.
+
+    The raster is processed by tiles of cells. For each tile, the values
+    are read in chunks of whole blocks, the block maxima are extracted and
+    the distributions are fitted at once (see ``fit_grid``). Parameters and
+    return values are written to .npy files in ``output_dir`` that can be
+    opened as memmaps. The finished tiles are recorded in the file
+    'checkpoint.json' of ``output_dir``, so an interrupted run (cancelled,
+    out of time or killed) is resumed calling the function again with the
+    same arguments.
+
+    **Parameters**
+
+    source : str
+        Name of a .npy file with a 3D array (time, y, x) or, if ``shape``
+        is provided, of a raw binary file in C order.
+    output_dir : str
+        Directory for the results: 'shape.npy', 'location.npy',
+        'scale.npy' with shape (y, x), 'return_values.npy' with shape
+        (n_return_periods, y, x) and 'checkpoint.json'. It is created if
+        it doesn't exist.
+    block_size : int
+        Number of time steps of each block (e.g., 365 for annual maxima of
+        daily values). The last incomplete block is discarded.
+    model : str
+        'GEV' (default value), 'Gumbel' or 'GPD'.
+    fit_method : str
+        'lmoments' (default value), 'mle' or 'mom'. Only 'lmoments' is
+        available for the 'GPD'.
+    return_periods : array_like (optional)
+        Return periods (in blocks) used to obtain the return values.
+    frec : int or float
+        Return values are obtained with the probability
+        ``frec / return_periods``. Default value is 1.
+    shape : tuple (optional)
+        Shape (time, y, x) of a raw binary ``source``.
+    dtype : str or numpy.dtype
+        Data type of a raw binary ``source``. Default value is 'f8'.
+    offset : int
+        Bytes before the data in a raw binary ``source``. Default value is
+        0.
+    tile_shape : tuple (optional)
+        Number of cells (y, x) of the tiles. By default, tiles are bands of
+        complete rows with about 16384 cells, so the values are read from
+        contiguous regions of the file.
+    max_memory : int
+        Approximate maximum number of bytes of data read at once per tile.
+        Default value is 128 MiB.
+    resume : bool
+        If True (default value), tiles finished by a previous run with the
+        same arguments are not processed again (the run starts over if its
+        output files are missing). If False, the results in ``output_dir``
+        are overwritten.
+    executor : concurrent.futures.Executor
+        Pool used to process the tiles. If it is not provided a
+        ``ProcessPoolExecutor`` with ``max_workers`` processes is created
+        and shutdown at the end.
+    max_workers : int
+        Number of processes of the pool created if ``executor`` is not
+        provided (or number of workers of ``executor``), two tiles per
+        worker are submitted at the same time. Default value is the number
+        of processors.
+    callback : callable (optional)
+        Function called as ``callback(done, total)`` with the number of
+        finished tiles each time a tile is finished.
+    cancel : object with an ``is_set`` method (e.g., ``threading.Event``)
+        The run stops once it is set, without waiting for the running
+        tiles. Finished tiles are kept and the run can be resumed later.
+    max_time : float (optional)
+        Maximum time in seconds. The run stops afterwards as if ``cancel``
+        was set.
+
+    **Returns**
+
+    OrderedDict
+        Dictionary with the arrays 'shape', 'location', 'scale' and
+        'return_values' (read only memmaps of the output files) and
+        'return_periods'. If the run is stopped before processing all the
+        tiles a ``PartialResultWarning`` is issued and the cells not
+        processed have ``numpy.nan`` values.
+    """
+    if model not in _grid_fits:
+        raise ValueError('model should be one of {}.'.format(
+            ', '.join(_grid_fits)))
+    if fit_method not in _grid_fits[model]:
+        raise ValueError('fit_method for {} should be one of {}.'.format(
+            model, ', '.join(_grid_fits[model])))
+    if return_periods is None:
+        return_periods = []
+    return_periods = _np.atleast_1d(_np.asarray(return_periods, dtype=float))
+    q = frec / return_periods
+
+    filename = _os.path.abspath(_os.fspath(source))
+    if shape is None:
+        data = _np.load(filename, mmap_mode='r')
+        source = _SharedArray(data.shape, data.dtype, filename, mode='r')
+        offset = None
+        del data
+    else:
+        source = _SharedArray(shape, dtype, filename, mode='r',
+                              offset=int(offset))
+    if len(source.shape) != 3:
+        raise ValueError('source should be a 3D array (time, y, x).')
+    n_time, ny, nx = source.shape
+    block_size = int(block_size)
+    if block_size < 1:
+        raise ValueError('block_size should be a positive integer.')
+    n_blocks = n_time // block_size
+    if n_blocks == 0:
+        raise ValueError('source should have at least one block.')
+    if tile_shape is None:
+        tile_shape = (max(1, 2**14 // max(nx, 1)), nx)
+    ty, tx = (max(int(t), 1) for t in tile_shape)
+    tiles = [((y, min(y + ty, ny)), (x, min(x + tx, nx)))
+             for y in range(0, ny, ty) for x in range(0, nx, tx)]
+    # whole blocks, at least one
+    max_records = max(int(max_memory) //
+                      (ty * tx * source.dtype.itemsize * block_size), 1)
+    max_records *= block_size
+
+    config = {'source': filename, 'shape': list(source.shape),
+              'dtype': source.dtype.str, 'offset': offset,
+              'block_size': block_size, 'model': model,
+              'fit_method': fit_method,
+              'return_periods': return_periods.tolist(), 'frec': float(frec),
+              'tile_shape': [ty, tx]}
+    _os.makedirs(output_dir, exist_ok=True)
+    checkpoint = _os.path.join(output_dir, 'checkpoint.json')
+    done = []
+    if resume and _os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            state = _json.load(f)
+        if state['config'] != config:
+            raise ValueError('output_dir contains the results of a run with '
+                             'other arguments, use resume=False to '
+                             'overwrite them.')
+        done = [tuple(map(tuple, tile)) for tile in state['done']]
+    out_shapes = OrderedDict(
+        (name, (len(q), ny, nx) if name == 'return_values' else (ny, nx))
+        for name in _raster_outputs)
+    for name, out_shape in out_shapes.items():
+        # the finished tiles are only valid if their results are available,
+        # otherwise the run starts over
+        out_file = _os.path.join(output_dir, name + '.npy')
+        try:
+            valid = _np.load(out_file, mmap_mode='r').shape == out_shape
+        except (OSError, ValueError):
+            valid = False
+        if not valid:
+            done = []
+    outputs = OrderedDict()
+    for name, out_shape in out_shapes.items():
+        out_file = _os.path.join(output_dir, name + '.npy')
+        if not done:
+            out = _np.lib.format.open_memmap(out_file, mode='w+',
+                                             shape=out_shape)
+            out[...] = _np.nan
+            out.flush()
+            del out
+        outputs[name] = _SharedArray(out_shape, filename=out_file)
+    _write_checkpoint(checkpoint, {'config': config, 'done': done})
+
+    finished = set(done)
+    todo = [tile for tile in tiles if tile not in finished]
+    monitor = _Monitor(callback, cancel, max_time, total=len(tiles))
+    own_executor = executor is None and len(todo) > 0
+    if own_executor:
+        executor = _ProcessPoolExecutor(max_workers)
+    pending = set()
+    stopped = False
+    try:
+        max_pending = 2 * (max_workers or _os.cpu_count() or 1)
+        while todo or pending:
+            while todo and len(pending) < max_pending and not stopped:
+                stopped = monitor.stop()
+                if not stopped:
+                    pending.add(executor.submit(
+                        _raster_task, model, fit_method, source, outputs,
+                        q, block_size, n_blocks, todo.pop(0), max_records))
+            if not pending:
+                break
+            # the budget and the cancellation token are checked while the
+            # tiles run
+            completed, pending = _wait(pending, timeout=monitor.timeout(),
+                                       return_when=_FIRST_COMPLETED)
+            for future in completed:
+                done.append(future.result())
+            if completed:
+                _write_checkpoint(checkpoint,
+                                  {'config': config, 'done': done})
+                monitor.progress(len(done))
+            if monitor.stop():
+                # running tiles are abandoned, they are not recorded as
+                # finished
+                stopped = True
+                break
+    finally:
+        # tiles not started yet if a tile failed or the run was stopped
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=not stopped)
+    if len(done) < len(tiles):
+        monitor.warn(len(done))
+
+    results = OrderedDict()
+    for name in _raster_outputs[:3]:
+        results[name] = _np.load(outputs[name].filename, mmap_mode='r')
+    results['return_periods'] = return_periods
+    results['return_values'] = _np.load(outputs['return_values'].filename,
+                                        mmap_mode='r')
+    return results
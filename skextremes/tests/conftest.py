@@ -0,0 +1,25 @@
+"""
+Shared configuration for the tests
+"""
+
+import os
+import shutil
+import tempfile
+
+_old_cache = None
+
+
+def pytest_configure(config):
+    # the datasets are cached in a temporary directory instead of ~/.cache.
+    # Set before collection as some test modules load datasets on import.
+    global _old_cache
+    _old_cache = os.environ.get("SKEXTREMES_CACHE")
+    os.environ["SKEXTREMES_CACHE"] = tempfile.mkdtemp(prefix="skextremes-")
+
+
+def pytest_unconfigure(config):
+    cache = os.environ.pop("SKEXTREMES_CACHE", None)
+    if _old_cache is not None:
+        os.environ["SKEXTREMES_CACHE"] = _old_cache
+    if cache:
+        shutil.rmtree(cache, ignore_errors=True)
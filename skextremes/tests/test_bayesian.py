@@ -0,0 +1,95 @@
+"""
+Tests for bayesian module
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_array_almost_equal
+from scipy import stats
+
+from skextremes.datasets import synthetic
+from skextremes.models import bayesian, classic
+
+
+class TestBayesian:
+
+    def setup_method(self):
+        self.data = synthetic.block_maxima(30, c=-0.1, loc=10, scale=2,
+                                           random_state=3)
+
+    def test_gev(self):
+        model = bayesian.GEV(self.data, return_periods=[10, 100],
+                             n_chains=8, random_state=0)
+        assert model.draws.shape == (8, 1000, 3)
+        assert 0.1 < model.acceptance.mean() < 0.5
+        assert all(abs(r - 1) < 0.05 for r in model.rhat.values())
+        # streaming quantiles are close to those of the draws
+        draws = model.draws.reshape(-1, 3)
+        p = [0.025, 0.5, 0.975]
+        quantiles = model.quantile(p)
+        for i, name in enumerate(('shape', 'location', 'scale')):
+            assert_array_almost_equal(quantiles[name],
+                                      np.quantile(draws[:, i], p), decimal=2)
+        values = stats.genextreme.isf(0.01, *draws.T)
+        assert_array_almost_equal(quantiles['return_values'][1],
+                                  np.quantile(values, p), decimal=1)
+        assert_almost_equal(model.mean['return_values'][1], values.mean())
+        assert model.return_values_ci.shape == (2, 2)
+        low, high = model.return_values_ci.T
+        assert np.all((low < model.return_values) &
+                      (model.return_values < high))
+        # close to the mle
+        mle = classic.GEV(self.data)
+        assert abs(model.loc - mle.loc) < 0.3
+        assert abs(model.scale - mle.scale) < 0.3
+
+    def test_parallel_chains_and_priors(self):
+        with ThreadPoolExecutor(2) as executor:
+            model = bayesian.Gumbel(
+                self.data, return_periods=[50], n_chains=6, n_burn=500,
+                thin=2, store_draws=False, executor=executor, n_tasks=3,
+                random_state=1, prior={'location': stats.norm(10, 5)}
+            )
+        assert model.draws is None
+        assert model.acceptance.shape == (6,)
+        assert model.params_ci['shape'] == (0, 0)
+        assert np.isnan(model.rhat['shape'])
+        expected = classic.Gumbel(self.data)
+        assert abs(model.loc - expected.loc) < 0.3
+        low, high = model.return_values_ci[0]
+        assert low < model.return_values[0] < high
+        # a strong prior moves the posterior
+        model = bayesian.GEV(self.data, n_chains=4, n_draws=500,
+                             n_burn=500, random_state=2,
+                             prior={'shape': stats.norm(0.3, 0.01)})
+        assert abs(model.c - 0.3) < 0.05
+        with pytest.raises(ValueError):
+            bayesian.GEV(self.data, prior={'tail': stats.norm()})
+
+    def test_histogram_merge(self):
+        rng = np.random.default_rng(0)
+        values = rng.standard_cauchy((4000, 2))
+        single = bayesian._Histogram([-1, 0], [1, 1], 64)
+        single.add(values)
+        a = bayesian._Histogram([-1, 0], [1, 1], 64)
+        b = bayesian._Histogram([-1, 0], [1, 1], 64)
+        a.add(values[:100])
+        b.add(values[100:3000])
+        b.add(values[3000:])
+        a.merge(b)
+        assert a.counts.sum() == single.counts.sum() == values.size
+        assert_array_almost_equal(a.mean, values.mean(axis=0))
+        assert_array_almost_equal(a.std, values.std(axis=0, ddof=1))
+        # the bins are unions of the initial ones, the counts are exact
+        for h in (a, single):
+            edges = h.lo[:, None] + np.arange(65) * h.width[:, None]
+            for i in range(2):
+                assert_array_almost_equal(
+                    h.counts[i], np.histogram(values[:, i], edges[i])[0]
+                )
+        p = [0.1, 0.5, 0.9]
+        assert np.all(np.abs(a.quantile(p) - np.quantile(values, p, axis=0))
+                      <= a.width)
@@ -2,8 +2,13 @@
 Tests for classic module
 """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+import numpy as np
 from numpy.testing import assert_almost_equal, assert_array_almost_equal
+from scipy import optimize, stats
 from skextremes.models.classic import GEV, Gumbel
 from skextremes.datasets import portpirie, fremantle
 
@@ -57,6 +62,152 @@ class TestGEV:
         assert ax3.has_data()
         assert ax4.has_data()
 
+    @pytest.mark.parametrize(
+        "fit_method, ci_method",
+        [("lmoments", "bca"), ("lmoments", "studentized"), ("mom", "bca")],
+    )
+    def test_resampling_ci(self, fit_method, ci_method):
+        np.random.seed(1234)
+        model = GEV(
+            datasets[0], fit_method=fit_method, ci=0.05, ci_method=ci_method,
+            return_periods=[50],
+        )
+        for name, value in model.params.items():
+            low, high = model.params_ci[name]
+            assert low < value < high
+        # return value for T = 50 years
+        assert model._ci_Td[499] < model.return_values[0] < model._ci_Tu[499]
+
+    def test_resampling_ci_batches(self, monkeypatch):
+        # the bootstrap samples are fitted many at a time
+        rows = []
+        fit_samples = GEV._fit_samples
+
+        def spy(self, samples):
+            rows.append(len(samples))
+            return fit_samples(self, samples)
+
+        monkeypatch.setattr(GEV, "_fit_samples", spy)
+        np.random.seed(1234)
+        data = np.tile(datasets[0], 5)
+        GEV(data, fit_method="lmoments", ci=0.05, ci_method="bca",
+            n_samples=1000)
+        assert max(rows) > 100
+
+    def test_resampling_ci_method(self):
+        with pytest.raises(ValueError):
+            GEV(datasets[0], fit_method="mle", ci=0.05,
+                ci_method="studentized")
+
+    def test_adaptive_ci(self):
+        np.random.seed(1234)
+        model = GEV(
+            datasets[0], fit_method="lmoments", ci=0.05, ci_method="bca",
+            ci_tol=0.2, n_samples=2000,
+        )
+        assert model.ci_converged
+        assert model.ci_n_samples < 2000
+        model = GEV(
+            datasets[0], fit_method="lmoments", ci=0.05, ci_method="bca",
+            ci_tol=0.001, n_samples=300,
+        )
+        assert not model.ci_converged
+        assert model.ci_n_samples == 300
+
+    def test_ci_cancel(self):
+        cancel = threading.Event()
+
+        def callback(done, total):
+            if done >= 20:
+                cancel.set()
+
+        np.random.seed(1234)
+        with pytest.warns(UserWarning):
+            model = GEV(
+                datasets[0], fit_method="mom", ci=0.05, ci_method="bca",
+                ci_callback=callback, ci_cancel=cancel,
+            )
+        assert model.ci_partial
+        assert model.ci_n_samples < model.n_samples
+        low, high = model.params_ci["location"]
+        assert low < model.params["location"] < high
+
+
+    def test_profile_ci(self):
+        data = datasets[0]
+        model = GEV(data, fit_method="mle", ci=0.05, ci_method="profile",
+                    return_periods=[10, 100])
+        delta = GEV(data, fit_method="mle", ci=0.05, ci_method="delta",
+                    return_periods=[10, 100])
+        for name, value in model.params.items():
+            low, high = model.params_ci[name]
+            assert low < value < high
+        # the deviance at the bounds of the shape is the chi2 quantile
+        nll = lambda p: -stats.genextreme.logpdf(data, *p).sum()
+        nll_min = optimize.minimize(
+            nll, [model.c, model.loc, model.scale], method="Nelder-Mead"
+        ).fun
+        for bound in model.params_ci["shape"]:
+            res = optimize.minimize(
+                lambda p: nll([bound, p[0], p[1]]), [model.loc, model.scale],
+                method="Nelder-Mead", options={"xatol": 1e-9, "fatol": 1e-11}
+            )
+            assert_almost_equal(2 * (res.fun - nll_min),
+                                stats.chi2.ppf(0.95, 1), decimal=3)
+        # return levels, intervals are asymmetric (longer upper tail)
+        assert model.return_values_ci.shape == (2, 2)
+        low, high = model.return_values_ci.T
+        assert np.all(low < model.return_values)
+        assert np.all(model.return_values < high)
+        assert high[1] - model.return_values[1] > \
+            model.return_values[1] - low[1]
+        assert_array_almost_equal(model._ci_Td[[99, 999]], low)
+        assert_array_almost_equal(model._ci_Tu[[99, 999]], high)
+        assert_array_almost_equal(
+            model._ci_Td[99], delta._ci_Td[99], decimal=1
+        )
+
+    def test_profile_ci_short_return_periods(self):
+        # return periods not longer than frec are not profiled
+        model = GEV(datasets[0], fit_method="mle", ci=0.05,
+                    ci_method="profile", frec=2,
+                    return_periods=[1, 2, 10, 100])
+        assert np.all(np.isnan(model.return_values_ci[:2]))
+        expected = GEV(datasets[0], fit_method="mle", ci=0.05,
+                       ci_method="profile", frec=2, return_periods=[10, 100])
+        assert_array_almost_equal(model.return_values_ci[2:],
+                                  expected.return_values_ci)
+
+    def test_profile_ci_executor_and_cancel(self):
+        model = GEV(datasets[1], ci=0.05, ci_method="profile",
+                    return_periods=[50])
+        with ThreadPoolExecutor(2) as executor:
+            parallel = GEV(datasets[1], ci=0.05, ci_method="profile",
+                           return_periods=[50], ci_executor=executor)
+        assert_array_almost_equal(parallel.return_values_ci,
+                                  model.return_values_ci)
+        assert_array_almost_equal(parallel._ci_Tu, model._ci_Tu)
+
+        # out of time, the tasks running are not waited for
+        with ThreadPoolExecutor(2) as executor:
+            with pytest.warns(UserWarning):
+                model = GEV(datasets[1], ci=0.05, ci_method="profile",
+                            ci_executor=executor, ci_max_time=0)
+        assert model.ci_partial
+
+        cancel = threading.Event()
+
+        def callback(done, total):
+            if done >= 3:
+                cancel.set()
+
+        with pytest.warns(UserWarning):
+            model = GEV(datasets[1], ci=0.05, ci_method="profile",
+                        ci_callback=callback, ci_cancel=cancel)
+        assert model.ci_partial
+        low, high = model.params_ci["shape"]
+        assert low < model.c < high
+
 
 # Expected results for Gumbel
 # The following values are obtained using ismev and extRemes R packages
@@ -104,3 +255,53 @@ class TestGumbel:
         assert ax2.has_data()
         assert ax3.has_data()
         assert ax4.has_data()
+
+    @pytest.mark.parametrize(
+        "fit_method, ci_method",
+        [("lmoments", "bca"), ("lmoments", "studentized"), ("mom", "bca")],
+    )
+    def test_resampling_ci(self, fit_method, ci_method):
+        np.random.seed(1234)
+        model = Gumbel(
+            datasets[0], fit_method=fit_method, ci=0.05, ci_method=ci_method,
+            return_periods=[50],
+        )
+        for name, value in model.params.items():
+            if name == "shape":
+                # fixed to 0
+                continue
+            low, high = model.params_ci[name]
+            assert low < value < high
+        # return value for T = 50 years
+        assert model._ci_Td[499] < model.return_values[0] < model._ci_Tu[499]
+
+    def test_resampling_ci_batches(self, monkeypatch):
+        # the bootstrap samples are fitted many at a time
+        rows = []
+        fit_samples = GEV._fit_samples
+
+        def spy(self, samples):
+            rows.append(len(samples))
+            return fit_samples(self, samples)
+
+        monkeypatch.setattr(GEV, "_fit_samples", spy)
+        np.random.seed(1234)
+        data = np.tile(datasets[0], 5)
+        GEV(data, fit_method="lmoments", ci=0.05, ci_method="bca",
+            n_samples=1000)
+        assert max(rows) > 100
+
+    def test_resampling_ci_method(self):
+        with pytest.raises(ValueError):
+            Gumbel(datasets[0], fit_method="mle", ci=0.05,
+                ci_method="studentized")
+
+    def test_profile_ci(self):
+        model = Gumbel(datasets[0], ci=0.05, ci_method="profile",
+                       return_periods=[50])
+        assert model.params_ci["shape"] == (0, 0)
+        for name in ("location", "scale"):
+            low, high = model.params_ci[name]
+            assert low < model.params[name] < high
+        low, high = model.return_values_ci[0]
+        assert low < model.return_values[0] < high
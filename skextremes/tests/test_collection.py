@@ -0,0 +1,70 @@
+"""
+Tests for collection module
+"""
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from skextremes.datasets import synthetic
+from skextremes.models import classic, engineering
+from skextremes.models.collection import ModelCollection
+
+
+class TestModelCollection:
+
+    def setup_method(self):
+        self.models = [
+            classic.GEV(synthetic.block_maxima(40, c=-0.1, loc=10, scale=2,
+                                               random_state=i),
+                        ci=0.05, ci_method='delta')
+            for i in range(3)
+        ]
+        self.models.append(
+            classic.Gumbel(synthetic.block_maxima(40, 'Gumbel', loc=10,
+                                                  scale=2, random_state=9),
+                           ci=0.05, ci_method='delta'))
+        self.models.append(engineering.Lieblein(
+            synthetic.block_maxima(20, 'Gumbel', random_state=9)))
+        self.collection = ModelCollection.from_models(self.models,
+                                                      names=list('abcde'))
+
+    def test_return_level(self):
+        values = self.collection.return_level([50, 100])
+        assert values.shape == (5, 2)
+        for model, value in zip(self.models, values):
+            assert_array_almost_equal(value, model.distr.isf([0.02, 0.01]))
+        # delta method confidence intervals like the models
+        values, lower, upper = self.collection.return_level(50, ci=0.05)
+        for i, model in enumerate(self.models[:4]):
+            # index of the 50 years return period
+            assert_array_almost_equal(lower[i], model._ci_Td[499])
+            assert_array_almost_equal(upper[i], model._ci_Tu[499])
+        assert np.isnan(lower[4])
+
+    def test_views_and_subsets(self, tmp_path):
+        collection = self.collection
+        assert len(collection) == 5
+        view = collection['e']
+        assert view.fit_method == 'Lieblein' and view.n == 20
+        assert_array_almost_equal(view.return_level(50),
+                                  self.models[4].return_level(50))
+        assert_array_almost_equal(collection[-1].isf(0.01),
+                                  self.models[4].distr.isf(0.01))
+        assert collection.cdf([12, 13]).shape == (5, 2)
+        assert_array_almost_equal(collection[0].cdf(12),
+                                  self.models[0].cdf(12))
+        subset = collection[1:3]
+        assert list(subset.names) == ['b', 'c']
+        assert_array_almost_equal(subset.isf(0.01), collection.isf(0.01)[1:3])
+        with pytest.raises(KeyError):
+            collection['z']
+        filename = str(tmp_path / 'models.npz')
+        collection.save(filename)
+        loaded = ModelCollection.load(filename)
+        assert list(loaded.names) == list(collection.names)
+        assert_array_almost_equal(loaded.cov, collection.cov)
+        # compact
+        big = ModelCollection(np.zeros(100000), 10, 2)
+        assert big.nbytes < 250 * len(big)
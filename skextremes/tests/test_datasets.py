@@ -2,6 +2,7 @@
 Tests for datasets module
 """
 
+import importlib
 import unittest
 
 import numpy as np
@@ -50,3 +51,73 @@ def test_dataset_asarray():
 def test_dataset_has_fields():
     for dataset in datasets:
         assert hasattr(dowjones(), "fields")
+
+def test_dataset_cache(tmp_path, monkeypatch):
+    ds = importlib.import_module("skextremes.datasets.datasets")
+
+    monkeypatch.setenv("SKEXTREMES_CACHE", str(tmp_path))
+    expected = np.loadtxt(ds._os.path.join(ds._path, "rain.csv"))
+    first = rain().asarray()
+    cached = list(tmp_path.glob("rain-*.npy"))
+    assert len(cached) == 1
+    second = rain().asarray()
+    assert isinstance(second, np.memmap)
+    assert not second.flags.writeable
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+
+    # a stale cache (other checksum) is replaced
+    stale = tmp_path / "rain-0000000000000000.npy"
+    cached[0].rename(stale)
+    np.testing.assert_array_equal(rain().asarray(), expected)
+    assert not stale.exists()
+    assert len(list(tmp_path.glob("rain-*.npy"))) == 1
+
+def test_dataset_no_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKEXTREMES_CACHE", "")
+    data = venice().asarray()
+    assert not isinstance(data, np.memmap)
+    assert np.isnan(data["r10"]).sum() == 1
+
+
+def test_dataset_structured():
+    for dataset, fields in ((dowjones, ("date", "index")),
+                            (exchange, ("date", "rate_UK_US", "rate_UK_CAN"))):
+        ds = dataset()
+        data = ds.asarray()
+        assert data.dtype.names == fields
+        date = ds.fields.date
+        assert date.dtype == np.dtype("datetime64[D]")
+        assert np.all(np.diff(date) > np.timedelta64(0, "D"))
+        for field in fields[1:]:
+            values = getattr(ds.fields, field)
+            assert values.dtype == np.float64
+            # views of the structured array, not copies
+            assert np.shares_memory(values, data)
+    assert dowjones().fields.date[0] == np.datetime64("1995-09-11")
+    assert exchange().fields.rate_UK_US[0] == 1.6865
+    ven = venice()
+    assert ven.fields.year.dtype.kind == "i"
+    assert ven.fields.year[0] == 1931
+    assert np.isnan(ven.fields.r07[ven.fields.year == 1935])
+
+def test_registry():
+    from skextremes.datasets import registry
+
+    assert registry.names() == [d.__name__ for d in datasets]
+    assert len(registry) == len(datasets)
+    for record in registry:
+        # metadata without loading the data
+        fields, dtype, shape = record.fields, record.dtype, record.shape
+        assert isinstance(record.source, str) and record.source
+        assert record.description
+        if record.name != "harris1996":
+            assert record._dataset is None
+        data = record.data.asarray()
+        assert record.data is record.data
+        assert data.dtype == dtype
+        assert data.shape == shape
+        assert fields == tuple(vars(record.data.fields))
+    assert "rain" in registry
+    assert registry["rain"].filename.endswith("rain.csv")
+    assert registry["harris1996"].filename is None
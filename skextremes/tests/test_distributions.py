@@ -0,0 +1,87 @@
+"""
+Tests for distributions module
+"""
+
+import pickle
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy import stats
+
+from skextremes.datasets import synthetic
+from skextremes.models import classic
+from skextremes.models.distributions import (GEVDistribution,
+                                             GumbelDistribution, _gev_nll)
+
+
+@pytest.mark.parametrize("c", [-0.5, -1e-9, 0, 1e-9, 0.3, 1.5])
+def test_gev_against_scipy(c):
+    distr = GEVDistribution(c, loc=2, scale=3)
+    frozen = stats.genextreme(c, loc=2, scale=3)
+    # values inside and outside the support
+    x = np.linspace(-20, 40, 601)
+    for method in ("pdf", "logpdf", "cdf", "sf"):
+        assert_allclose(getattr(distr, method)(x),
+                        getattr(frozen, method)(x), rtol=1e-7, atol=1e-300)
+    q = np.r_[0, 1e-12, np.linspace(0.01, 0.99, 50), 1 - 1e-12, 1]
+    for method in ("ppf", "isf"):
+        assert_allclose(getattr(distr, method)(q),
+                        getattr(frozen, method)(q), rtol=1e-7)
+    # methods delegated to scipy
+    assert_allclose(distr.stats("mv"), frozen.stats("mv"))
+
+
+def test_gumbel_and_broadcasting():
+    distr = GumbelDistribution(loc=2, scale=3)
+    frozen = stats.gumbel_r(loc=2, scale=3)
+    assert_allclose(distr.cdf([0, 5, 50]), frozen.cdf([0, 5, 50]))
+    assert isinstance(distr.isf(0.01), float)
+    assert np.isnan(distr.pdf(np.nan))
+    # many models at once
+    c = np.array([-0.1, 0, 0.2])
+    distr = GEVDistribution(c, loc=10, scale=[1, 2, 3])
+    values = distr.isf([[0.1], [0.01]])
+    assert values.shape == (2, 3)
+    for i in range(3):
+        assert_allclose(values[:, i], stats.genextreme.isf(
+            [0.1, 0.01], c[i], loc=10, scale=i + 1))
+    assert distr.rvs(random_state=1).shape == (3,)
+    sample = GEVDistribution(0.1, 2, 3).rvs(20000, random_state=0)
+    assert stats.kstest(sample, stats.genextreme(0.1, 2, 3).cdf).pvalue > 0.01
+    assert np.all(np.isnan(GEVDistribution(0.1, 0, -1).cdf([1, 2])))
+    restored = pickle.loads(pickle.dumps(distr))
+    assert_allclose(restored.isf(0.01), distr.isf(0.01))
+
+
+def test_nll():
+    data = synthetic.block_maxima(30, c=-0.1, loc=10, scale=2,
+                                  random_state=3)
+    model = classic.GEV(data)
+    params = np.array([[model.c, model.loc, model.scale],
+                       [1e-9, model.loc, model.scale],
+                       [0, model.loc, model.scale],
+                       [0.5, model.loc, model.scale],
+                       [model.c, model.loc, -1]])
+    nll, grad = _gev_nll(data, *(params[:, i, None] for i in range(3)),
+                         grad=True)
+    for i in range(3):
+        expected = -stats.genextreme.logpdf(data, *params[i]).sum()
+        assert_allclose(nll[i], expected, rtol=1e-10)
+    assert_allclose(nll[0], model._nnlf([-model.c, model.loc, model.scale]))
+    assert_allclose(nll[2], model._nnlf([model.loc, model.scale]))
+    # values out of the support and invalid scales
+    assert np.all(nll[3:] == np.inf)
+    assert np.all(np.isnan(grad[0][3:]))
+    # gradient of the values, finite differences
+    for j in range(3):
+        shifted = params[:2].copy()
+        shifted[:, j] += 1e-6
+        diff = (_gev_nll(data, *(shifted[:, i, None] for i in range(3))) -
+                nll[:2]) / 1e-6
+        assert_allclose(grad[j][:2].sum(axis=1), diff, rtol=1e-4, atol=1e-4)
+    # missing values
+    mask = np.arange(len(data)) < 20
+    assert_allclose(_gev_nll(np.where(mask, data, np.nan), *params[0],
+                             mask=mask), _gev_nll(data[:20], *params[0]))
@@ -7,9 +7,16 @@ import warnings
 
 warnings.filterwarnings("always")
 
-from numpy.testing import assert_almost_equal
+import numpy as np
+from scipy import stats
+from numpy.testing import assert_almost_equal, assert_array_almost_equal
 
-from skextremes.models.engineering import Harris1996, Lieblein, PPPLiterature
+from skextremes.models.engineering import (
+    Harris1996,
+    Lieblein,
+    PPPLiterature,
+    batch_fit,
+)
 from skextremes.datasets import harris1996
 
 
@@ -148,3 +155,134 @@ class TestPPPLiterature:
             pli = PPPLiterature(self.extremes, ppp=how)
             assert pli.ppp == how
             assert bool(pli.results.keys())
+
+    def test_ppp_all(self):
+        # The one pass comparison should match the individual fits
+        pli = PPPLiterature(self.extremes, preconditioning=2)
+        table = pli._ppp_all()
+        assert sorted(table["method"]) == sorted(self.hows)
+        assert all(np.diff(table["R2"]) <= 0)
+        for row in table:
+            single = PPPLiterature(
+                self.extremes, preconditioning=2, ppp=row["method"]
+            )
+            assert_almost_equal(row["slope"], single.results["slope"])
+            assert_almost_equal(row["offset"], single.results["offset"])
+            assert_almost_equal(row["R2"], single.results["R2"])
+            assert_array_almost_equal(
+                row["return_values"],
+                single.results["Values for return period from 2 to 100 years"],
+            )
+
+
+class TestBatchFit:
+    def setup_method(self):
+        self.extremes = harris1996().fields.harris1996
+
+    @pytest.mark.parametrize(
+        "method, model",
+        [("Harris1996", Harris1996), ("Lieblein", Lieblein),
+         ("PPPLiterature", PPPLiterature)],
+    )
+    def test_results(self, method, model):
+        # Each row should match the fit of the single series
+        data = np.vstack((self.extremes, self.extremes[::-1] * 1.1))
+        results = batch_fit(data, method=method, preconditioning=2)
+        assert len(results) == 2
+        assert all(results["error"] == "")
+        single = model(data[1], preconditioning=2)
+        assert_almost_equal(results["slope"][1], single.results["slope"])
+        assert_almost_equal(results["offset"][1], single.results["offset"])
+        # R2 of the line fitted by the method (not a least squares line
+        # for Harris1996 and Lieblein)
+        Y, values = single.results["Y"], single.results["data"]
+        fitted = single.results["offset"] + single.results["slope"] * Y
+        R2 = 1 - (np.sum((values - fitted) ** 2) /
+                  np.sum((values - values.mean()) ** 2))
+        assert_almost_equal(results["R2"][1], R2)
+        R2_lsq = stats.linregress(Y, values).rvalue ** 2
+        assert results["R2"][1] <= R2_lsq + 1e-12
+
+    def test_errors_per_row(self):
+        data = [self.extremes, [1.0], self.extremes[:10], [np.nan, 1, 2]]
+        results = batch_fit(data, method="Lieblein")
+        assert list(results["N"]) == [21, 1, 10, 3]
+        assert results["error"][0] == ""
+        assert results["error"][1] != ""
+        assert results["error"][2] == ""
+        assert results["error"][3] != ""
+        assert np.isnan(results["slope"][1])
+        assert np.isnan(results["slope"][3])
+
+
+class TestReturnPeriods:
+    def setup_method(self):
+        self.extremes = harris1996().fields.harris1996
+
+    @pytest.mark.parametrize("model", [Harris1996, Lieblein, PPPLiterature])
+    def test_return_periods(self, model):
+        default = model(self.extremes, preconditioning=2)
+        custom = model(
+            self.extremes, preconditioning=2,
+            return_periods=[50, 1000, 10000]
+        )
+        assert custom.return_values.shape == (3,)
+        assert_array_almost_equal(
+            custom.return_values, default.return_level([50, 1000, 10000])
+        )
+        assert_almost_equal(default.return_level(50), default.return_values[48])
+        assert isinstance(default.return_level(50), float)
+        assert default.return_level([50]).shape == (1,)
+        assert np.all(np.diff(custom.return_values) > 0)
+        fig, ax1, ax2, ax3 = custom.plot_summary()
+        assert ax2.has_data()
+
+
+class TestBootstrapCI:
+    def setup_method(self):
+        self.extremes = harris1996().fields.harris1996
+
+    @pytest.mark.parametrize("model", [Harris1996, Lieblein, PPPLiterature])
+    def test_ci(self, model):
+        m = model(self.extremes, preconditioning=2, ci=0.1, random_state=1)
+        assert m._ci_Td.shape == m.return_values.shape
+        assert np.all(m._ci_Td < m.return_values)
+        assert np.all(m._ci_Tu > m.return_values)
+        lo, up = m.params_ci["location"]
+        assert lo < m.loc < up
+        # reproducible with the same seed
+        m2 = model(self.extremes, preconditioning=2, ci=0.1, random_state=1)
+        assert_array_almost_equal(m._ci_Tu, m2._ci_Tu)
+        fig, ax1, ax2, ax3 = m.plot_summary()
+        assert ax2.has_data()
+
+    def test_ci_input(self):
+        with pytest.raises(ValueError):
+            Lieblein(self.extremes, ci=5)
+
+
+class TestSearchPreconditioning:
+    @pytest.mark.parametrize("model", [Harris1996, Lieblein, PPPLiterature])
+    @pytest.mark.parametrize("criterion", ["R2", "likelihood"])
+    def test_search(self, model, criterion):
+        # Square root of Gumbel quantiles should prefer an exponent of 2
+        N = 30
+        data = np.sqrt(
+            stats.gumbel_r.ppf(np.arange(1, N + 1) / (N + 1), 100, 40)
+        )
+        m = model(data)
+        exponents = [1, 2, 4]
+        best, scores = m.search_preconditioning(exponents, criterion)
+        assert best == 2
+        assert scores.shape == (3,)
+        # scores match the individual fits
+        if criterion == "R2" and model is PPPLiterature:
+            m2 = model(data, preconditioning=2)
+            assert_almost_equal(scores[1], m2.results["R2"])
+
+    def test_input(self):
+        m = Lieblein(harris1996().fields.harris1996)
+        with pytest.raises(ValueError):
+            m.search_preconditioning([0, 1])
+        with pytest.raises(ValueError):
+            m.search_preconditioning(criterion="foo")
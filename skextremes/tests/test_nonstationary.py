@@ -0,0 +1,88 @@
+"""
+Tests for nonstationary module
+"""
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_array_almost_equal
+from scipy import optimize, stats
+
+from skextremes.models import classic, nonstationary
+
+
+class TestNonStationary:
+
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.years = np.arange(60.)
+        self.index = rng.normal(size=60)
+        loc = 10 + 0.05 * self.years + 0.8 * self.index
+        scale = 2 * np.exp(0.005 * self.years)
+        self.data = np.array([
+            stats.genextreme.rvs(-0.1, loc=loc, scale=scale, random_state=i)
+            for i in range(20)
+        ])
+
+    def test_gev_mle(self):
+        x = self.data[0]
+        covariates = np.column_stack([self.years + 1960, self.index])
+        model = nonstationary.GEV(x, covariates, scale_covariates=[0],
+                                  ci=0.05)
+        assert model.converged
+        assert model.coef['location'].shape == (3,)
+        assert model.coef['log_scale'].shape == (2,)
+        assert model.coef_ci['shape'].shape == (1, 2)
+
+        def nll(theta):
+            loc = theta[0] + covariates @ theta[1:3]
+            scale = np.exp(theta[3] + theta[4] * covariates[:, 0])
+            return -stats.genextreme.logpdf(x, theta[5], loc, scale).sum()
+
+        res = optimize.minimize(nll, model.theta, method='Nelder-Mead',
+                                options={'xatol': 1e-10, 'fatol': 1e-12})
+        assert_almost_equal(model.nllh, res.fun, decimal=6)
+        assert_almost_equal(model.nllh, nll(model.theta))
+        assert model.nllh < model.nllh_stationary
+        # stationary model
+        stationary = nonstationary.GEV(x)
+        expected = classic.GEV(x)
+        assert_array_almost_equal(
+            stationary.theta,
+            [expected.loc, np.log(expected.scale), expected.c], decimal=4
+        )
+        assert_almost_equal(stationary.nllh, model.nllh_stationary)
+
+    def test_many_series(self):
+        data = self.data.copy()
+        data[3, :10] = np.nan
+        model = nonstationary.GEV(data, self.years, shape_covariates=True,
+                                  ci=0.05)
+        assert model.converged.all()
+        assert model.coef['shape'].shape == (20, 2)
+        single = nonstationary.GEV(data[3, 10:], self.years[10:],
+                                   shape_covariates=True)
+        assert_array_almost_equal(model.theta[3], single.theta)
+        # effective return levels
+        values, low, high = model.return_level([10, 100], [[0], [59]],
+                                               ci=0.05)
+        assert values.shape == (20, 2, 2)
+        assert np.all((low < values) & (values < high))
+        # positive trends on average
+        assert np.mean(values[:, 1] > values[:, 0]) > 0.5
+        assert_array_almost_equal(
+            values[:, 1, 1], model.distr([59]).isf(0.01)[:, 0]
+        )
+        assert_array_almost_equal(model.loc[:, 59],
+                                  model.params([59])['location'][:, 0])
+        # per series covariates
+        per_series = nonstationary.Gumbel(
+            self.data[:2], np.broadcast_to(self.years[:, None], (2, 60, 1))
+        )
+        shared = nonstationary.Gumbel(self.data[:2], self.years)
+        assert 'shape' not in shared.coef
+        assert_array_almost_equal(per_series.theta, shared.theta)
+        with pytest.raises(ValueError):
+            nonstationary.Gumbel(self.data, self.years, loc_covariates=[1])
+        with pytest.raises(ValueError):
+            nonstationary.GEV(self.data, self.years[:10])
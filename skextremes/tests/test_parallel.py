@@ -0,0 +1,241 @@
+"""
+Tests for parallel module
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from skextremes.datasets import synthetic
+from skextremes import parallel
+from skextremes.models import classic, engineering
+from skextremes.parallel import fit_all, fit_grid, fit_many, fit_raster
+from skextremes.utils import PartialResultWarning, gev_lmomfit
+
+
+def _params(model):
+    return model.c, model.loc, model.scale
+
+
+def _run(coroutine):
+    # asyncio.run is not available in Python 3.6
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def _series(n):
+    return [synthetic.block_maxima(30, c=-0.1, loc=10, scale=2,
+                                   random_state=i) for i in range(n)]
+
+
+def test_fit_all_process_pool():
+    series = _series(10)
+    results = _run(fit_all(series, 'GEV', fit_method='lmoments',
+                           batch_size=3, max_workers=2))
+    for data, model in zip(series, results):
+        assert_array_almost_equal(
+            _params(model), _params(classic.GEV(data, fit_method='lmoments'))
+        )
+    # only the parameters are sent back
+    results = _run(fit_all(series, 'Lieblein', max_workers=2,
+                           reduce=_params, return_periods=[50]))
+    for data, params in zip(series, results):
+        assert_array_almost_equal(params, _params(engineering.Lieblein(data)))
+
+
+def test_fit_many_backpressure_and_errors():
+    lock = threading.Lock()
+    read = []
+
+    async def source():
+        for i, data in enumerate(_series(20)):
+            with lock:
+                read.append(i)
+            yield data if i != 5 else [1.0]
+
+    async def run():
+        out = {}
+        with ThreadPoolExecutor(2) as executor:
+            async for i, result in fit_many(
+                    source(), 'Gumbel', fit_method='lmoments', batch_size=2,
+                    max_pending=2, executor=executor, return_exceptions=True):
+                # never more than max_pending batches read ahead
+                assert len(read) <= len(out) + 1 + 2 * 2
+                out[i] = result
+        return out
+
+    out = _run(run())
+    assert sorted(out) == list(range(20))
+    assert isinstance(out[5], Exception)
+    assert all(isinstance(out[i], classic.Gumbel) for i in out if i != 5)
+
+    async def fail():
+        with ThreadPoolExecutor(1) as executor:
+            return await fit_all([[1.0]], 'Lieblein', executor=executor)
+
+    with pytest.raises(Exception):
+        _run(fail())
+    with pytest.raises(ValueError):
+        _run(fit_all([], 'Normal'))
+
+
+def test_fit_many_flush_interval():
+    # the source waits for the results of the first datasets, incomplete
+    # batches are submitted after flush_interval
+    async def run():
+        received = asyncio.Event()
+
+        async def source():
+            for i, data in enumerate(_series(6)):
+                if i == 3:
+                    await received.wait()
+                yield data
+
+        out = {}
+        with ThreadPoolExecutor(2) as executor:
+            async for i, result in fit_many(
+                    source(), 'Gumbel', fit_method='lmoments', batch_size=8,
+                    flush_interval=0.05, executor=executor):
+                out[i] = result
+                if len(out) == 3:
+                    received.set()
+        return out
+
+    out = _run(asyncio.wait_for(run(), 10))
+    assert sorted(out) == list(range(6))
+    with pytest.raises(ValueError):
+        _run(fit_all([], 'Gumbel', flush_interval=-1))
+
+
+def test_fit_grid(tmp_path, monkeypatch):
+    data = np.array(_series(40))
+    data[3, 20:] = np.nan
+    results = fit_grid(data, 'GEV', return_periods=[10, 100], max_workers=2,
+                       chunk_size=7)
+    c, loc, scale = gev_lmomfit(data, axis=1)
+    assert_array_almost_equal(results['shape'], c)
+    assert_array_almost_equal(results['location'], loc)
+    assert_array_almost_equal(results['scale'], scale)
+    assert results['return_values'].shape == (40, 2)
+    model = classic.GEV(data[0], fit_method='lmoments',
+                        return_periods=[10, 100])
+    assert_array_almost_equal(results['return_values'][0],
+                              model.return_values)
+    return_values = results['return_values']
+    # from a .npy file using mle
+    filename = str(tmp_path / 'grid.npy')
+    np.save(filename, data[:4])
+    with ThreadPoolExecutor(2) as executor:
+        results = fit_grid(filename, 'Gumbel', 'mle', executor=executor)
+    for i in range(4):
+        model = classic.Gumbel(data[i][np.isfinite(data[i])])
+        assert_array_almost_equal(
+            (results['location'][i], results['scale'][i]),
+            (model.loc, model.scale), decimal=4
+        )
+    # temporary files instead of shared memory (Python < 3.8)
+    monkeypatch.setattr(parallel, '_shared_memory', None)
+    monkeypatch.setattr(parallel._tempfile, 'tempdir', str(tmp_path))
+    with ThreadPoolExecutor(2) as executor:
+        results = fit_grid(data, 'GEV', return_periods=[10, 100],
+                           executor=executor, max_workers=2)
+    assert_array_almost_equal(results['shape'], c)
+    assert_array_almost_equal(results['return_values'], return_values)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['grid.npy']
+    with pytest.raises(ValueError):
+        fit_grid(data, 'GPD', 'mle')
+    with pytest.raises(ValueError):
+        fit_grid(data[0], 'GEV')
+
+
+def test_fit_raster(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.gumbel(10, 2, size=(100 * 20 + 30, 9, 7))
+    data[:150, 3, 4] = np.nan
+    source = str(tmp_path / 'raster.bin')
+    data.astype('f4').tofile(source)
+    kwargs = dict(block_size=100, model='Gumbel', return_periods=[50],
+                  shape=data.shape, dtype='f4', tile_shape=(4, 4),
+                  max_memory=2**12)
+    # block maxima and fits like fit_grid
+    maxima = np.fmax.reduce(
+        data[:2000].astype('f4').reshape(20, 100, -1), axis=1).T
+    expected = fit_grid(maxima, 'Gumbel', return_periods=[50],
+                        executor=ThreadPoolExecutor(1))
+
+    cancel = threading.Event()
+    progress = []
+
+    def callback(done, total):
+        progress.append((done, total))
+        cancel.set()
+
+    output_dir = str(tmp_path / 'out')
+    with ThreadPoolExecutor(1) as executor:
+        with pytest.warns(PartialResultWarning):
+            results = fit_raster(source, output_dir, executor=executor,
+                                 callback=callback, cancel=cancel, **kwargs)
+        # no more tiles are started
+        n_done = progress[-1][0]
+        assert 1 <= n_done < 6
+        assert 0 < np.isnan(results['scale']).sum() < 63
+        # resume from the checkpoint
+        results = fit_raster(source, output_dir, executor=executor,
+                             callback=callback, **kwargs)
+    # only the remaining tiles are processed
+    assert progress[-1] == (6, 6)
+    assert all(done > n_done for done, _ in progress[progress.index(
+        (n_done, 6)) + 1:])
+    assert_array_almost_equal(results['location'].ravel(),
+                              expected['location'])
+    assert_array_almost_equal(results['scale'].ravel(), expected['scale'])
+    assert results['return_values'].shape == (1, 9, 7)
+    assert_array_almost_equal(results['return_values'].reshape(1, -1),
+                              expected['return_values'].T)
+    # other arguments with the same output directory
+    with pytest.raises(ValueError):
+        fit_raster(source, output_dir, **dict(kwargs, block_size=50))
+    # the checkpoint is not trusted if the outputs are missing
+    (tmp_path / 'out' / 'scale.npy').unlink()
+    progress.clear()
+    results = fit_raster(source, output_dir, callback=callback,
+                         executor=ThreadPoolExecutor(1), **kwargs)
+    assert progress[0] == (1, 6)
+    assert_array_almost_equal(results['scale'].ravel(), expected['scale'])
+
+
+def test_fit_raster_stop_running_tile(tmp_path, monkeypatch):
+    # cancel and max_time are checked while a long tile runs
+    release = threading.Event()
+    raster_task = parallel._raster_task
+
+    def slow_task(*args):
+        release.wait(10)
+        return raster_task(*args)
+
+    monkeypatch.setattr(parallel, '_raster_task', slow_task)
+    source = str(tmp_path / 'raster.npy')
+    np.save(source, np.random.default_rng(0).gumbel(10, 2, size=(200, 3, 3)))
+    kwargs = dict(block_size=20, model='Gumbel', tile_shape=(3, 3))
+    with ThreadPoolExecutor(1) as executor:
+        for stop in (dict(max_time=0.2),
+                     dict(cancel=threading.Event())):
+            if 'cancel' in stop:
+                threading.Timer(0.2, stop['cancel'].set).start()
+            start = time.perf_counter()
+            with pytest.warns(PartialResultWarning):
+                results = fit_raster(source, str(tmp_path / 'out'),
+                                     executor=executor, resume=False,
+                                     **dict(kwargs, **stop))
+            assert time.perf_counter() - start < 5
+            assert np.all(np.isnan(results['scale']))
+        release.set()
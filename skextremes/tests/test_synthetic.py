@@ -0,0 +1,53 @@
+"""
+Tests for synthetic datasets module
+"""
+
+import pytest
+
+import numpy as np
+from scipy import stats
+
+from skextremes.datasets import synthetic
+
+
+def test_block_maxima():
+    x = synthetic.block_maxima(5000, c=-0.1, loc=10, scale=2,
+                               random_state=1)
+    assert np.array_equal(
+        x, synthetic.block_maxima(5000, c=-0.1, loc=10, scale=2,
+                                  random_state=1))
+    c, loc, scale = stats.genextreme.fit(x)
+    assert abs(c + 0.1) < 0.05
+    assert abs(loc - 10) < 0.2
+    assert abs(scale - 2) < 0.2
+    with pytest.raises(ValueError):
+        synthetic.block_maxima(10, distribution="Weibull")
+
+
+def test_series_chunks_reproducible():
+    kwargs = dict(n=200000, autocorrelation=0.8, gap_rate=10,
+                  seasonal_amplitude=1, trend=0.5, random_state=7)
+    expected = synthetic.series(**kwargs)
+    assert expected.shape == (200000,)
+    assert np.isnan(expected).any()
+    chunks = list(synthetic.iter_series(chunk_size=30001, **kwargs))
+    assert all(len(chunk) == 30001 for chunk in chunks[:-1])
+    np.testing.assert_array_equal(np.concatenate(chunks), expected)
+
+
+def test_series_marginal_and_clustering():
+    x = synthetic.series(200000, distribution="GEV", c=-0.1, loc=5,
+                         scale=1, autocorrelation=0.9, random_state=3)
+    # known marginal distribution
+    assert abs(np.median(x) - stats.genextreme.median(-0.1, 5, 1)) < 0.1
+    # autocorrelated series
+    assert np.corrcoef(x[:-1], x[1:])[0, 1] > 0.8
+
+
+def test_series_to_memmap(tmp_path):
+    filename = str(tmp_path / "series.npy")
+    out = synthetic.series_to_memmap(filename, 100000, frequency="daily",
+                                     chunk_size=9999, random_state=2)
+    assert isinstance(out, np.memmap)
+    np.testing.assert_array_equal(
+        out, synthetic.series(100000, frequency="daily", random_state=2))
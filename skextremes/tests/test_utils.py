@@ -3,6 +3,7 @@ Tests for utils module
 """
 
 import pytest
+import threading
 import warnings
 
 warnings.filterwarnings("always")
@@ -11,7 +12,18 @@ from numpy.testing import assert_array_almost_equal
 import numpy as np
 from scipy import stats
 
-from skextremes.utils import bootstrap_ci, gev_momfit, gum_momfit
+from lmoments3 import distr as lmdistr
+
+from skextremes.utils import (
+    PartialResultWarning,
+    bootstrap_ci,
+    adaptive_bootstrap_ci,
+    gev_momfit,
+    gum_momfit,
+    gev_lmomfit,
+    gum_lmomfit,
+    gpd_lmomfit,
+)
 
 
 class TestUtilsBootstrap:
@@ -87,6 +99,144 @@ class TestUtilsBootstrap:
         )
         assert_array_almost_equal(results, [0.22727273, 3.95121951])
 
+    def test_pi_batches_legacy(self):
+        # drawing the indexes in batches doesn't change the legacy results
+        np.random.seed(1234567890)
+        expected = bootstrap_ci(self.data, np.average, alpha=0.1,
+                                n_samples=100)
+        np.random.seed(1234567890)
+        results = bootstrap_ci(self.data, np.average, alpha=0.1,
+                               n_samples=100, batch_size=7)
+        assert_array_almost_equal(results, expected)
+
+    def test_pi_vectorized_generator(self):
+        expected = bootstrap_ci(
+            self.data, np.average, alpha=0.1, n_samples=1000,
+            random_state=np.random.default_rng(42)
+        )
+        for batch_size in (None, 33):
+            results = bootstrap_ci(
+                self.data, lambda x: np.mean(x, axis=1), alpha=0.1,
+                n_samples=1000, vectorized=True, batch_size=batch_size,
+                random_state=np.random.default_rng(42)
+            )
+            assert_array_almost_equal(results, expected)
+        # several statistics at once
+        results = bootstrap_ci(
+            self.data, lambda x: np.stack([x.mean(1), x.std(1)], axis=1),
+            alpha=0.1, n_samples=1000, vectorized=True, random_state=42
+        )
+        assert results.shape == (2, 2)
+        assert_array_almost_equal(results[:, 0], expected)
+
+    def test_bca(self):
+        # scipy.stats.bootstrap uses other samples, results are close enough
+        # with many samples
+        results = bootstrap_ci(
+            self.data, lambda x: np.mean(x, axis=1), alpha=0.1,
+            n_samples=20000, method="bca", vectorized=True, random_state=0
+        )
+        expected = stats.bootstrap(
+            (self.data,), np.mean, confidence_level=0.9, method="BCa",
+            n_resamples=20000, random_state=0
+        ).confidence_interval
+        assert_array_almost_equal(results, expected, decimal=1)
+        # not vectorized statfunction gives the same results
+        assert_array_almost_equal(
+            bootstrap_ci(self.data, np.mean, alpha=0.1, n_samples=500,
+                         method="bca", random_state=1),
+            bootstrap_ci(self.data, lambda x: np.mean(x, axis=1), alpha=0.1,
+                         n_samples=500, method="bca", vectorized=True,
+                         random_state=1),
+        )
+
+    def test_studentized(self):
+        # for the mean it should be close to the t interval
+        results = bootstrap_ci(
+            self.data, lambda x: np.mean(x, axis=1), alpha=0.1,
+            n_samples=5000, method="studentized", vectorized=True,
+            random_state=0
+        )
+        mean = self.data.mean()
+        se = stats.sem(self.data)
+        t = stats.t.ppf(0.95, len(self.data) - 1)
+        assert_array_almost_equal(results, [mean - t * se, mean + t * se],
+                                  decimal=1)
+        with pytest.raises(ValueError):
+            bootstrap_ci(self.data, method="abc")
+
+    def test_adaptive(self):
+        mean = lambda x: np.mean(x, axis=1)
+        ci, n, converged = adaptive_bootstrap_ci(
+            self.data, mean, alpha=0.1, tol=0.05, vectorized=True,
+            random_state=0
+        )
+        assert converged
+        assert 200 <= n < 10000
+        # close to the interval with many samples
+        expected = bootstrap_ci(self.data, mean, alpha=0.1, n_samples=20000,
+                                vectorized=True, random_state=1)
+        assert np.all(np.abs(ci - expected) < 0.1 * (expected[1] - expected[0]))
+        # a smaller tolerance needs more samples
+        _, n2, _ = adaptive_bootstrap_ci(
+            self.data, mean, alpha=0.1, tol=0.02, vectorized=True,
+            random_state=0
+        )
+        assert n2 > n
+        # budgets
+        ci, n, converged = adaptive_bootstrap_ci(
+            self.data, mean, alpha=0.1, tol=0.001, max_samples=1000,
+            vectorized=True, random_state=0
+        )
+        assert n == 1000 and not converged
+        ci, n, converged = adaptive_bootstrap_ci(
+            self.data, mean, alpha=0.1, tol=0.001, max_samples=10**6,
+            max_time=0, vectorized=True, random_state=0
+        )
+        assert n == 200 and not converged
+
+    def test_one_value(self):
+        # the percentile interval of a single value is the value
+        results = bootstrap_ci(np.array([3.0]), np.mean, n_samples=10)
+        assert_array_almost_equal(results, [3.0, 3.0])
+        with pytest.raises(ValueError):
+            bootstrap_ci(np.array([3.0]), np.mean, n_samples=10,
+                         method="bca")
+
+    def test_progress_and_cancel(self):
+        cancel = threading.Event()
+        progress = []
+
+        def callback(done, total):
+            progress.append((done, total))
+            if done == 30:
+                cancel.set()
+
+        with pytest.warns(PartialResultWarning):
+            ci, n, complete = bootstrap_ci(
+                self.data, np.average, n_samples=1000, random_state=0,
+                callback=callback, cancel=cancel, full_output=True
+            )
+        assert n == 30 and not complete
+        assert progress == [(i, 1000) for i in range(1, 31)]
+        assert np.all(np.isfinite(ci))
+        # out of time
+        with pytest.warns(PartialResultWarning):
+            ci, n, converged = adaptive_bootstrap_ci(
+                self.data, np.average, max_time=0, random_state=0
+            )
+        assert n == 1 and not converged
+        # without stopping the results are the same
+        ci, n, complete = bootstrap_ci(
+            self.data, np.average, n_samples=100, random_state=0,
+            callback=lambda done, total: None, full_output=True
+        )
+        assert n == 100 and complete
+        assert_array_almost_equal(
+            ci, bootstrap_ci(self.data, np.average, n_samples=100,
+                             random_state=0)
+        )
+
 
 class TestUtilsGEVMOM:
     """
@@ -194,3 +344,49 @@ class TestUtilsGUMMOM:
     def test_fit(self):
         results = gum_momfit(self.data)
         assert_array_almost_equal(results, self.expected, decimal=1)
+
+
+class TestUtilsLMOMBatch:
+    """
+    Vectorized L-moments fits are tested against ``lmoments3``, one series
+    at a time.
+    """
+
+    def setup_method(self):
+        rng = np.random.RandomState(1234)
+        self.data = np.stack(
+            [stats.genextreme.rvs(c, size=50, random_state=rng)
+             for c in (-0.9, -0.2, 0.3, 1.2)],
+            axis=1,
+        )
+        self.data[40:, 1] = np.nan
+
+    def test_gev_fit(self):
+        c, loc, scale = gev_lmomfit(self.data)
+        for i in range(self.data.shape[1]):
+            x = self.data[:, i]
+            expected = lmdistr.gev.lmom_fit(x[np.isfinite(x)])
+            assert_array_almost_equal(
+                (c[i], loc[i], scale[i]),
+                (expected["c"], expected["loc"], expected["scale"]),
+            )
+
+    def test_gum_fit(self):
+        c, loc, scale = gum_lmomfit(self.data.T, axis=1)
+        for i in range(self.data.shape[1]):
+            x = self.data[:, i]
+            expected = lmdistr.gum.lmom_fit(x[np.isfinite(x)])
+            assert c[i] == 0
+            assert_array_almost_equal(
+                (loc[i], scale[i]), (expected["loc"], expected["scale"])
+            )
+
+    def test_gpd_fit(self):
+        c, loc, scale = gpd_lmomfit(self.data, axis=0)
+        for i in range(self.data.shape[1]):
+            x = self.data[:, i]
+            expected = lmdistr.gpa.lmom_fit(x[np.isfinite(x)])
+            assert_array_almost_equal(
+                (c[i], loc[i], scale[i]),
+                (expected["c"], expected["loc"], expected["scale"]),
+            )
@@ -4,13 +4,22 @@ Tests for wind module
 
 import pytest
 
-from numpy.testing import assert_almost_equal
+import numpy as np
+from scipy import stats
+from numpy.testing import assert_almost_equal, assert_array_almost_equal
 
 from skextremes.models.wind import (
     wind_EWTSII_Exact,
     wind_EWTSII_Gumbel,
     wind_EWTSII_Davenport,
     wind_vref_5vave,
+    WindStats,
+    wind_vref_grid,
+    wind_vref_montecarlo,
+    wind_sector_extremes,
+    wind_periodic_maxima,
+    wind_storm_peaks,
+    wind_independent_storms,
 )
 
 # Results as provided by windographer
@@ -52,3 +61,180 @@ class TestWind:
         for v, e, e2 in zip(vave, expected, expected2):
             assert_almost_equal(wind_vref_5vave(v), e, decimal=5)
             assert_almost_equal(wind_vref_5vave(v, 4.5), e2, decimal=5)
+
+
+class TestWindStreaming:
+    def setup_method(self):
+        rng = np.random.default_rng(1234)
+        self.k = np.array([1.8, 2.1, 2.4])
+        self.data = np.array([8.0, 9.0, 10.0]) * rng.weibull(
+            self.k, size=(20000, 3)
+        )
+        self.data[::97, 0] = np.nan
+
+    def test_wind_stats_chunks(self):
+        stats = WindStats((3,))
+        for i in range(0, len(self.data), 1234):
+            stats.update(self.data[i:i + 1234])
+        assert_array_almost_equal(stats.vave, np.nanmean(self.data, axis=0))
+        assert_array_almost_equal(
+            stats.std, np.nanstd(self.data, axis=0, ddof=1)
+        )
+        assert_array_almost_equal(stats.k(), self.k, decimal=1)
+        assert_array_almost_equal(stats.k("logmoment"), self.k, decimal=1)
+
+    @pytest.mark.parametrize(
+        "method, func",
+        [("Exact", wind_EWTSII_Exact), ("Gumbel", wind_EWTSII_Gumbel),
+         ("Davenport", wind_EWTSII_Davenport)],
+    )
+    def test_wind_vref_grid(self, method, func):
+        grid = self.data.reshape(20000, 3, 1)
+        vref, vave, k = wind_vref_grid(grid, method=method, chunk_size=999)
+        assert vref.shape == (3, 1)
+        for i in range(3):
+            assert_almost_equal(vref[i, 0], func(vave[i, 0], k[i, 0]))
+
+
+class TestWindMonteCarlo:
+    def test_no_uncertainty(self):
+        res = wind_vref_montecarlo(vave, weibk, n_samples=10)
+        assert res.shape == (3, 4)
+        for row in res:
+            assert_array_almost_equal(row, wind_EWTSII_Exact(
+                np.array(vave), np.array(weibk)))
+
+    def test_cov_and_distributions(self):
+        cov = np.diag([0.3 ** 2, 0.1 ** 2, 0])
+        res = wind_vref_montecarlo(
+            vave, weibk, cov=cov, method="Gumbel", n_samples=20000,
+            random_state=1, max_elements=50000,
+        )
+        assert np.all(res[0] < res[1]) and np.all(res[1] < res[2])
+        assert_array_almost_equal(res[1], expected_Gumbel, decimal=0)
+        res2 = wind_vref_montecarlo(
+            vave, weibk, method="Gumbel", n_samples=20000, random_state=1,
+            distributions={"vave": stats.norm(vave, 0.3),
+                           "k": stats.norm(weibk, 0.1)},
+        )
+        assert_array_almost_equal(res2 / res, np.ones((3, 4)), decimal=1)
+
+
+class TestWindSectors:
+    def setup_method(self):
+        rng = np.random.default_rng(42)
+        n = 6 * 24 * 365 * 10
+        self.years = np.repeat(np.arange(2000, 2010), n // 10)
+        self.speed = rng.weibull(2, n) * 8
+        self.direction = rng.uniform(0, 360, n)
+
+    def test_annual_maxima(self):
+        res = wind_sector_extremes(
+            self.speed, self.direction, self.years, n_sectors=4
+        )
+        assert res["annual_maxima"].shape == (10, 4)
+        # north sector goes from 315 to 45 degrees
+        mask = (self.years == 2003) & (
+            (self.direction >= 315) | (self.direction < 45)
+        )
+        assert_almost_equal(
+            res["annual_maxima"][3, 0], self.speed[mask].max()
+        )
+        assert_array_almost_equal(
+            np.max(res["annual_maxima"], axis=1),
+            [self.speed[self.years == y].max() for y in range(2000, 2010)],
+        )
+
+    def test_missing_directions(self):
+        # records without a direction are ignored, not sent to a sector
+        direction = self.direction.copy()
+        direction[::2] = np.nan
+        speed = self.speed.copy()
+        speed[1::4] = np.nan
+        res = wind_sector_extremes(speed, direction, self.years, n_sectors=12)
+        valid = np.isfinite(direction) & np.isfinite(speed)
+        expected = wind_sector_extremes(
+            speed[valid], direction[valid], self.years[valid], n_sectors=12
+        )
+        assert_array_almost_equal(res["annual_maxima"],
+                                  expected["annual_maxima"])
+        assert_array_almost_equal(res["combined_return_values"],
+                                  expected["combined_return_values"])
+        mask = (self.years == 2003) & valid & (direction >= 315) & (
+            direction < 345)
+        assert_almost_equal(res["annual_maxima"][3, 11], speed[mask].max())
+
+    @pytest.mark.parametrize("distribution", ["Gumbel", "GEV"])
+    def test_fit_and_consistency(self, distribution):
+        res = wind_sector_extremes(
+            self.speed, self.direction, self.years, n_sectors=8,
+            distribution=distribution, return_periods=[10, 50],
+        )
+        assert res["params"].shape == (8, 3)
+        assert res["return_values"].shape == (8, 2)
+        # combining sectors can't give lower values than any sector
+        assert np.all(
+            res["combined_return_values"] >= res["return_values"].max(axis=0)
+        )
+        assert np.all(np.abs(res["consistency"] - 1) < 0.2)
+
+
+class TestWindStorms:
+    def setup_method(self):
+        rng = np.random.default_rng(7)
+        self.speed = np.round(8 * rng.weibull(2, size=20000), 1)
+        self.speed[500:520] = np.nan
+
+    def _brute_peaks(self, w, threshold=None):
+        x = np.where(np.isnan(self.speed), -np.inf, self.speed)
+        out, last = [], -w - 1
+        for i in range(len(x)):
+            window = x[max(0, i - w):i + w + 1]
+            if (np.isfinite(x[i]) and x[i] == window.max() and i - last > w
+                    and (threshold is None or x[i] > threshold)):
+                out.append(i)
+                last = i
+        return np.array(out)
+
+    def test_periodic_maxima(self):
+        expected = np.nanmax(self.speed[:19800].reshape(-1, 600), axis=1)
+        for chunk_size in (None, 7, 1000):
+            maxima = wind_periodic_maxima(self.speed, 600,
+                                          chunk_size=chunk_size)
+            assert_array_almost_equal(maxima, expected)
+
+    @pytest.mark.parametrize("chunk_size", [None, 5, 37, 1000])
+    def test_storm_peaks(self, chunk_size):
+        expected = self._brute_peaks(30)
+        idx, peaks = wind_storm_peaks(self.speed, 30, chunk_size=chunk_size)
+        assert np.array_equal(idx, expected)
+        assert_array_almost_equal(peaks, self.speed[expected])
+        expected = self._brute_peaks(30, threshold=15)
+        idx, _ = wind_storm_peaks(self.speed, 30, threshold=15,
+                                  chunk_size=chunk_size)
+        assert np.array_equal(idx, expected)
+        assert np.all(np.diff(idx) > 30)
+
+    @pytest.mark.parametrize("chunk_size", [None, 1, 4, 7])
+    def test_storm_peaks_plateau(self, chunk_size):
+        # ties are compared against the last accepted peak, not the
+        # previous candidate
+        x = np.array([1, 5, 5, 5, 5, 5, 5, 5, 5, 1, 1, 1, 3, 1, 3, 1, 3, 1.])
+        idx, peaks = wind_storm_peaks(x, 2, chunk_size=chunk_size)
+        assert np.array_equal(idx, [1, 4, 7, 12, 16])
+        assert_array_almost_equal(peaks, [5, 5, 5, 3, 3])
+
+    @pytest.mark.parametrize("model", ["Gumbel", "Lieblein", "Harris1996"])
+    def test_independent_storms(self, model):
+        # 4 "years" of 5000 records
+        res = wind_independent_storms(self.speed, 50, records_per_year=5000,
+                                      model=model, return_periods=[10, 50],
+                                      chunk_size=3000)
+        assert_almost_equal(res["rate"], len(res["peaks"]) / 4)
+        assert res["return_values"].shape == (2,)
+        assert res["return_values"][1] > res["return_values"][0]
+        assert res["return_values"][0] > np.median(res["peaks"])
+
+    def test_independent_storms_no_peaks(self):
+        with pytest.raises(ValueError):
+            wind_independent_storms(np.zeros(10000), 144, threshold=5)
@@ -3,6 +3,7 @@ This module provides utility functions that are used within scikit-extremes
 that are also useful for external consumption.
 """
 
+import time as _time
 import warnings as _warnings
 
 from numpy.random import randint as _randint
@@ -19,12 +20,21 @@ class InstabilityWarning(UserWarning):
     """Issued when results may be unstable."""
     pass
 
+class PartialResultWarning(UserWarning):
+    """Issued when a computation is cancelled or runs out of time and the
+    result is obtained with the work done so far."""
+    pass
+
 # On import, make sure that InstabilityWarnings are not filtered out.
 _warnings.simplefilter('always', InstabilityWarning)
+_warnings.simplefilter('always', PartialResultWarning)
 _warnings.simplefilter('always', UserWarning)
 
 def bootstrap_ci(data, statfunction=_np.average,
-                 alpha=0.05, n_samples=100):
+                 alpha=0.05, n_samples=100, method='pi', vectorized=False,
+                 random_state=None, batch_size=None, max_elements=2**22,
+                 callback=None, cancel=None, max_time=None,
+                 full_output=False):
     """
     Given a set of data ``data``, and a statistics function ``statfunction`` that
     applies to that data, computes the bootstrap confidence interval for
@@ -46,18 +56,58 @@ def bootstrap_ci(data, statfunction=_np.average,
         by the multi parameter.
     statfunction : function (data, weights = (weights, optional)) -> value
         This function should accept samples of data from ``data``. It is applied
-        to these samples individually.
+        to these samples individually. If ``vectorized`` is True it receives
+        a batch of samples with shape (B, N, ...) and should return the B
+        values of the statistic along the first axis, e.g.,
+        ``lambda x: numpy.mean(x, axis=1)``.
     alpha : float, optional
         The percentiles to use for the confidence interval (default=0.05). The
         returned values are (alpha/2, 1-alpha/2) percentile confidence
         intervals.
     n_samples : int or float, optional
         The number of bootstrap samples to use (default=100)
+    method : str, optional
+        The method used to calculate the confidence interval, 'pi'
+        (default value), 'bca' or 'studentized'. See below.
+    vectorized : bool, optional
+        If True, ``statfunction`` is applied to batches of samples instead of
+        to every sample (default=False).
+    random_state : numpy.random.Generator, int or None, optional
+        Generator (or seed for a new one) used to draw the samples. If None
+        (default value), the global numpy random state is used and the results
+        are the same as in previous versions.
+    batch_size : int, optional
+        Number of samples drawn (and passed to ``statfunction`` if
+        ``vectorized`` is True) at once. By default it is chosen so every batch
+        has at most ``max_elements`` values.
+    max_elements : int, optional
+        Maximum number of values of every batch of samples if ``batch_size``
+        is not provided (default=2**22).
+    callback : function (n_done, n_total) -> None, optional
+        Function called to report the progress, after every sample if
+        ``statfunction`` is not vectorized or after every batch otherwise.
+    cancel : object with an ``is_set`` method, optional
+        Cooperative cancellation token (e.g., a ``threading.Event``). When it
+        is set, no more samples are drawn.
+    max_time : float, optional
+        Maximum time in seconds. No more samples are drawn after it.
+    full_output : bool, optional
+        If True, the number of samples used and whether the calculation was
+        completed are also returned (default=False).
+
+    If the calculation is cancelled or runs out of time, the interval is
+    calculated using the samples already drawn and a
+    ``PartialResultWarning`` is issued.
 
     **Returns**
 
     confidences : tuple of floats
         The confidence percentiles specified by alpha
+    n_samples : int
+        Number of samples used (only if ``full_output`` is True).
+    complete : bool
+        False if the calculation was cancelled or ran out of time (only if
+        ``full_output`` is True).
 
     **Calculation Methods**
 
@@ -67,9 +117,19 @@ def bootstrap_ci(data, statfunction=_np.average,
         confidence interval calculation. However, it has several disadvantages
         compared to the bias-corrected accelerated method.
 
-        If you want to use more complex calculation methods, please, see
-        `scikits-bootstrap package
-        <https://github.com/cgevans/scikits-bootstrap>`_.
+    'bca' : Bias-Corrected Accelerated Interval (Efron 14.3)
+        The percentiles used are corrected for the bias and the skewness
+        (acceleration) of the bootstrap distribution. The acceleration is
+        obtained using the jackknife (all the leave-one-out samples of the
+        data). It gives better coverage than the percentile interval with the
+        same number of samples.
+
+    'studentized' : Bootstrap-t Interval (Efron 12.5)
+        The statistic of every sample is standardized using its jackknife
+        standard error and the interval is obtained from the percentiles of
+        that standardized statistic. It needs N extra evaluations of
+        ``statfunction`` for every sample so ``vectorized=True`` is
+        recommended.
 
 
     **References**
@@ -77,45 +137,364 @@ def bootstrap_ci(data, statfunction=_np.average,
         Efron (1993): 'An Introduction to the Bootstrap', Chapman & Hall.
     """
 
-    def bootstrap_indexes(data, n_samples=10000):
-        """
-    Given data points data, where axis 0 is considered to delineate points, return
-    an generator for sets of bootstrap indexes. This can be used as a list
-    of bootstrap indexes (with list(bootstrap_indexes(data))) as well.
-        """
-        for _ in range(n_samples):
-            yield _randint(data.shape[0], size=(data.shape[0],))
-
-    alphas = _np.array([alpha / 2,1 - alpha / 2])
-
-    data = _np.array(data)
-    tdata = (data,)
-
-    # We don't need to generate actual samples; that would take more memory.
-    # Instead, we can generate just the indexes, and then apply the statfun
-    # to those indexes.
-    bootindexes = bootstrap_indexes(tdata[0], n_samples)
-    stat = _np.array([statfunction(*(x[indexes] for x in tdata)) for indexes in bootindexes])
-    stat.sort(axis=0)
-
-    # Percentile Interval Method
-    avals = alphas
-
-    nvals = _np.round((n_samples - 1)*avals).astype('int')
-
-    if _np.any(nvals == 0) or _np.any(nvals == n_samples - 1):
-        _warnings.warn("Some values used extremal samples; results are probably unstable.", InstabilityWarning)
-    elif _np.any(nvals<10) or _np.any(nvals>=n_samples-10):
-        _warnings.warn("Some values used top 10 low/high samples; results may be unstable.", InstabilityWarning)
-
-    if nvals.ndim == 1:
-        # All nvals are the same. Simple broadcasting
-        return stat[nvals]
-    else:
-        # Nvals are different for each data point. Not simple broadcasting.
-        # Each set of nvals along axis 0 corresponds to the data at the same
-        # point in other axes.
-        return stat[(nvals, _np.indices(nvals.shape)[1:].squeeze())]
+    boot = _Bootstrap(data, statfunction, method=method,
+                      vectorized=vectorized, random_state=random_state,
+                      batch_size=batch_size, max_elements=max_elements)
+    monitor = _Monitor(callback, cancel, max_time, int(n_samples))
+    complete = boot.draw(int(n_samples),
+                         monitor if monitor.active else None)
+    if not complete:
+        monitor.warn(boot.n_samples)
+    confidences = boot.interval(alpha)
+    if full_output:
+        return confidences, boot.n_samples, complete
+    return confidences
+
+
+def adaptive_bootstrap_ci(data, statfunction=_np.average, alpha=0.05,
+                          tol=0.05, min_samples=200, batch_samples=100,
+                          max_samples=10000, max_time=None, method='pi',
+                          vectorized=False, random_state=None,
+                          batch_size=None, max_elements=2**22,
+                          callback=None, cancel=None):
+    """
+    Bootstrap confidence interval (see ``bootstrap_ci``) using the number of
+    samples needed for the bounds to converge.
+
+    Samples are drawn in batches (a first batch of ``min_samples``) and the
+    Monte Carlo standard error of the bounds is estimated after every batch
+    from the order statistics around the percentiles used (the
+    distribution-free binomial interval). As the standard error decreases
+    as the inverse of the square root of the number of samples, the size of
+    the next batch is the estimated number of samples still needed (at
+    least ``batch_samples`` and at most the number of samples already
+    drawn). Sampling stops when the standard error of every bound is lower
+    than ``tol`` times the width of its interval, when the ``max_samples``
+    or ``max_time`` budgets are exhausted or when it is cancelled.
+
+    **Parameters**
+
+    data, statfunction, alpha, method, vectorized, random_state,
+    batch_size, max_elements, callback, cancel :
+        See ``bootstrap_ci``. The total number of samples reported to
+        ``callback`` is ``max_samples``.
+    tol : float, optional
+        Tolerance for the Monte Carlo standard error of the bounds relative
+        to the width of the interval (default=0.05).
+    min_samples : int, optional
+        Number of samples of the first batch (default=200).
+    batch_samples : int, optional
+        Minimum number of samples of the following batches (default=100).
+    max_samples : int, optional
+        Maximum number of samples (default=10000).
+    max_time : float, optional
+        Maximum time in seconds. Sampling stops when it is exceeded and a
+        ``PartialResultWarning`` is issued.
+
+    **Returns**
+
+    confidences : numpy.array
+        The confidence percentiles specified by alpha.
+    n_samples : int
+        Number of samples used.
+    converged : bool
+        True if the tolerance was reached, False if sampling stopped
+        because of the budgets or it was cancelled.
+    """
+    boot = _Bootstrap(data, statfunction, method=method,
+                      vectorized=vectorized, random_state=random_state,
+                      batch_size=batch_size, max_elements=max_elements)
+    monitor = _Monitor(callback, cancel, max_time, int(max_samples))
+    size = min(int(min_samples), int(max_samples))
+    while True:
+        if not boot.draw(size, monitor if monitor.active else None):
+            monitor.warn(boot.n_samples)
+            converged = False
+            break
+        confidences, mc_se = boot.interval(alpha, mc_se=True, warn=False)
+        width = _np.abs(confidences[1] - confidences[0])
+        with _np.errstate(invalid='ignore', divide='ignore'):
+            # undefined bounds (nan) are not taken into account
+            converged = bool(_np.all((mc_se <= tol * width) |
+                                     _np.isnan(confidences)))
+            ratio = _np.nanmax(_np.where(mc_se > 0, mc_se / (tol * width),
+                                         0))
+        # the standard error decreases as 1 / sqrt(n_samples), the next
+        # batch is the estimated number of samples still needed (at least
+        # batch_samples and at most doubling the samples drawn).
+        size = batch_samples
+        if _np.isfinite(ratio):
+            size = min(max(size, int((ratio**2 - 1) * boot.n_samples)),
+                       boot.n_samples)
+        size = min(int(size), int(max_samples) - boot.n_samples)
+        if converged or size <= 0:
+            break
+    return boot.interval(alpha), boot.n_samples, converged
+
+
+class _Bootstrap:
+    # Bootstrap engine used by bootstrap_ci and adaptive_bootstrap_ci.
+    # Samples can be drawn incrementally (draw) and the interval can be
+    # calculated with the samples drawn so far (interval).
+
+    def __init__(self, data, statfunction, method='pi', vectorized=False,
+                 random_state=None, batch_size=None, max_elements=2**22):
+        if method not in ('pi', 'bca', 'studentized'):
+            raise ValueError("method should be 'pi', 'bca' or 'studentized'.")
+        self.method = method
+        self.statfunction = statfunction
+        self.vectorized = vectorized
+
+        data = _np.array(data)
+        self.tdata = (data,)
+        n = self.n = data.shape[0]
+
+        # We don't need to generate actual samples; that would take more
+        # memory. Instead, we can generate just the indexes, and then apply
+        # the statfun to those indexes. Indexes are drawn in batches so the
+        # memory used is bounded. Drawing a batch from the global random
+        # state gives the same indexes than drawing them one sample at a
+        # time.
+        if random_state is None:
+            self._indexes = lambda size: _randint(n, size=(size, n))
+        else:
+            rng = _np.random.default_rng(random_state)
+            self._indexes = lambda size: rng.integers(0, n, size=(size, n))
+        values_per_point = max(1, int(_np.prod(data.shape[1:])))
+        if method in ('bca', 'studentized'):
+            # jackknife (leave-one-out) samples are needed
+            if n < 2:
+                raise ValueError("The '{}' method needs at least 2 values."
+                                 .format(method))
+            self.jk_batch_size = max(1, max_elements // (max(n - 1, 1) *
+                                                         values_per_point))
+            self.loo = _jackknife_indexes(n)
+        if batch_size is None:
+            values_per_sample = n * values_per_point
+            if method == 'studentized':
+                values_per_sample *= n
+            batch_size = max(1, max_elements // values_per_sample)
+        self.batch_size = batch_size
+
+        self._stat = []
+        self._se = []
+        self.n_samples = 0
+        self._theta = None
+        # sorted values of the samples drawn, merged after every draw
+        self._sorted = None
+
+    def draw(self, n_samples, monitor=None):
+        # Draw n_samples new samples. If a monitor is provided, the progress
+        # is reported and the calculation stops (returning False) when it
+        # is cancelled or runs out of time. Not vectorized statfunctions are
+        # monitored after every sample.
+        for start in range(0, n_samples, self.batch_size):
+            bootindexes = self._indexes(min(self.batch_size,
+                                            n_samples - start))
+            step = len(bootindexes)
+            if monitor is not None and not self.vectorized:
+                step = 1
+            for i in range(0, len(bootindexes), step):
+                self._add(bootindexes[i:i + step])
+                if monitor is not None:
+                    monitor.progress(self.n_samples)
+                    if monitor.stop():
+                        return False
+        return True
+
+    def _add(self, bootindexes):
+        # Statistic (and its jackknife standard error for the studentized
+        # method) of the samples defined by bootindexes
+        n = self.n
+        self._stat.append(_apply_stat(self.statfunction, self.tdata,
+                                      bootindexes, self.vectorized,
+                                      self.batch_size))
+        if self.method == 'studentized':
+            # jackknife samples of every bootstrap sample
+            jk = _apply_stat(self.statfunction, self.tdata,
+                             bootindexes[:, self.loo].reshape(-1, n - 1),
+                             self.vectorized, self.jk_batch_size)
+            jk = jk.reshape((len(bootindexes), n) + jk.shape[1:])
+            self._se.append(_jackknife_se(jk, axis=1))
+        self.n_samples += len(bootindexes)
+
+    def _jackknife(self):
+        # statistic of the data and their jackknife values
+        if self._theta is None:
+            self._theta = _apply_stat(self.statfunction, self.tdata,
+                                      _np.arange(self.n)[None, :],
+                                      self.vectorized, 1)[0]
+            self._jk = _apply_stat(self.statfunction, self.tdata, self.loo,
+                                   self.vectorized, self.jk_batch_size)
+        return self._theta, self._jk
+
+    def interval(self, alpha, mc_se=False, warn=True):
+        # Confidence interval using the samples drawn. If mc_se is True the
+        # Monte Carlo standard error of the bounds is also returned.
+        alphas = _np.array([alpha / 2,1 - alpha / 2])
+        n_samples = self.n_samples
+        stat = _np.concatenate(self._stat)
+
+        if self.method == 'pi':
+            # Percentile Interval Method
+            avals = alphas
+        else:
+            theta, jk = self._jackknife()
+        if self.method == 'bca':
+            # Bias-Corrected Accelerated Method
+            z0 = _st.norm.ppf(_np.mean(stat < theta, axis=0))
+            diff = _np.mean(jk, axis=0) - jk
+            with _np.errstate(invalid='ignore', divide='ignore'):
+                acc = (_np.sum(diff**3, axis=0) /
+                       (6 * _np.sum(diff**2, axis=0)**1.5))
+            acc = _np.nan_to_num(acc)
+            zs = z0 + _st.norm.ppf(alphas).reshape((2,) + (1,) * _np.ndim(z0))
+            with _np.errstate(invalid='ignore'):
+                avals = _st.norm.cdf(z0 + zs / (1 - acc * zs))
+        if self.method == 'studentized':
+            # Bootstrap-t Method, the lower bound uses the upper percentile
+            se_hat = _jackknife_se(jk, axis=0)
+            with _np.errstate(invalid='ignore', divide='ignore'):
+                stat = (stat - theta) / _np.concatenate(self._se)
+            avals = alphas[::-1]
+
+        # undefined percentiles (e.g., the statistic is nan) give nan values
+        undefined = ~_np.isfinite(avals)
+        avals = _np.where(undefined, 0, avals)
+        nvals = _np.round((n_samples - 1)*avals).astype('int')
+
+        if warn:
+            checked = nvals[~undefined]
+            if _np.any(checked == 0) or _np.any(checked == n_samples - 1):
+                _warnings.warn("Some values used extremal samples; results are probably unstable.", InstabilityWarning)
+            elif _np.any(checked<10) or _np.any(checked>=n_samples-10):
+                _warnings.warn("Some values used top 10 low/high samples; results may be unstable.", InstabilityWarning)
+
+        if mc_se:
+            # order statistics one binomial standard deviation away from
+            # those used
+            d = _np.ceil(_np.sqrt(n_samples * avals * (1 - avals)))
+            d = d.astype('int').reshape(nvals.shape)
+            stat = self._merge_sorted(stat)
+            def take(k):
+                k = _np.clip(k, 0, n_samples - 1)
+                k = k.reshape(k.shape + (1,) * (stat.ndim - k.ndim))
+                return _np.take_along_axis(
+                    stat, _np.broadcast_to(k, (2,) + stat.shape[1:]), axis=0)
+            se = (take(nvals + d) - take(nvals - d)) / 2
+            stat = take(nvals)
+        elif nvals.ndim == 1:
+            # All nvals are the same. Simple broadcasting. Only the order
+            # statistics used are needed, not a full sort
+            stat = _np.partition(stat, nvals, axis=0)[nvals]
+        else:
+            # Nvals are different for each data point. Not simple
+            # broadcasting. Each set of nvals along axis 0 corresponds to the
+            # data at the same point in other axes.
+            stat.sort(axis=0)
+            stat = _np.take_along_axis(stat, nvals, axis=0)
+        if _np.any(undefined):
+            stat = _np.where(undefined, _np.nan, stat)
+
+        if self.method == 'studentized':
+            stat = theta - stat * se_hat
+            if mc_se:
+                se = se * se_hat
+        if mc_se:
+            return stat, _np.abs(se)
+        return stat
+
+    def _merge_sorted(self, stat):
+        # Sort stat along the first axis reusing the values sorted in
+        # previous calls: only the new values are sorted and then both
+        # sorted runs are merged (the stable sort detects them), so
+        # checking the interval after every batch stays cheap.
+        # The values of every statistic are stored contiguous (transposed)
+        # as sorting along a strided axis is much slower.
+        flat = stat.reshape(len(stat), -1).T
+        if self._sorted is None:
+            self._sorted = _np.ascontiguousarray(flat)
+            self._sorted.sort(axis=1)
+        elif self._sorted.shape[1] < len(stat):
+            new = _np.ascontiguousarray(flat[:, self._sorted.shape[1]:])
+            new.sort(axis=1)
+            self._sorted = _np.concatenate((self._sorted, new), axis=1)
+            self._sorted.sort(axis=1, kind='stable')
+        return self._sorted.T.reshape(stat.shape)
+
+
+class _Monitor:
+    # Progress reporting, cooperative cancellation and time budget of long
+    # calculations (bootstrap and profile likelihood confidence intervals).
+
+    def __init__(self, callback=None, cancel=None, max_time=None, total=None):
+        self.callback = callback
+        self.cancel = cancel
+        self.total = total
+        self.deadline = None
+        if max_time is not None:
+            self.deadline = _time.perf_counter() + max_time
+
+    @property
+    def active(self):
+        return (self.callback is not None or self.cancel is not None or
+                self.deadline is not None)
+
+    def progress(self, done):
+        if self.callback is not None:
+            self.callback(done, self.total)
+
+    def stop(self):
+        if self.cancel is not None and self.cancel.is_set():
+            return True
+        return (self.deadline is not None and
+                _time.perf_counter() >= self.deadline)
+
+    def timeout(self, poll=0.1):
+        # Seconds to wait for results of other processes before checking
+        # again if the calculation should stop (None to wait until they
+        # finish).
+        if self.cancel is None and self.deadline is None:
+            return None
+        timeout = poll if self.cancel is not None else _np.inf
+        if self.deadline is not None:
+            timeout = min(timeout,
+                          max(0., self.deadline - _time.perf_counter()))
+        return timeout
+
+    def warn(self, done):
+        reason = 'cancelled'
+        if self.cancel is None or not self.cancel.is_set():
+            reason = 'out of time'
+        _warnings.warn('Calculation {} after {} of {} steps, the result is '
+                       'partial.'.format(reason, done, self.total),
+                       PartialResultWarning)
+
+
+def _jackknife_indexes(n):
+    # Leave-one-out index matrix, row i contains all the indexes except i.
+    j = _np.arange(n - 1)
+    return j + (j >= _np.arange(n)[:, None])
+
+
+def _jackknife_se(jk, axis=0):
+    # Jackknife standard error from the leave-one-out values of a statistic.
+    n = jk.shape[axis]
+    with _np.errstate(invalid='ignore'):
+        diff = jk - _np.mean(jk, axis=axis, keepdims=True)
+        return _np.sqrt((n - 1) / n * _np.sum(diff**2, axis=axis))
+
+
+def _apply_stat(statfunction, tdata, indexes, vectorized, batch_size):
+    # Value of the statistic for the samples defined by every row of the
+    # index matrix ``indexes``.
+    if vectorized:
+        return _np.concatenate([
+            _np.asarray(statfunction(*(x[indexes[i:i + batch_size]]
+                                       for x in tdata)))
+            for i in range(0, len(indexes), batch_size)])
+    return _np.array([statfunction(*(x[idx] for x in tdata))
+                      for idx in indexes])
 
 ###############################################################################
 # Function to estimate parameters of GEV using method of moments
@@ -200,3 +579,252 @@ def gum_momfit(data):
     loc = mean - scale * euler_cte
 
     return 0, loc, scale
+
+###############################################################################
+# Vectorized L-moments fits, one fit per series
+###############################################################################
+
+def _sample_lmoments(data, axis=0):
+    # First two sample L-moments and the L-skewness of each series along
+    # ``axis`` using unbiased probability weighted moments. Missing values
+    # (nan) are ignored so series can have different lengths.
+    x = _np.sort(_np.moveaxis(_np.asarray(data, dtype=float), axis, 0),
+                 axis=0)  # nan values are sorted to the end
+    n = _np.sum(_np.isfinite(x), axis=0)
+    x = _np.where(_np.isfinite(x), x, 0)
+    j = _np.arange(x.shape[0]).reshape((-1,) + (1,) * (x.ndim - 1))
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        w1 = j / (n - 1)
+        w2 = w1 * (j - 1) / (n - 2)
+        b0 = _np.sum(x, axis=0) / n
+        b1 = _np.sum(w1 * x, axis=0) / n
+        b2 = _np.sum(w2 * x, axis=0) / n
+        l1 = b0
+        l2 = 2 * b1 - b0
+        t3 = (6 * b2 - 6 * b1 + b0) / l2
+    # at least three values are needed
+    invalid = n < 3
+    l1 = _np.where(invalid, _np.nan, l1)
+    l2 = _np.where(invalid, _np.nan, l2)
+    t3 = _np.where(invalid, _np.nan, t3)
+    return l1, l2, t3
+
+
+def gev_lmomfit(data, axis=0):
+    """
+    Estimate parameters of Generalised Extreme Value distribution using
+    L-moments for many series at once. The shape parameter is obtained from
+    the L-skewness using the rational approximations (and Newton-Raphson
+    iterations for very negative L-skewness) of Hosking (see references
+    below), the same methodology used by ``lmoments3``.
+
+    **Parameters**
+
+    data : array_like
+        Sample extreme data. Each series is a 1D slice along ``axis``.
+        Missing values (``numpy.nan``) are ignored.
+    axis : int
+        Axis along which the series are defined. Default value is 0.
+
+    **Returns**
+
+    tuple
+        tuple with arrays of the shape, location and scale parameters, with
+        the same sign convention for the shape used by
+        ``scipy.stats.genextreme``. Series with less than three values or
+        with invalid L-moments get ``numpy.nan`` values.
+
+    **References**
+
+        Hosking, J.R.M. (1996): 'FORTRAN routines for use with the method of
+        L-moments, Version 3', Research Report RC20525, IBM Research
+        Division.
+    """
+    l1, l2, t3 = _sample_lmoments(data, axis=axis)
+    t3 = _np.where((l2 > 0) & (_np.abs(t3) < 1), t3, _np.nan)
+
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        # positive L-skewness
+        z = 1 - t3
+        g_pos = ((-1 + z * (1.59921491 + z * (-0.48832213 + z * 0.01573152))) /
+                 (1 + z * (-0.64363929 + z * 0.08985247)))
+        # negative L-skewness
+        g_neg = ((0.28377530 + t3 * (-1.21096399 + t3 * (-2.50728214 +
+                  t3 * (-1.13455566 + t3 * -0.07138022)))) /
+                 (1 + t3 * (2.06189696 + t3 * (1.31912239 + t3 * 0.25077104))))
+        g = _np.where(t3 > 0, g_pos, g_neg)
+
+        # Newton-Raphson iterations for L-skewness below -0.8
+        newton = t3 < -0.8
+        if _np.any(newton):
+            dl2, dl3 = _np.log(2), _np.log(3)
+            g = _np.where(t3 <= -0.97, 1 - _np.log(1 + t3) / dl2, g)
+            t0 = (t3 + 3) * 0.5
+            gn = g
+            for _ in range(20):
+                x2, x3 = 2. ** -gn, 3. ** -gn
+                xx2, xx3 = 1 - x2, 1 - x3
+                deriv = (xx2 * x3 * dl3 - xx3 * x2 * dl2) / xx2 ** 2
+                gn = gn - (xx3 / xx2 - t0) / deriv
+            g = _np.where(newton, gn, g)
+
+        gumbel = _np.abs(g) < 1e-5
+        gam = _gamma(1 + g)
+        scale = _np.where(gumbel, l2 / _np.log(2),
+                          l2 * g / (gam * (1 - 2. ** -g)))
+        loc = _np.where(gumbel, l1 - 0.5772156649015329 * scale,
+                        l1 - scale * (1 - gam) / g)
+    c = _np.where(gumbel, 0., g)
+    return c, loc, scale
+
+
+def gum_lmomfit(data, axis=0):
+    """
+    Estimate parameters of Gumbel distribution using L-moments for many
+    series at once.
+
+    **Parameters**
+
+    data : array_like
+        Sample extreme data. Each series is a 1D slice along ``axis``.
+        Missing values (``numpy.nan``) are ignored.
+    axis : int
+        Axis along which the series are defined. Default value is 0.
+
+    **Returns**
+
+    tuple
+        tuple with arrays of the shape, location and scale parameters. In
+        this case, the shape parameter is always 0.
+
+    **References**
+
+        Hosking, J.R.M. and Wallis, J.R. (1997): 'Regional Frequency
+        Analysis: An Approach Based on L-Moments', Cambridge University
+        Press.
+    """
+    l1, l2, _ = _sample_lmoments(data, axis=axis)
+    scale = l2 / _np.log(2)
+    loc = l1 - 0.5772156649015329 * scale
+    return _np.zeros_like(loc), loc, scale
+
+
+def gpd_lmomfit(data, axis=0):
+    """
+    Estimate parameters of Generalised Pareto distribution using L-moments
+    for many series at once.
+
+    **Parameters**
+
+    data : array_like
+        Sample data (e.g., peaks over a threshold). Each series is a 1D
+        slice along ``axis``. Missing values (``numpy.nan``) are ignored.
+    axis : int
+        Axis along which the series are defined. Default value is 0.
+
+    **Returns**
+
+    tuple
+        tuple with arrays of the shape, location and scale parameters, with
+        the same sign convention for the shape used by
+        ``scipy.stats.genpareto``. Series with less than three values or
+        with invalid L-moments get ``numpy.nan`` values.
+
+    **References**
+
+        Hosking, J.R.M. and Wallis, J.R. (1997): 'Regional Frequency
+        Analysis: An Approach Based on L-Moments', Cambridge University
+        Press.
+    """
+    l1, l2, t3 = _sample_lmoments(data, axis=axis)
+    t3 = _np.where((l2 > 0) & (_np.abs(t3) < 1), t3, _np.nan)
+    k = (1 - 3 * t3) / (1 + t3)
+    scale = (1 + k) * (2 + k) * l2
+    loc = l1 - (2 + k) * l2
+    return -k, loc, scale
+
+
+def _gpd_isf(q, c, loc, scale):
+    # Inverse survival function of the GPD (scipy sign convention) that
+    # broadcasts the probabilities against arrays of parameters.
+    c = _np.asarray(c)
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        logq = _np.log(_np.asarray(q, dtype=float))
+        reduced = _np.expm1(-c * logq)
+        reduced /= _np.where(c == 0, 1, c)
+        reduced = _np.where(c == 0, -logq, reduced)
+        return loc + scale * reduced
+
+
+###############################################################################
+# Newton minimization of many likelihoods at once
+###############################################################################
+def _hessian(fun, theta, grad, index):
+    # Finite differences of the analytic gradient, (m, k, k).
+    step = 1e-6 * (1 + _np.abs(theta))
+    hess = _np.empty(theta.shape + theta.shape[1:])
+    for j in range(theta.shape[1]):
+        shifted = theta.copy()
+        shifted[:, j] += step[:, j]
+        hess[:, :, j] = (fun(shifted, index)[1] - grad) / step[:, j, None]
+    return (hess + hess.transpose(0, 2, 1)) / 2
+
+
+def _solve(hess, grad):
+    # Newton steps, gradient steps if the hessian is singular.
+    try:
+        return -_np.linalg.solve(hess, grad[..., None])[..., 0]
+    except _np.linalg.LinAlgError:
+        step = -grad.copy()
+        for i in range(len(grad)):
+            try:
+                step[i] = -_np.linalg.solve(hess[i], grad[i])
+            except _np.linalg.LinAlgError:
+                pass
+        return step
+
+
+def _newton(fun, theta, tol=1e-8, maxiter=100):
+    # Minimize fun(theta, index) -> (values, gradients) for every series
+    # (rows of theta) using Newton steps with backtracking. Only the series
+    # not converged yet are evaluated. Returns (theta, values, converged).
+    theta = _np.array(theta, dtype=float)
+    f, g = fun(theta, _np.arange(len(theta)))
+    converged = _np.zeros(len(theta), dtype=bool)
+    active = _np.isfinite(f)
+    for _ in range(maxiter):
+        index = _np.flatnonzero(active & ~converged)
+        if not len(index):
+            break
+        th, f0, g0 = theta[index], f[index], g[index]
+        step = _solve(_hessian(fun, th, g0, index), g0)
+        slope = (g0 * step).sum(axis=1)
+        # not a descent direction, gradient step
+        bad = ~(slope < 0)
+        step[bad] = (-g0[bad] /
+                     _np.maximum(_np.abs(g0[bad]).max(axis=1), 1)[:, None])
+        slope[bad] = (g0[bad] * step[bad]).sum(axis=1)
+        # backtracking
+        t = _np.ones(len(index))
+        done = _np.zeros(len(index), dtype=bool)
+        f1, g1 = _np.empty_like(f0), _np.empty_like(g0)
+        todo = _np.arange(len(index))
+        for _ in range(40):
+            fn, gn = fun(th[todo] + t[todo, None] * step[todo], index[todo])
+            ok = fn <= f0[todo] + 1e-4 * t[todo] * slope[todo]
+            f1[todo[ok]], g1[todo[ok]] = fn[ok], gn[ok]
+            done[todo[ok]] = True
+            todo = todo[~ok]
+            if not len(todo):
+                break
+            t[todo] /= 2
+        new = th + t[:, None] * step
+        small = _np.all(
+            _np.abs(t[:, None] * step) <= 1e-6 * (1 + _np.abs(new)), axis=1)
+        conv = done & small & (_np.abs(f0 - f1) <= tol * (1 + _np.abs(f0)))
+        theta[index[done]] = new[done]
+        f[index[done]], g[index[done]] = f1[done], g1[done]
+        converged[index[conv]] = True
+        # the line search failed, no more progress is possible
+        active[index[~done]] = False
+    return theta, f, converged